@@ -1,24 +1,60 @@
-from flask import Flask, request, jsonify, send_from_directory, url_for
+from flask import Flask, Response, request, jsonify, send_from_directory, url_for
 from flask_cors import CORS
 import sys
 import os
-import base64
-import mimetypes
 from functools import wraps
 import time
 import uuid
 import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from werkzeug.utils import secure_filename
+from delivery_engine import DeliveryEngine
+from retry_queue import RetryPolicy
+from mime_cache import inline_image_cache
+from file_cache import file_cache
+from segment_cache import segment_cache
+from mime_encoding import SendMetrics
+from email_assets import (
+    IMAGE_MODE_INLINE,
+    IMAGE_MODE_REMOTE,
+    image_fingerprint,
+    images_for_mode,
+    normalize_image_mode,
+    use_data_urls,
+    use_remote_images
+)
+from http_cache import cached_json_response, compressed_bodies, content_etag, not_modified_response
+from retrieval_cache import retrieval_cache
+from template_engine import render_product_template
+from llm_scheduler import GenerationPipeline, PRIORITY_BULK
 
 # Import Cold_email_v2 directly since we're in the same directory
 from Cold_email_v2 import (
     generate_base_email_content, 
+    sample_base_email_content,
+    variant_pool,
+    query_embeddings,
+    llm_scheduler,
     send_email,
+    send_compiled_email,
     get_sn10_product_info,
     send_sn10_product_email,
     send_followup_email,
+    build_followup_email,
+    build_product_email,
+    product_segment,
+    regular_segment,
+    render_introduction,
+    IntroductionStream,
+    followup_segment,
+    prebuild_segments,
+    ensure_vector_database,
     process_excel_file,
-    send_bulk_emails
+    send_bulk_emails,
+    compare_image_mode_sizes,
+    smtp_pool,
+    sender_pool
 )
 
 app = Flask(__name__)
@@ -30,7 +66,8 @@ CORS(app, resources={
             "https://automation.sensiq.ae"  # Production frontend domain
         ],
         "methods": ["GET", "POST", "OPTIONS"],
-        "allow_headers": ["Content-Type", "Authorization"]
+        "allow_headers": ["Content-Type", "Authorization", "If-None-Match"],
+        "expose_headers": ["ETag"]
     }
 })
 
@@ -47,6 +84,39 @@ app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max upload size
 # Store job progress
 email_jobs = {}
 
+# Number of recipients a bulk job sends to concurrently (one SMTP session each)
+DELIVERY_CONCURRENCY = int(os.getenv('DELIVERY_CONCURRENCY', str(smtp_pool.max_size)))
+# Upper bound on a job's requested concurrency (each slot is a worker thread and an SMTP session)
+MAX_DELIVERY_CONCURRENCY = int(os.getenv('MAX_DELIVERY_CONCURRENCY', '32'))
+
+# Backoff for recipients that hit greylisting or temporary throttling (4xx replies)
+RETRY_POLICY = RetryPolicy(
+    max_attempts=int(os.getenv('SMTP_RETRY_ATTEMPTS', '4')),
+    base_delay=float(os.getenv('SMTP_RETRY_BASE_DELAY', '30')),
+    max_delay=float(os.getenv('SMTP_RETRY_MAX_DELAY', '900'))
+)
+
+# Batch previews: segments rendered at once, and the largest batch accepted
+PREVIEW_BATCH_CONCURRENCY = int(os.getenv('PREVIEW_BATCH_CONCURRENCY', '4'))
+PREVIEW_BATCH_MAX_ENTRIES = int(os.getenv('PREVIEW_BATCH_MAX_ENTRIES', '200'))
+
+# Seconds between progress events while a streamed preview has nothing new to show
+STREAM_PROGRESS_INTERVAL = float(os.getenv('STREAM_PROGRESS_INTERVAL', '1'))
+
+def _prebuild_segments():
+    try:
+        prebuild_segments()
+    except Exception as e:
+        print(f"Warning: Could not prebuild email segments: {e}")
+    try:
+        ensure_vector_database()
+    except Exception as e:
+        print(f"Warning: Could not build the local vector index: {e}")
+
+# Render every campaign segment (and build a missing local vector index) in
+# the background so the first job starts warm
+threading.Thread(target=_prebuild_segments, daemon=True).start()
+
 def handle_timeout(func):
     @wraps(func)
     def wrapper(*args, **kwargs):
@@ -67,19 +137,6 @@ def handle_timeout(func):
             }), 500
     return wrapper
 
-def get_image_as_data_url(filename):
-    try:
-        file_path = os.path.join(ASSETS_FOLDER, filename)
-        if os.path.exists(file_path):
-            with open(file_path, 'rb') as f:
-                image_data = f.read()
-                mime_type = mimetypes.guess_type(filename)[0]
-                b64_data = base64.b64encode(image_data).decode('utf-8')
-                return f'data:{mime_type};base64,{b64_data}'
-    except Exception as e:
-        print(f"Error loading image {filename}: {e}")
-        return ''
-
 @app.route('/assets/<path:filename>')
 def serve_asset(filename):
     return send_from_directory(ASSETS_FOLDER, filename)
@@ -101,45 +158,16 @@ def preview_email():
         test_email = data.get('email', '')
         email_type = data.get('emailType', 'regular')
         followup_stage = data.get('followupStage')
+        # 'remote' returns public /assets URLs instead of embedding the images as data URLs
+        image_mode = data.get('imageMode') or IMAGE_MODE_INLINE
 
         print(f"Received request - Type: {email_type}, Recipient: {recipient_type}, Country: {country}, Language: {language}")
 
+        segment = None
         if email_type == 'product':
             try:
-                # Get product info
-                product_info = get_sn10_product_info()
-                
-                # Read product template
-                template_path = os.path.join(
-                    os.path.dirname(os.path.abspath(__file__)),
-                    'templates',
-                    'product_template.html'
-                )
-                with open(template_path, 'r', encoding='utf-8') as f:
-                    body = f.read()
-                
-                # Replace placeholders
-                body = body.replace('{{product_name}}', product_info['name'])
-                body = body.replace('{{product_subtitle}}', product_info['subtitle'])
-                body = body.replace('{{product_image}}', 'cid:product')
-                
-                # Format technical specifications
-                specs_html = ''
-                for category, details in product_info['technical_specs'].items():
-                    specs_html += f'<div class="content-text"><h3 style="color: #0ef0a1;">{category.title()}</h3><ul style="list-style: none; padding-left: 0;">'
-                    for key, value in details.items():
-                        specs_html += f'<li style="margin-bottom: 8px;"><strong style="color: #9ba6b7;">{key.replace("_", " ").title()}:</strong> {value}</li>'
-                    specs_html += '</ul></div>'
-                body = body.replace('{{technical_specs}}', specs_html)
-                
-                # Format key features
-                features_html = '<ul style="list-style: none; padding-left: 0;">'
-                for feature in product_info['key_features']:
-                    features_html += f'<li style="margin-bottom: 8px; color: #9ba6b7;">• {feature}</li>'
-                features_html += '</ul>'
-                body = body.replace('{{key_features}}', features_html)
-                
-                subject = f"Introducing {product_info['name']}: Advanced Waste Management Solution"
+                # Rendered once per process and shared with bulk jobs
+                segment = product_segment()
             except Exception as e:
                 print(f"Error generating product email: {e}")
                 return jsonify({
@@ -155,38 +183,8 @@ def preview_email():
                         'error': 'Follow-up stage is required for follow-up emails'
                     }), 400
 
-                # Read follow-up template
-                template_path = os.path.join(
-                    os.path.dirname(os.path.abspath(__file__)),
-                    'templates',
-                    'followup_template.html'
-                )
-                with open(template_path, 'r', encoding='utf-8') as f:
-                    body = f.read()
-
-                # Get follow-up content with validated parameters
-                from templates.followup_content import get_followup_content
-                content = get_followup_content(
-                    country=country,
-                    recipient_type=recipient_type,
-                    followup_stage=followup_stage
-                )
-
-                # Replace placeholders
-                recipient_name = test_email.split('@')[0].title() if test_email else '[recipient_name]'
-                body = body.replace('{{recipient_name}}', recipient_name)
-                body = body.replace('{{followup_intro}}', content['followup_intro'])
-                body = body.replace('{{country_specific_content}}', content['country_specific_content'])
-                body = body.replace('{{main_content}}', content['main_content'])
-                body = body.replace('{{cta_message}}', content['cta_message'])
-
-                # Generate subject line based on follow-up stage and country
-                subject_prefixes = {
-                    'first': "Following up: ",
-                    'second': "Re: ",
-                    'third': "Final follow-up: "
-                }
-                subject = f"{subject_prefixes[followup_stage]}Smart Waste Management Solution for {country}"
+                # Cached per segment; only the recipient name is spliced in
+                segment = followup_segment(country, recipient_type, followup_stage)
 
             except Exception as e:
                 print(f"Error generating follow-up email: {e}")
@@ -209,25 +207,35 @@ def preview_email():
                     'error': f'Error generating regular email: {str(e)}'
                 }), 500
 
-        # Replace image CIDs with data URLs
-        logo_data_url = get_image_as_data_url('logo.png')
-        cover_data_url = get_image_as_data_url('Cover.png')
-        product_data_url = get_image_as_data_url('SN10.jpg')
-
-        body = body.replace('cid:logo', logo_data_url)
-        body = body.replace('cid:cover', cover_data_url)
-        body = body.replace('cid:product', product_data_url)
+        etag = None
+        if segment is not None:
+            # Tagged from the segment's content and the images before rendering, so a
+            # revalidation is answered without building a multi-megabyte inline body
+            etag = content_etag(segment.digest, test_email, image_mode, image_fingerprint(image_mode))
+            if request.if_none_match.contains(etag):
+                return not_modified_response(etag)
+            recipient_name = test_email.split('@')[0].title() if test_email else '[recipient_name]'
+            subject, body = segment.subject, segment.render(recipient_name)
 
         # Replace [recipient_name] with name from email if provided
         if test_email:
             name = test_email.split('@')[0].title()
             body = body.replace('[recipient_name]', name)
 
-        return jsonify({
+        # Replace image CIDs with data URLs, or with public /assets URLs in remote mode
+        if image_mode == IMAGE_MODE_REMOTE:
+            body = use_remote_images(body)
+        else:
+            body = use_data_urls(body)
+
+        # Compressed, with an ETag so repeated previews of a segment revalidate with a 304.
+        # Regular emails are fresh LLM output, so their compressed bodies are not kept;
+        # inline bodies are mostly base64 data URLs, which gzip barely shrinks.
+        return cached_json_response({
             'success': True,
             'subject': subject,
             'body': body
-        })
+        }, request, cache_body=segment is not None, etag=etag, compress=image_mode == IMAGE_MODE_REMOTE)
 
     except Exception as e:
         print(f"Error in preview_email: {str(e)}")
@@ -236,6 +244,212 @@ def preview_email():
             'error': str(e)
         }), 500
 
+def _sse(event, payload):
+    """One Server-Sent Events message with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(payload)}\n\n"
+
+@app.route('/api/preview-email/stream', methods=['GET', 'POST'])
+def preview_email_stream():
+    """
+    Stream a preview as Server-Sent Events.
+
+    Takes the same fields as /api/preview-email, as a JSON body or (for
+    EventSource) query parameters. Events:
+
+    - template: {subject, body} right away; for regular emails the body has
+      an empty <span id="intro-stream"></span> where the introduction goes
+    - token: {text} for each piece of the introduction as the model writes it;
+      pieces are already filtered and add up to the final introduction, with
+      paragraphs separated by newlines
+    - progress: {stage} at most every STREAM_PROGRESS_INTERVAL seconds while
+      the model is working but no new text can be shown (e.g. reasoning)
+    - done: {success, subject, body} with the final HTML
+    - error: {success, error}
+
+    Regular emails always use intro-only generation here, whatever
+    REGULAR_GENERATION_MODE is set to.
+    """
+    data = request.get_json(silent=True) or request.args
+    recipient_type = data.get('recipientType', 'municipality')
+    country = data.get('country', 'UAE')
+    test_email = data.get('email', '')
+    email_type = data.get('emailType', 'regular')
+    followup_stage = data.get('followupStage')
+    # Remote /assets URLs by default, so the first event is not megabytes of data URLs
+    image_mode = data.get('imageMode') or IMAGE_MODE_REMOTE
+    name = test_email.split('@')[0].title() if test_email else None
+
+    def finish(body):
+        """Personalize a body and resolve its images for the browser"""
+        if name:
+            body = body.replace('[recipient_name]', name)
+        if image_mode == IMAGE_MODE_REMOTE:
+            return use_remote_images(body)
+        return use_data_urls(body)
+
+    def generate():
+        try:
+            if email_type == 'product':
+                subject, body = build_product_email()
+                body = finish(body)
+                yield _sse('template', {'subject': subject, 'body': body})
+                yield _sse('done', {'success': True, 'subject': subject, 'body': body})
+                return
+            if email_type == 'followup':
+                if not followup_stage:
+                    raise ValueError('Follow-up stage is required for follow-up emails')
+                segment = followup_segment(country, recipient_type, followup_stage)
+                body = finish(segment.render(name or '[recipient_name]'))
+                yield _sse('template', {'subject': segment.subject, 'body': body})
+                yield _sse('done', {'success': True, 'subject': segment.subject, 'body': body})
+                return
+
+            # The fixed part is cached, so it goes out before any retrieval or LLM work
+            segment = regular_segment(recipient_type, country)
+            yield _sse('template', {
+                'subject': segment.subject,
+                'body': finish(segment.render('<span id="intro-stream"></span>'))
+            })
+
+            stream = IntroductionStream(recipient_type, country)
+            last_event = time.monotonic()
+            for text in stream:
+                if text:
+                    yield _sse('token', {'text': text})
+                elif time.monotonic() - last_event >= STREAM_PROGRESS_INTERVAL:
+                    yield _sse('progress', {'stage': 'generating'})
+                else:
+                    continue
+                last_event = time.monotonic()
+            body = finish(segment.render(render_introduction(stream.introduction())))
+            yield _sse('done', {'success': True, 'subject': segment.subject, 'body': body})
+
+        except Exception as e:
+            print(f"Error in preview_email_stream: {str(e)}")
+            yield _sse('error', {'success': False, 'error': str(e)})
+
+    return Response(generate(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        # Keep reverse proxies from buffering the stream
+        'X-Accel-Buffering': 'no'
+    })
+
+def _preview_segment(email_type, country, recipient_type, language, followup_stage):
+    """
+    Render one preview segment and return a function that personalizes it.
+
+    The returned function takes a recipient name and returns (subject, body).
+    """
+    if email_type == 'product':
+        subject, body = build_product_email()
+        return lambda name: (subject, body.replace('[recipient_name]', name))
+    if email_type == 'followup':
+        if not followup_stage:
+            raise ValueError('Follow-up stage is required for follow-up emails')
+        segment = followup_segment(country, recipient_type, followup_stage)
+        return lambda name: (segment.subject, segment.render(name))
+    subject, body = generate_base_email_content(
+        recipient_type=recipient_type,
+        country=country,
+        language=language
+    )
+    return lambda name: (subject, body.replace('[recipient_name]', name))
+
+@app.route('/api/preview-batch', methods=['POST'])
+def preview_batch():
+    """
+    Preview many recipients and segments in one request.
+
+    Body: {"entries": [{"email", "emailType", "country", "recipientType",
+    "language", "followupStage"}, ...], "imageMode": "remote" | "inline"}
+
+    Each distinct segment is rendered once (concurrently, at most
+    PREVIEW_BATCH_CONCURRENCY at a time) and personalized per entry. Results
+    are streamed as NDJSON in completion order, one line per entry with its
+    index, followed by a summary line. Images default to public /assets URLs
+    to keep the stream small; imageMode "inline" embeds them as data URLs.
+    """
+    if not request.is_json:
+        return jsonify({
+            'success': False,
+            'error': 'Invalid request format. JSON required.'
+        }), 400
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({
+            'success': False,
+            'error': 'Request body must be a JSON object'
+        }), 400
+    entries = data.get('entries')
+    if not isinstance(entries, list) or not entries:
+        return jsonify({
+            'success': False,
+            'error': 'entries must be a non-empty list'
+        }), 400
+    if len(entries) > PREVIEW_BATCH_MAX_ENTRIES:
+        return jsonify({
+            'success': False,
+            'error': f'At most {PREVIEW_BATCH_MAX_ENTRIES} entries per batch'
+        }), 400
+    image_mode = data.get('imageMode') or IMAGE_MODE_REMOTE
+
+    # Group entries by segment so each one is rendered (and each LLM call made) once
+    segments = {}
+    for index, entry in enumerate(entries):
+        entry = entry if isinstance(entry, dict) else {}
+        key = (
+            entry.get('emailType', 'regular'),
+            entry.get('country', 'UAE'),
+            entry.get('recipientType', 'municipality'),
+            entry.get('language', 'English'),
+            entry.get('followupStage')
+        )
+        segments.setdefault(key, []).append((index, entry.get('email', '')))
+
+    def generate():
+        started = time.time()
+        failed = 0
+        executor = ThreadPoolExecutor(max_workers=min(PREVIEW_BATCH_CONCURRENCY, len(segments)))
+        try:
+            futures = {executor.submit(_preview_segment, *key): key for key in segments}
+            for future in as_completed(futures):
+                key = futures[future]
+                for index, email in segments[key]:
+                    result = {
+                        'index': index,
+                        'email': email,
+                        'emailType': key[0],
+                        'country': key[1],
+                        'recipientType': key[2],
+                        'followupStage': key[4]
+                    }
+                    try:
+                        personalize = future.result()
+                        name = email.split('@')[0].title() if email else '[recipient_name]'
+                        subject, body = personalize(name)
+                        if image_mode == IMAGE_MODE_REMOTE:
+                            body = use_remote_images(body)
+                        else:
+                            body = use_data_urls(body)
+                        result.update(success=True, subject=subject, body=body)
+                    except Exception as e:
+                        failed += 1
+                        print(f"Error previewing entry {index}: {e}")
+                        result.update(success=False, error=str(e))
+                    yield json.dumps(result) + '\n'
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+        yield json.dumps({
+            'done': True,
+            'total': len(entries),
+            'segments': len(segments),
+            'failed': failed,
+            'elapsed': round(time.time() - started, 3)
+        }) + '\n'
+
+    return Response(generate(), mimetype='application/x-ndjson')
+
 @app.route('/api/send-email', methods=['POST', 'OPTIONS'])
 @handle_timeout
 def send_email_endpoint():
@@ -421,6 +635,17 @@ def process_excel():
     country = data.get('country')
     language = data.get('language')
     followup_stage = data.get('followupStage')
+    try:
+        concurrency = int(data.get('concurrency') or DELIVERY_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({
+            'success': False,
+            'error': 'concurrency must be an integer'
+        }), 400
+    concurrency = min(max(concurrency, 1), MAX_DELIVERY_CONCURRENCY)
+    image_mode = normalize_image_mode(data.get('imageMode'))
+    # Regular emails only: generate a fresh email per recipient instead of sampling the variant pool
+    fresh_content = bool(data.get('freshContent')) and email_type not in ('product', 'followup')
     
     if not job_id or not email_column or not email_type or not recipient_type or not country or not language:
         return jsonify({
@@ -447,6 +672,70 @@ def process_excel():
         # Start a background thread to send emails
         import threading
         
+        # Inline mode attaches the images; remote mode links to /assets and attaches nothing
+        images = images_for_mode(image_mode)
+        
+        # Transfer encodings and sizes of this job's HTML parts
+        job_metrics = SendMetrics()
+        
+        # Fresh regular emails are generated ahead of sending, bounded by the
+        # delivery concurrency, so the job runs at the pace of the slower stage
+        pipeline = None
+        if fresh_content:
+            pipeline = GenerationPipeline(
+                email_data,
+                lambda data: generate_base_email_content(
+                    recipient_type=recipient_type,
+                    country=country,
+                    language=language,
+                    image_mode=image_mode,
+                    raise_errors=True,
+                    priority=PRIORITY_BULK
+                ),
+                depth=2 * concurrency
+            )
+        
+        def send_one(data):
+            """Render and send the email for a single recipient record"""
+            email_address = data['email']
+            name = email_address.split('@')[0].title()
+            
+            # Render email based on type
+            if email_type == 'product':
+                subject, body = build_product_email(image_mode=image_mode)
+                body = body.replace('[recipient_name]', name)
+                body = body.replace('{{recipient_name}}', name)
+            elif email_type == 'followup':
+                # Render follow-up email
+                subject, body = build_followup_email(
+                    recipient_email=email_address,
+                    country=country,
+                    recipient_type=recipient_type,
+                    followup_stage=followup_stage,
+                    image_mode=image_mode
+                )
+            elif pipeline is not None:
+                subject, body = pipeline.result(data)
+                body = body.replace('[recipient_name]', name)
+            else:
+                # Pick a pre-generated variant instead of calling the LLM per recipient
+                subject, body = sample_base_email_content(
+                    recipient_type=recipient_type,
+                    country=country,
+                    language=language,
+                    image_mode=image_mode
+                )
+                # Replace recipient name
+                body = body.replace('[recipient_name]', name)
+            
+            # Spread recipients across the configured sender accounts; SMTP errors
+            # propagate so the delivery engine can classify and retry them.
+            # The MIME skeleton and image parts are serialized once per job; only
+            # headers and the HTML part are encoded per recipient
+            sender = sender_pool.choose()
+            return send_compiled_email(email_address, subject, body, images=images, raise_errors=True,
+                                       sender=sender, metrics=job_metrics)
+        
         def send_emails_background():
             with app.app_context():
                 try:
@@ -456,89 +745,25 @@ def process_excel():
                     email_jobs[job_id]['sent'] = 0
                     email_jobs[job_id]['failed'] = 0
                     email_jobs[job_id]['start_time'] = time.time()
-                    
-                    # Get absolute paths for images relative to the Cold_email_v2.py location
-                    parent_dir = os.path.dirname(os.path.abspath(__file__))
-                    images = {
-                        'logo': os.path.join(parent_dir, 'assets', 'logo.png'),
-                        'cover': os.path.join(parent_dir, 'assets', 'Cover.png'),
-                        'product': os.path.join(parent_dir, 'assets', 'SN10.jpg')
-                    }
+                    email_jobs[job_id]['image_mode'] = image_mode
+
+                    # Start generating regular email variants while the job warms up
+                    if email_type not in ('product', 'followup') and not fresh_content:
+                        variant_pool.request_refill((recipient_type, country, language))
 
                     # Verify all image paths exist
                     for img_type, img_path in images.items():
                         if not os.path.exists(img_path):
                             raise FileNotFoundError(f"Image file not found: {img_path}")
 
-                    # Send emails to all recipients
-                    for i, data in enumerate(email_data):
-                        try:
-                            email_address = data['email']
-                            name = email_address.split('@')[0].title()
-                            
-                            # Send email based on type
-                            if email_type == 'product':
-                                # Get product info for subject line
-                                product_info = get_sn10_product_info()
-                                subject = f"Introducing {product_info['name']}: Advanced Waste Management Solution"
-                                
-                                # Read product template
-                                template_path = os.path.join(parent_dir, 'templates', 'product_template.html')
-                                with open(template_path, 'r', encoding='utf-8') as f:
-                                    body = f.read()
-                                
-                                # Replace placeholders
-                                body = body.replace('{{product_name}}', product_info['name'])
-                                body = body.replace('{{product_subtitle}}', product_info['subtitle'])
-                                body = body.replace('[recipient_name]', name)
-                                body = body.replace('{{recipient_name}}', name)
-                                body = body.replace('{{product_image}}', 'cid:product')
-                                
-                                # Format technical specifications
-                                specs_html = format_product_specs(product_info)
-                                features_html = format_product_features(product_info)
-                                body = body.replace('{{technical_specs}}', specs_html)
-                                body = body.replace('{{key_features}}', features_html)
-                                
-                                # Send the email with images
-                                success = send_email(email_address, subject, body, images=images)
-                            elif email_type == 'followup':
-                                # Send follow-up email
-                                success = send_followup_email(
-                                    recipient_email=email_address,
-                                    country=country,
-                                    recipient_type=recipient_type,
-                                    followup_stage=followup_stage
-                                )
-                            else:
-                                # Generate regular email content
-                                subject, body = generate_base_email_content(
-                                    recipient_type=recipient_type,
-                                    country=country,
-                                    language=language
-                                )
-                                # Replace recipient name
-                                body = body.replace('[recipient_name]', name)
-                                # Send regular email
-                                success = send_email(email_address, subject, body, images=images)
-                            
-                            if success:
-                                email_jobs[job_id]['sent'] += 1
-                            else:
-                                email_jobs[job_id]['failed'] += 1
-                            
-                            # Update progress
-                            email_jobs[job_id]['progress'] = int((i + 1) / len(email_data) * 100)
-                            
-                            # Add a small delay between emails to avoid rate limiting
-                            time.sleep(1)
-                            
-                        except Exception as e:
-                            email_jobs[job_id]['failed'] += 1
-                            print(f"Error sending email to {data['email']}: {str(e)}")
+                    # Send emails to all recipients with bounded concurrency
+                    DeliveryEngine(concurrency=concurrency, retry_policy=RETRY_POLICY).run(email_data, send_one, email_jobs[job_id])
                     
                     # Update job status and add completion time
                     email_jobs[job_id]['status'] = 'completed'
+                    email_jobs[job_id]['smtp_stats'] = dict(smtp_pool.stats)
+                    email_jobs[job_id]['send_metrics'] = job_metrics.as_dict()
+                    email_jobs[job_id]['senders'] = sender_pool.status()
                     email_jobs[job_id]['completion_time'] = time.time()
                     
                 except Exception as e:
@@ -546,6 +771,9 @@ def process_excel():
                     email_jobs[job_id]['error'] = str(e)
                     email_jobs[job_id]['completion_time'] = time.time()
                     print(f"Error in background thread: {str(e)}")
+                finally:
+                    if pipeline is not None:
+                        pipeline.close()
         
         # Start the background thread
         thread = threading.Thread(target=send_emails_background)
@@ -569,24 +797,6 @@ def process_excel():
             'error': f'Error processing Excel file: {str(e)}'
         }), 500
 
-def format_product_specs(product_info):
-    """Format product technical specifications into HTML."""
-    specs_html = ''
-    for category, details in product_info['technical_specs'].items():
-        specs_html += f'<div class="content-text"><h3 style="color: #0ef0a1;">{category.title()}</h3><ul style="list-style: none; padding-left: 0;">'
-        for key, value in details.items():
-            specs_html += f'<li style="margin-bottom: 8px;"><strong style="color: #9ba6b7;">{key.replace("_", " ").title()}:</strong> {value}</li>'
-        specs_html += '</ul></div>'
-    return specs_html
-
-def format_product_features(product_info):
-    """Format product features into HTML."""
-    features_html = '<ul style="list-style: none; padding-left: 0;">'
-    for feature in product_info['key_features']:
-        features_html += f'<li style="margin-bottom: 8px; color: #9ba6b7;">• {feature}</li>'
-    features_html += '</ul>'
-    return features_html
-
 @app.route('/api/job-status/<job_id>', methods=['GET'])
 def get_job_status(job_id):
     try:
@@ -631,6 +841,10 @@ def get_job_status(job_id):
             'total': job.get('total', 0),
             'sent': job.get('sent', 0),
             'failed': job.get('failed', 0),
+            'retried': job.get('retried', 0),
+            'retry_pending': job.get('retry_pending', 0),
+            'failures': job.get('failures', []),
+            'send_metrics': job.get('send_metrics'),
             'error': job.get('error')
         })
         
@@ -641,6 +855,45 @@ def get_job_status(job_id):
             'error': str(e)
         }), 500
 
+@app.route('/api/sender-status', methods=['GET'])
+def get_sender_status():
+    """Report health, rate and quota usage of every sender account"""
+    return jsonify({
+        'success': True,
+        'senders': sender_pool.status()
+    })
+
+@app.route('/api/message-size-report', methods=['GET'])
+@handle_timeout
+def message_size_report():
+    """Compare message sizes between inline and remote image modes"""
+    return jsonify({
+        'success': True,
+        'sizes': compare_image_mode_sizes()
+    })
+
+@app.route('/api/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Report hit rates and memory footprint of the in-process caches"""
+    return jsonify({
+        'success': True,
+        'inline_images': inline_image_cache.footprint(),
+        'files': dict(file_cache.stats),
+        'segments': segment_cache.footprint(),
+        'compressed_responses': compressed_bodies.footprint(),
+        'variants': variant_pool.status(),
+        'query_embeddings': query_embeddings.status(),
+        'retrieval': retrieval_cache.status()
+    })
+
+@app.route('/api/generation-status', methods=['GET'])
+def get_generation_status():
+    """Report the LLM scheduler's queue, workers and remaining rate budget"""
+    return jsonify({
+        'success': True,
+        'scheduler': llm_scheduler.status()
+    })
+
 @app.route('/api/test-email-structure', methods=['GET'])
 def test_email_structure():
     """Test endpoint to verify the email structure"""
@@ -648,23 +901,8 @@ def test_email_structure():
         # Get product info
         product_info = get_sn10_product_info()
         
-        # Get template
+        body = render_product_template(product_info)
         parent_dir = os.path.dirname(os.path.abspath(__file__))
-        template_path = os.path.join(parent_dir, 'templates', 'product_template.html')
-        
-        with open(template_path, 'r', encoding='utf-8') as f:
-            body = f.read()
-        
-        # Replace placeholders
-        body = body.replace('{{product_name}}', product_info['name'])
-        body = body.replace('{{product_subtitle}}', product_info['subtitle'])
-        body = body.replace('{{product_image}}', 'cid:product')
-        
-        # Format technical specifications
-        specs_html = format_product_specs(product_info)
-        features_html = format_product_features(product_info)
-        body = body.replace('{{technical_specs}}', specs_html)
-        body = body.replace('{{key_features}}', features_html)
         
         # Get image paths
         images = {
@@ -675,8 +913,7 @@ def test_email_structure():
         
         # Create email message
         from email.mime.multipart import MIMEMultipart
-        from email.mime.text import MIMEText
-        from email.mime.image import MIMEImage
+        from mime_encoding import build_html_part
         
         # Create a multipart message with the correct structure for inline images
         message = MIMEMultipart('alternative')
@@ -684,8 +921,8 @@ def test_email_structure():
         message["To"] = "test@example.com"
         message["Subject"] = "Test Email Structure"
         
-        # Create HTML part
-        html_part = MIMEText(body, "html")
+        # Create HTML part the same way send_email does
+        html_part = build_html_part(body)[0]
         
         # Create related part to hold the HTML and inline images
         related = MIMEMultipart('related')
@@ -694,11 +931,7 @@ def test_email_structure():
         # Attach images
         for cid, path in images.items():
             if os.path.exists(path):
-                with open(path, 'rb') as f:
-                    img = MIMEImage(f.read())
-                    img.add_header('Content-ID', f'<{cid}>')
-                    img.add_header('Content-Disposition', 'inline', filename=os.path.basename(path))
-                    related.attach(img)
+                related.attach(inline_image_cache.get_part(cid, path))
         
         # Attach the related part to the message
         message.attach(related)
@@ -742,8 +975,7 @@ def test_regular_email():
         
         # Create email message
         from email.mime.multipart import MIMEMultipart
-        from email.mime.text import MIMEText
-        from email.mime.image import MIMEImage
+        from mime_encoding import build_html_part
         
         # Create a multipart message with the correct structure for inline images
         message = MIMEMultipart('alternative')
@@ -751,8 +983,8 @@ def test_regular_email():
         message["To"] = "test@example.com"
         message["Subject"] = subject
         
-        # Create HTML part
-        html_part = MIMEText(body, "html")
+        # Create HTML part the same way send_email does
+        html_part = build_html_part(body)[0]
         
         # Create related part to hold the HTML and inline images
         related = MIMEMultipart('related')
@@ -761,11 +993,7 @@ def test_regular_email():
         # Attach images
         for cid, path in images.items():
             if os.path.exists(path):
-                with open(path, 'rb') as f:
-                    img = MIMEImage(f.read())
-                    img.add_header('Content-ID', f'<{cid}>')
-                    img.add_header('Content-Disposition', 'inline', filename=os.path.basename(path))
-                    related.attach(img)
+                related.attach(inline_image_cache.get_part(cid, path))
         
         # Attach the related part to the message
         message.attach(related)
@@ -0,0 +1,147 @@
+"""
+Microbenchmark for email_layout.create_html_email.
+
+Compares the prebuilt layout against the previous implementation (kept
+below as legacy_create_html_email, using the same static text) on typical
+LLM outputs, and checks that both produce identical HTML.
+
+Usage:
+    python benchmarks/bench_create_html_email.py --number 2000
+    python -m pytest benchmarks/bench_create_html_email.py
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+import email_layout  # noqa: E402
+from email_assets import IMAGE_MODE_INLINE, IMAGE_MODE_REMOTE, use_remote_images  # noqa: E402
+
+# Body as extracted from a full model response (template followed exactly)
+FULL_OUTPUT = """Hi [recipient_name],
+Municipalities across the UAE are turning to real-time fill-level data to cut collection costs, and Dubai's Smart City strategy makes this the right moment to modernize. Our SN10 sensor gives your teams live visibility of every bin.
+Why SN10 for Municipality Waste Management?
+✅ Smart City Integration – Real-time monitoring and optimization
+✅ Cost Optimization – Reduce operational costs by up to 30%
+✅ Service Quality – Enhance service quality and impact
+✅ Data Insights – Advanced analytics and reporting
+✅ Sustainability Goals – Support UAE Federal Law No. 12
+🚀 Get Started with a Free Trial!
+We make it easy to evaluate our solution:
+📅 Schedule a Demo: https://calendly.com/sameer-sensiq/30min
+📱 WhatsApp or Call Us: https://wa.me/971528004558
+🎟 Request a Trial Project: https://www.sensiq.ae/trial
+You can also visit our website for more details: https://www.sensiq.ae
+Looking forward to helping you modernize waste management and achieve your sustainability targets!
+Best regards,
+Rebecca
+Business Development Representative
+SensIQ
+📞 <a href="tel:+97152800455" style="color: #9ba6b7; text-decoration: none;">+971 52 800 4558</a> | 🌐 <a href="https://www.sensiq.ae" style="color: #9ba6b7; text-decoration: none;">www.sensiq.ae</a>
+📲 WhatsApp: +971 528004558"""
+
+# Shorter response where the model dropped most of the template
+SHORT_OUTPUT = """Hi [recipient_name],
+Charities in Saudi Arabia can redirect waste collection savings to their mission with SN10 smart sensors.
+✅ Cost Optimization – Reduce operational costs by up to 30%
+Looking forward to hearing from you!
+Best regards,
+Rebecca"""
+
+# Response with a "Why SensIQ?" section, which opens an info box before the call to action
+INFO_BOX_OUTPUT = FULL_OUTPUT.replace(
+    "Why SN10 for Municipality Waste Management?",
+    "Why SensIQ?"
+)
+
+SAMPLES = {
+    'full': FULL_OUTPUT,
+    'short': SHORT_OUTPUT,
+    'info_box': INFO_BOX_OUTPUT,
+}
+
+
+def legacy_create_html_email(body_text, image_mode=IMAGE_MODE_INLINE):
+    """The implementation create_html_email replaced, for comparison"""
+    paragraphs = [p.strip() for p in body_text.split('\n') if p.strip()]
+
+    html_content = email_layout._HEAD
+
+    parts = []
+    for p in paragraphs:
+        if "Hi [recipient_name]" in p or "Hi {{recipient_name}}" in p or "Hi " in p:
+            parts.append(f'<div class="content-text">{p}</div>')
+            parts.append(email_layout._PRODUCT_SHOWCASE)
+        elif "Why SensIQ?" in p:
+            parts.append(email_layout._WHY_SENSIQ_OPEN)
+        elif p.startswith("✅"):
+            parts.append(f'<div class="feature-item">{p}</div>')
+        elif "We make it easy" in p:
+            if "info-box" in "".join(parts):
+                parts.append("</div></div>")
+            parts.append(email_layout._GET_STARTED)
+        elif "Looking forward" in p:
+            parts.append(email_layout._SIGNATURE_OPEN)
+            parts.append(f'<div class="content-text">{p}</div>')
+            parts.append("</div></div>")
+        elif "visit our website" in p.lower():
+            parts.append(email_layout._WEBSITE_BOX)
+        elif not any(p.startswith(icon) for icon in ["📅", "📱", "🎟"]):
+            parts.append(f'<div class="content-text">{p}</div>')
+
+    html_content += "\n".join(parts)
+    if image_mode == IMAGE_MODE_REMOTE:
+        html_content = use_remote_images(html_content)
+    return html_content
+
+
+IMPLEMENTATIONS = {
+    'legacy': legacy_create_html_email,
+    'layout': email_layout.create_html_email,
+}
+
+
+@pytest.mark.parametrize('image_mode', [IMAGE_MODE_INLINE, IMAGE_MODE_REMOTE])
+@pytest.mark.parametrize('sample', sorted(SAMPLES))
+def test_output_identical(sample, image_mode):
+    body = SAMPLES[sample]
+    assert email_layout.create_html_email(body, image_mode) == legacy_create_html_email(body, image_mode)
+
+
+def measure(number, repeat=5):
+    """Microseconds per call of each implementation, keyed by (sample, image_mode)"""
+    results = {}
+    for sample in sorted(SAMPLES):
+        for image_mode in (IMAGE_MODE_INLINE, IMAGE_MODE_REMOTE):
+            timings = {}
+            for name, func in IMPLEMENTATIONS.items():
+                seconds = min(timeit.repeat(lambda: func(SAMPLES[sample], image_mode), number=number, repeat=repeat))
+                timings[name] = seconds / number * 1e6
+            results[(sample, image_mode)] = timings
+    return results
+
+
+def test_benchmark_runs():
+    results = measure(number=20, repeat=1)
+    assert len(results) == len(SAMPLES) * 2
+    assert all(timings['legacy'] > 0 and timings['layout'] > 0 for timings in results.values())
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=2000, help='Calls per timing run')
+    args = parser.parse_args()
+
+    print(f"{'sample':<10} {'mode':<8} {'legacy us':>10} {'layout us':>10} {'speedup':>8}")
+    for (sample, image_mode), timings in measure(args.number).items():
+        print(f"{sample:<10} {image_mode:<8} {timings['legacy']:>10.1f} {timings['layout']:>10.1f} "
+              f"{timings['legacy'] / timings['layout']:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""
+Ingestion throughput: per-chunk encode and upsert vs ingestion.ingest_chunks.
+
+Builds a synthetic product catalog by repeating the components.txt sections
+with numbered variants and ingests it into a temporary local index, once
+the old way (one forward pass and one upsert per chunk) and once batched.
+Needs sentence-transformers and downloads all-MiniLM-L6-v2 on first run.
+
+Usage:
+    python benchmarks/bench_ingestion.py --chunks 2000
+    python -m pytest benchmarks/bench_ingestion.py
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT_DIR)
+
+from ingestion import ingest_chunks  # noqa: E402
+from vector_index import LocalVectorIndex  # noqa: E402
+
+
+def catalog(count):
+    """`count` chunks made from the components.txt sections"""
+    with open(os.path.join(ROOT_DIR, 'components.txt'), 'r') as file:
+        sections = [section.strip() for section in file.read().split('\n\n') if section.strip()]
+    return [f"{sections[i % len(sections)]}\n- Variant: {i}" for i in range(count)]
+
+
+def per_chunk_ingest(index, model, chunks):
+    """The loop the ingestion paths used before ingest_chunks"""
+    started = time.perf_counter()
+    for i, chunk in enumerate(chunks):
+        embedding = model.encode(chunk)
+        index.upsert(vectors=[{'id': f'chunk_{i}', 'values': embedding.tolist(), 'metadata': {'text': chunk}}])
+    elapsed = time.perf_counter() - started
+    return {'chunks': len(chunks), 'chunks_per_second': round(len(chunks) / elapsed, 1)}
+
+
+def load_model():
+    sentence_transformers = pytest.importorskip('sentence_transformers')
+    return sentence_transformers.SentenceTransformer('all-MiniLM-L6-v2')
+
+
+def test_batched_ingest_matches_per_chunk():
+    model = load_model()
+    chunks = catalog(20)
+    with tempfile.TemporaryDirectory() as directory:
+        batched = LocalVectorIndex(os.path.join(directory, 'batched.npz'))
+        single = LocalVectorIndex(os.path.join(directory, 'single.npz'))
+        ingest_chunks(batched, model, chunks, [f'chunk_{i}' for i in range(len(chunks))], batch_size=8)
+        per_chunk_ingest(single, model, chunks)
+        for chunk in chunks[:5]:
+            query = model.encode(chunk)
+            expected = single.query(query, top_k=3)['matches']
+            actual = batched.query(query, top_k=3)['matches']
+            assert [m['id'] for m in actual] == [m['id'] for m in expected]
+            assert all(abs(a['score'] - e['score']) < 1e-4 for a, e in zip(actual, expected))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunks', type=int, default=1000, help='Catalog size')
+    parser.add_argument('--baseline-chunks', type=int, default=200,
+                        help='Chunks for the per-chunk baseline (it is slow)')
+    parser.add_argument('--batch-size', type=int, default=64)
+    args = parser.parse_args()
+
+    model = load_model()
+    with tempfile.TemporaryDirectory() as directory:
+        baseline = per_chunk_ingest(
+            LocalVectorIndex(os.path.join(directory, 'baseline.npz')), model, catalog(args.baseline_chunks))
+        batched = ingest_chunks(
+            LocalVectorIndex(os.path.join(directory, 'batched.npz')), model, catalog(args.chunks),
+            [f'chunk_{i}' for i in range(args.chunks)], batch_size=args.batch_size)
+    print(f"per-chunk: {baseline['chunks_per_second']:>8} chunks/sec ({baseline['chunks']} chunks)")
+    print(f"batched:   {batched['chunks_per_second']:>8} chunks/sec ({batched['chunks']} chunks)")
+
+
+if __name__ == '__main__':
+    main()
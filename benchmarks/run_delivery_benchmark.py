@@ -0,0 +1,252 @@
+"""
+Delivery throughput benchmark against the local SMTP sink.
+
+Points the send path at benchmarks/smtp_sink.py instead of the real relay
+and measures two paths at several recipient counts:
+
+    send_email      direct calls to Cold_email_v2.send_email from a thread pool
+    process_excel   the full /api/upload-excel + /api/process-excel job via the Flask test client
+
+For each run it reports messages/sec, p50/p99 per-message send latency and
+the mean size of the messages the sink received.
+
+Usage:
+    python benchmarks/run_delivery_benchmark.py
+    python benchmarks/run_delivery_benchmark.py --sizes 100 1000 --paths send_email --latency-ms 30
+"""
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, ROOT_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+# The sink accepts any login, so a real mailbox password is not needed
+os.environ.setdefault("EMAIL_PASSWORD", "benchmark")
+
+from smtp_sink import SMTPSink  # noqa: E402
+
+SAMPLE_BODY = """Subject: Smart ESG Waste Management – Get a Free Demo & Trial
+Hi [recipient_name],
+Municipalities across the UAE are using real-time fill-level data to cut collection costs and support Smart Dubai goals.
+✅ Smart City Integration – Real-time monitoring and optimization
+✅ Cost Optimization – Reduce operational costs by up to 30%
+We make it easy to evaluate our solution:
+You can also visit our website for more details: https://www.sensiq.ae
+Looking forward to helping you modernize waste management and achieve your sustainability targets!"""
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(pct / 100.0 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def point_send_path_at_sink(sink, pool_size, throttle):
+    """Swap every sender's SMTP pool (and optionally rate limit) for ones that target the sink"""
+    import Cold_email_v2
+    import app
+    from smtp_pool import SMTPConnectionPool
+    from rate_limiter import configure_rate_limit, get_rate_limiter
+
+    for account in Cold_email_v2.sender_pool.accounts:
+        if not throttle:
+            configure_rate_limit(account.email, rate=1e6, burst=1e6, max_rate=1e6)
+        account.limiter = get_rate_limiter(account.email)
+        account.pool.close_all()
+        account.pool = SMTPConnectionPool(
+            '127.0.0.1',
+            sink.port,
+            account.email,
+            Cold_email_v2.password,
+            max_size=pool_size,
+            reply_listener=account.limiter.on_reply
+        )
+
+    default = Cold_email_v2.default_sender
+    Cold_email_v2.rate_limiter = default.limiter
+    Cold_email_v2.smtp_pool = default.pool
+    app.smtp_pool = default.pool
+    return default.pool
+
+
+def install_send_timer(latencies):
+    """Wrap the send functions everywhere they are referenced so each call's duration is recorded"""
+    import Cold_email_v2
+    import app
+
+    originals = {}
+    for name in ('send_email', 'send_compiled_email'):
+        original = getattr(Cold_email_v2, name)
+        originals[name] = original
+
+        def timed(*args, _original=original, **kwargs):
+            start = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - start)
+
+        setattr(Cold_email_v2, name, timed)
+        setattr(app, name, timed)
+    return originals
+
+
+def restore_send_functions(originals):
+    import Cold_email_v2
+    import app
+
+    for name, original in originals.items():
+        setattr(Cold_email_v2, name, original)
+        setattr(app, name, original)
+
+
+def bench_send_email(count, concurrency):
+    """Call send_email directly for `count` recipients"""
+    import Cold_email_v2
+
+    body = Cold_email_v2.create_html_email(SAMPLE_BODY)
+
+    def send(i):
+        personalized = body.replace('[recipient_name]', f'Recipient {i}')
+        return Cold_email_v2.send_email(f'recipient{i}@example.com', 'Benchmark', personalized)
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        return sum(1 for ok in executor.map(send, range(count)) if ok)
+
+
+def bench_process_excel(count, concurrency, email_type, image_mode, timeout):
+    """Upload a CSV of `count` recipients and run it through /api/process-excel"""
+    import app
+
+    client = app.app.test_client()
+    csv_data = 'email\n' + ''.join(f'recipient{i}@example.com\n' for i in range(count))
+    upload = client.post(
+        '/api/upload-excel',
+        data={'file': (io.BytesIO(csv_data.encode('utf-8')), 'benchmark.csv')},
+        content_type='multipart/form-data'
+    ).get_json()
+    if not upload or not upload.get('success'):
+        raise RuntimeError(f"Upload failed: {upload}")
+
+    job_id = upload['job_id']
+    started = client.post('/api/process-excel', json={
+        'job_id': job_id,
+        'email_column': 'email',
+        'emailType': email_type,
+        'recipientType': 'municipality',
+        'country': 'UAE',
+        'language': 'English',
+        'followupStage': 'first',
+        'imageMode': image_mode,
+        'concurrency': concurrency
+    }).get_json()
+    if not started or not started.get('success'):
+        raise RuntimeError(f"process-excel failed: {started}")
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = app.email_jobs.get(job_id, {})
+        if job.get('status') in ('completed', 'failed'):
+            if job['status'] == 'failed':
+                raise RuntimeError(f"Job failed: {job.get('error')}")
+            return job.get('sent', 0)
+        time.sleep(0.05)
+    raise RuntimeError(f"Job {job_id} did not finish within {timeout}s")
+
+
+def run_case(path, count, sink, args):
+    latencies = []
+    sink.reset()
+    originals = install_send_timer(latencies)
+    output = io.StringIO()
+    try:
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else output):
+            if path == 'send_email':
+                sent = bench_send_email(count, args.concurrency)
+            else:
+                sent = bench_process_excel(count, args.concurrency, args.email_type, args.image_mode, args.timeout)
+        elapsed = time.perf_counter() - start
+    finally:
+        restore_send_functions(originals)
+
+    with sink.lock:
+        sizes = [m['size'] for m in sink.messages]
+        rejections = dict(sink.rejections)
+        stats = dict(sink.stats)
+    return {
+        'path': path,
+        'recipients': count,
+        'sent': sent,
+        'seconds': round(elapsed, 3),
+        'messages_per_second': round(sent / elapsed, 2) if elapsed else 0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'bytes_per_message': int(sum(sizes) / len(sizes)) if sizes else 0,
+        'rejections': rejections,
+        'sink': stats
+    }
+
+
+def print_table(results):
+    header = f"{'path':<14}{'recipients':>11}{'sent':>8}{'msg/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'bytes/msg':>12}"
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        print(f"{r['path']:<14}{r['recipients']:>11}{r['sent']:>8}{r['messages_per_second']:>10}"
+              f"{r['p50_ms']:>10}{r['p99_ms']:>10}{r['bytes_per_message']:>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Benchmark delivery throughput against a local SMTP sink')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--paths', nargs='+', choices=['send_email', 'process_excel'],
+                        default=['send_email', 'process_excel'])
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--email-type', default='followup', choices=['followup', 'product', 'regular'],
+                        help='Email type for the process_excel path (product/regular also hit the vector DB/LLM)')
+    parser.add_argument('--image-mode', default='inline', choices=['inline', 'remote'],
+                        help='Image delivery mode for the process_excel path')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=0)
+    parser.add_argument('--temp-error-rate', type=float, default=0.0)
+    parser.add_argument('--perm-error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle', action='store_true', help='Keep the configured send rate limit')
+    parser.add_argument('--timeout', type=float, default=3600)
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    parser.add_argument('--verbose', action='store_true', help='Show send-path debug output')
+    args = parser.parse_args()
+
+    with SMTPSink(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        temp_error_rate=args.temp_error_rate,
+        perm_error_rate=args.perm_error_rate
+    ) as sink:
+        with contextlib.redirect_stdout(sys.stdout if args.verbose else io.StringIO()):
+            point_send_path_at_sink(sink, args.concurrency, args.throttle)
+
+        results = []
+        for path in args.paths:
+            for count in args.sizes:
+                result = run_case(path, count, sink, args)
+                results.append(result)
+                if not args.json:
+                    print(f"{path} x {count}: {result['messages_per_second']} msg/s", file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
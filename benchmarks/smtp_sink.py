@@ -0,0 +1,360 @@
+"""
+Local SMTP stand-in for delivery benchmarks.
+
+Speaks enough ESMTP for smtplib and the SMTP pool: EHLO/HELO, STARTTLS,
+AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET, NOOP and QUIT. It can add a
+fixed or random delay before answering each DATA and fail a configurable
+share of messages with 4xx or 5xx replies, and it records the size and
+timing of every accepted message.
+
+Run standalone:
+    python benchmarks/smtp_sink.py --port 2525 --latency-ms 20 --temp-error-rate 0.02
+"""
+import argparse
+import base64
+import os
+import random
+import shutil
+import socketserver
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+
+
+def create_self_signed_cert(directory):
+    """Generate a throwaway certificate for STARTTLS. Returns (certfile, keyfile) or None."""
+    if not shutil.which('openssl'):
+        print("WARNING: openssl not found, STARTTLS will not be offered")
+        return None
+    certfile = os.path.join(directory, 'sink-cert.pem')
+    keyfile = os.path.join(directory, 'sink-key.pem')
+    try:
+        subprocess.run(
+            ['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+             '-subj', '/CN=localhost', '-keyout', keyfile, '-out', certfile],
+            check=True, capture_output=True
+        )
+    except Exception as e:
+        print(f"WARNING: Could not create certificate ({e}), STARTTLS will not be offered")
+        return None
+    return certfile, keyfile
+
+
+class SMTPSinkHandler(socketserver.StreamRequestHandler):
+    """One SMTP conversation"""
+
+    def setup(self):
+        super().setup()
+        self.sink = self.server.sink
+        self.tls_active = False
+        self.authenticated = False
+        self._reset()
+
+    def _reset(self):
+        self.mail_from = None
+        self.rcpt_to = []
+        self.mail_started = None
+
+    def _reply(self, code, text):
+        lines = text if isinstance(text, list) else [text]
+        out = ''.join(
+            f"{code}{'-' if i < len(lines) - 1 else ' '}{line}\r\n" for i, line in enumerate(lines)
+        )
+        self.wfile.write(out.encode('ascii'))
+        self.wfile.flush()
+
+    def _readline(self):
+        return self.rfile.readline(65536).decode('utf-8', 'replace').rstrip('\r\n')
+
+    def handle(self):
+        with self.sink.lock:
+            self.sink.stats['connections'] += 1
+        self._reply(220, 'localhost smtp-sink ESMTP ready')
+        while True:
+            try:
+                line = self._readline()
+            except (ConnectionError, ssl.SSLError, OSError):
+                break
+            if not line:
+                break
+            verb, _, arg = line.partition(' ')
+            handler = getattr(self, 'smtp_' + verb.upper(), None)
+            if handler is None:
+                self._reply(502, '5.5.2 Command not recognized')
+                continue
+            if handler(arg.strip()) is False:
+                break
+
+    def smtp_HELO(self, arg):
+        self._reset()
+        self._reply(250, 'localhost')
+
+    def smtp_EHLO(self, arg):
+        self._reset()
+        features = ['localhost', '8BITMIME', 'SIZE 52428800']
+        if self.server.ssl_context and not self.tls_active:
+            features.append('STARTTLS')
+        features.append('AUTH PLAIN LOGIN')
+        self._reply(250, features)
+
+    def smtp_STARTTLS(self, arg):
+        if not self.server.ssl_context or self.tls_active:
+            self._reply(454, '4.7.0 TLS not available')
+            return
+        self._reply(220, '2.0.0 Ready to start TLS')
+        self.connection = self.server.ssl_context.wrap_socket(self.connection, server_side=True)
+        self.rfile = self.connection.makefile('rb', self.rbufsize)
+        self.wfile = self.connection.makefile('wb', 0)
+        self.tls_active = True
+        with self.sink.lock:
+            self.sink.stats['tls_handshakes'] += 1
+
+    def _check_credentials(self, username, password):
+        expected = self.sink.credentials
+        ok = expected is None or expected == (username, password)
+        if ok:
+            self.authenticated = True
+            with self.sink.lock:
+                self.sink.stats['logins'] += 1
+            self._reply(235, '2.7.0 Authentication successful')
+        else:
+            self._reply(535, '5.7.8 Authentication credentials invalid')
+
+    def smtp_AUTH(self, arg):
+        mechanism, _, initial = arg.partition(' ')
+        mechanism = mechanism.upper()
+        try:
+            if mechanism == 'PLAIN':
+                if not initial:
+                    self._reply(334, '')
+                    initial = self._readline()
+                _, username, password = base64.b64decode(initial).decode('utf-8').split('\0')
+            elif mechanism == 'LOGIN':
+                if initial:
+                    username = base64.b64decode(initial).decode('utf-8')
+                else:
+                    self._reply(334, 'VXNlcm5hbWU6')
+                    username = base64.b64decode(self._readline()).decode('utf-8')
+                self._reply(334, 'UGFzc3dvcmQ6')
+                password = base64.b64decode(self._readline()).decode('utf-8')
+            else:
+                self._reply(504, '5.5.4 Unrecognized authentication type')
+                return
+        except Exception:
+            self._reply(501, '5.5.2 Cannot decode response')
+            return
+        self._check_credentials(username, password)
+
+    def smtp_MAIL(self, arg):
+        self._reset()
+        self.mail_from = arg
+        self.mail_started = time.time()
+        self._reply(250, '2.1.0 OK')
+
+    def smtp_RCPT(self, arg):
+        if self.mail_from is None:
+            self._reply(503, '5.5.1 Need MAIL command')
+            return
+        self.rcpt_to.append(arg)
+        self._reply(250, '2.1.5 OK')
+
+    def smtp_DATA(self, arg):
+        if not self.rcpt_to:
+            self._reply(503, '5.5.1 Need RCPT command')
+            return
+        self._reply(354, 'End data with <CR><LF>.<CR><LF>')
+        chunks = []
+        size = 0
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b'.\r\n', b'.\n'):
+                break
+            if line.startswith(b'..'):
+                line = line[1:]
+            size += len(line)
+            if self.sink.keep_messages:
+                chunks.append(line)
+
+        latency = self.sink.next_latency()
+        if latency:
+            time.sleep(latency)
+
+        outcome = self.sink.next_outcome()
+        if outcome == 'temporary':
+            code = self.sink.temp_error_code
+            self.sink.record_rejection(code)
+            self._reply(code, '4.7.1 Try again later')
+            self._reset()
+            if code == 421:
+                return False
+            return
+        if outcome == 'permanent':
+            self.sink.record_rejection(550)
+            self._reply(550, '5.1.1 Mailbox unavailable')
+            self._reset()
+            return
+
+        self.sink.record_message(self.mail_from, list(self.rcpt_to), size,
+                                 b''.join(chunks) if self.sink.keep_messages else None,
+                                 time.time() - self.mail_started)
+        self._reply(250, '2.0.0 OK queued')
+        self._reset()
+
+    def smtp_RSET(self, arg):
+        self._reset()
+        with self.sink.lock:
+            self.sink.stats['resets'] += 1
+        self._reply(250, '2.0.0 OK')
+
+    def smtp_NOOP(self, arg):
+        self._reply(250, '2.0.0 OK')
+
+    def smtp_QUIT(self, arg):
+        self._reply(221, '2.0.0 Bye')
+        return False
+
+
+class _ThreadingSMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class SMTPSink:
+    """
+    In-process SMTP server that accepts and records messages.
+
+    Args:
+        host (str): Interface to bind
+        port (int): Port to bind (0 picks a free port)
+        latency_ms (float): Delay added before answering each DATA
+        latency_jitter_ms (float): Uniform random extra delay on top of latency_ms
+        temp_error_rate (float): Share of messages answered with temp_error_code
+        perm_error_rate (float): Share of messages answered with 550
+        temp_error_code (int): 4xx code used for temporary failures (421 also drops the connection)
+        credentials (tuple): (username, password) to require, or None to accept any login
+        tls (bool): Offer STARTTLS with a generated self-signed certificate
+        keep_messages (bool): Keep full message bytes instead of only sizes
+        seed (int): Random seed for reproducible error injection
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, latency_jitter_ms=0,
+                 temp_error_rate=0.0, perm_error_rate=0.0, temp_error_code=451,
+                 credentials=None, tls=True, keep_messages=False, seed=None):
+        self.host = host
+        self.port = port
+        self.latency_ms = latency_ms
+        self.latency_jitter_ms = latency_jitter_ms
+        self.temp_error_rate = temp_error_rate
+        self.perm_error_rate = perm_error_rate
+        self.temp_error_code = temp_error_code
+        self.credentials = credentials
+        self.tls = tls
+        self.keep_messages = keep_messages
+        self.lock = threading.Lock()
+        self._random = random.Random(seed)
+        self._server = None
+        self._thread = None
+        self._tempdir = None
+        self.reset()
+
+    def reset(self):
+        """Forget recorded messages and counters"""
+        with self.lock:
+            self.messages = []
+            self.rejections = {}
+            self.stats = {'connections': 0, 'tls_handshakes': 0, 'logins': 0, 'resets': 0}
+
+    def next_latency(self):
+        with self.lock:
+            jitter = self._random.uniform(0, self.latency_jitter_ms) if self.latency_jitter_ms else 0
+        return (self.latency_ms + jitter) / 1000.0
+
+    def next_outcome(self):
+        with self.lock:
+            roll = self._random.random()
+        if roll < self.temp_error_rate:
+            return 'temporary'
+        if roll < self.temp_error_rate + self.perm_error_rate:
+            return 'permanent'
+        return 'accepted'
+
+    def record_message(self, mail_from, rcpt_to, size, data, transaction_time):
+        with self.lock:
+            self.messages.append({
+                'mail_from': mail_from,
+                'rcpt_to': rcpt_to,
+                'size': size,
+                'data': data,
+                'received_at': time.time(),
+                'transaction_time': transaction_time
+            })
+
+    def record_rejection(self, code):
+        with self.lock:
+            self.rejections[code] = self.rejections.get(code, 0) + 1
+
+    def start(self):
+        """Start serving on a background thread"""
+        ssl_context = None
+        if self.tls:
+            self._tempdir = tempfile.mkdtemp(prefix='smtp-sink-')
+            cert = create_self_signed_cert(self._tempdir)
+            if cert:
+                ssl_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+                ssl_context.load_cert_chain(*cert)
+        self._server = _ThreadingSMTPServer((self.host, self.port), SMTPSinkHandler)
+        self._server.sink = self
+        self._server.ssl_context = ssl_context
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._tempdir:
+            shutil.rmtree(self._tempdir, ignore_errors=True)
+            self._tempdir = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Local SMTP sink for delivery benchmarks')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=2525)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--latency-jitter-ms', type=float, default=0)
+    parser.add_argument('--temp-error-rate', type=float, default=0.0)
+    parser.add_argument('--perm-error-rate', type=float, default=0.0)
+    parser.add_argument('--temp-error-code', type=int, default=451)
+    parser.add_argument('--no-tls', action='store_true', help='Do not offer STARTTLS')
+    args = parser.parse_args()
+
+    sink = SMTPSink(
+        host=args.host,
+        port=args.port,
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        temp_error_rate=args.temp_error_rate,
+        perm_error_rate=args.perm_error_rate,
+        temp_error_code=args.temp_error_code,
+        tls=not args.no_tls
+    ).start()
+    print(f"SMTP sink listening on {sink.host}:{sink.port} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(5)
+            with sink.lock:
+                print(f"received={len(sink.messages)} rejected={sink.rejections} {sink.stats}")
+    except KeyboardInterrupt:
+        sink.stop()
@@ -0,0 +1,122 @@
+"""
+Asyncio bulk delivery engine.
+
+Runs a job's recipient list with a bounded number of sends in flight.
+Each send is a blocking call (template rendering + SMTP) executed on a
+worker thread, so the number of concurrent SMTP sessions equals the
+engine's concurrency. Counters are written into the job record the same
+way the sequential loop did, so /api/job-status keeps working unchanged.
+
+Sends that raise a transient SMTP error are put on a delayed retry queue
+and retried with backoff; permanent failures are recorded with their
+reply code in job['failures'].
+"""
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from retry_queue import RetryQueue, classify_smtp_error
+
+
+class DeliveryEngine:
+    """
+    Deliver a list of recipients with bounded concurrency.
+
+    Args:
+        concurrency (int): Maximum number of sends in flight at once
+        retry_policy (RetryPolicy): Backoff settings for transient failures (None disables retries)
+    """
+
+    def __init__(self, concurrency=4, retry_policy=None):
+        self.concurrency = max(1, int(concurrency))
+        self.retry_policy = retry_policy
+
+    def run(self, recipients, send_one, job):
+        """
+        Deliver to every recipient and block until the job is finished.
+
+        Args:
+            recipients (list): Recipient records (dicts with at least an 'email' key)
+            send_one (callable): Blocking function taking a recipient record. Returns True on
+                success, False on an unclassified failure, or raises an SMTP exception
+            job (dict): Job record updated in place with total/sent/failed/progress
+
+        Returns:
+            dict: The updated job record
+        """
+        return asyncio.run(self._run(recipients, send_one, job))
+
+    async def _run(self, recipients, send_one, job):
+        total = len(recipients)
+        job['total'] = total
+        job['sent'] = 0
+        job['failed'] = 0
+        job['progress'] = 0
+        job['retried'] = 0
+        job['retry_pending'] = 0
+        job['failures'] = []
+        job['concurrency'] = self.concurrency
+
+        loop = asyncio.get_running_loop()
+        semaphore = asyncio.Semaphore(self.concurrency)
+        retries = RetryQueue()
+        policy = self.retry_policy
+        done = 0
+
+        def record(success):
+            nonlocal done
+            done += 1
+            if success:
+                job['sent'] += 1
+            else:
+                job['failed'] += 1
+            job['progress'] = int(done / total * 100) if total else 100
+
+        async def deliver(executor, recipient, attempts=0):
+            attempts += 1
+            async with semaphore:
+                try:
+                    success = await loop.run_in_executor(executor, send_one, recipient)
+                    error = None
+                except Exception as e:
+                    success = False
+                    error = e
+
+            if error is None:
+                record(bool(success))
+                return
+
+            category, code = classify_smtp_error(error)
+            if policy and policy.should_retry(category, attempts):
+                delay = policy.delay(attempts)
+                print(f"WARNING: Transient failure for {recipient.get('email')} "
+                      f"(code {code}), retry {attempts} in {delay:.1f}s: {error}")
+                job['retried'] += 1
+                job['retry_pending'] += 1
+
+                async def retry():
+                    job['retry_pending'] -= 1
+                    await deliver(executor, recipient, attempts)
+
+                retries.schedule(delay, retry)
+                return
+
+            print(f"Error sending email to {recipient.get('email')}: {str(error)}")
+            job['failures'].append({
+                'email': recipient.get('email'),
+                'category': category,
+                'code': code,
+                'attempts': attempts,
+                'error': str(error)
+            })
+            record(False)
+
+        start = time.time()
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='delivery') as executor:
+            await asyncio.gather(*(deliver(executor, recipient) for recipient in recipients))
+            await retries.join()
+
+        elapsed = time.time() - start
+        job['elapsed'] = elapsed
+        job['messages_per_second'] = job['sent'] / elapsed if elapsed > 0 else 0
+        return job
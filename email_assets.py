@@ -0,0 +1,117 @@
+"""
+Image delivery modes for outgoing emails.
+
+inline  Images are attached as multipart/related parts and referenced as cid:<name>.
+remote  Images are referenced by absolute URL on the public /assets location
+        (served by nginx with 30-day caching) and nothing is attached.
+
+Previews shown in the browser cannot resolve cid: references, so they embed
+the images as data URLs instead (see use_data_urls).
+"""
+import base64
+import hashlib
+import mimetypes
+import os
+
+from file_cache import file_cache
+
+IMAGE_MODE_INLINE = 'inline'
+IMAGE_MODE_REMOTE = 'remote'
+IMAGE_MODES = (IMAGE_MODE_INLINE, IMAGE_MODE_REMOTE)
+
+# Default mode for jobs that do not ask for one
+DEFAULT_IMAGE_MODE = os.getenv('IMAGE_MODE', IMAGE_MODE_INLINE)
+
+# Public location of the assets directory
+ASSET_BASE_URL = os.getenv('ASSET_BASE_URL', 'https://autoapi.sensiq.ae/assets').rstrip('/')
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Content-ID -> file name in the assets directory
+IMAGE_FILES = {
+    'logo': 'logo.png',
+    'cover': 'Cover.png',
+    'product': 'SN10.jpg'
+}
+
+
+def normalize_image_mode(mode):
+    """Validate an image mode, falling back to the default"""
+    if not mode:
+        return DEFAULT_IMAGE_MODE
+    if mode not in IMAGE_MODES:
+        print(f"Warning: Invalid image mode: {mode}, defaulting to {DEFAULT_IMAGE_MODE}")
+        return DEFAULT_IMAGE_MODE
+    return mode
+
+
+def image_paths():
+    """Absolute paths of the inline images, keyed by Content-ID"""
+    return {cid: os.path.join(ASSETS_DIR, filename) for cid, filename in IMAGE_FILES.items()}
+
+
+def asset_url(cid):
+    """Public URL of the image for a Content-ID"""
+    return f"{ASSET_BASE_URL}/{IMAGE_FILES[cid]}"
+
+
+def image_src(cid, mode=IMAGE_MODE_INLINE):
+    """Value for an <img src> in the given mode"""
+    if mode == IMAGE_MODE_REMOTE:
+        return asset_url(cid)
+    return f"cid:{cid}"
+
+
+def use_remote_images(html):
+    """Rewrite every cid: image reference in rendered HTML to its public URL"""
+    for cid in IMAGE_FILES:
+        html = html.replace(f"cid:{cid}", asset_url(cid))
+    return html
+
+
+def images_for_mode(mode):
+    """The images to attach in the given mode (none in remote mode)"""
+    return {} if mode == IMAGE_MODE_REMOTE else image_paths()
+
+
+# File name -> (content hash, data URL)
+_data_urls = {}
+
+
+def asset_digest(filename):
+    """Content hash of a file in the assets directory"""
+    return file_cache.digest(os.path.join(ASSETS_DIR, filename))
+
+
+def image_fingerprint(mode):
+    """Identifies what the images of a preview in `mode` resolve to, for ETags"""
+    if mode == IMAGE_MODE_REMOTE:
+        return ASSET_BASE_URL
+    return tuple(asset_digest(filename) for filename in IMAGE_FILES.values())
+
+
+def data_url(filename):
+    """
+    data: URL of a file in the assets directory.
+
+    Encoded once per file content: the encoding is keyed by the content
+    hash, so it is rebuilt only when the image bytes change, not when the
+    file is merely touched or copied over with the same content.
+    """
+    digest = asset_digest(filename)
+    cached = _data_urls.get(filename)
+    if cached is not None and cached[0] == digest:
+        return cached[1]
+    data = file_cache.read_bytes(os.path.join(ASSETS_DIR, filename))
+    mime_type = mimetypes.guess_type(filename)[0]
+    url = f"data:{mime_type};base64,{base64.b64encode(data).decode('ascii')}"
+    _data_urls[filename] = (hashlib.sha256(data).hexdigest(), url)
+    return url
+
+
+def use_data_urls(html):
+    """Rewrite every cid: image reference in rendered HTML to an embedded data URL"""
+    for cid, filename in IMAGE_FILES.items():
+        if f"cid:{cid}" in html:
+            html = html.replace(f"cid:{cid}", data_url(filename))
+    return html
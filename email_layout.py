@@ -0,0 +1,678 @@
+"""
+HTML layout for LLM-generated regular emails.
+
+The head, inline CSS, header and hero are one constant, and the blocks
+inserted around the generated paragraphs are prebuilt per image mode, so
+rendering is a single pass that classifies each paragraph once and
+appends prebuilt blocks. The output is byte-for-byte what the original string-building
+implementation in Cold_email_v2 produced.
+"""
+from email_assets import IMAGE_MODE_INLINE, IMAGE_MODE_REMOTE, IMAGE_MODES, use_remote_images
+
+_HEAD = """
+    <!DOCTYPE html>
+    <html lang="en">
+    <head>
+        <meta charset="UTF-8">
+        <meta name="viewport" content="width=device-width, initial-scale=1.0">
+        <style>
+            body {
+                font-family: Arial, sans-serif;
+                line-height: 1.6;
+                color: #e9eef4;
+                background-color: #0c1117;
+                margin: 0;
+                padding: 0;
+            }
+            
+            .container {
+                max-width: 600px;
+                margin: 0 auto;
+                background-color: #0c1117;
+            }
+            
+            .header {
+                background-color: #1a1f26;
+                padding: 25px 20px;
+                text-align: center;
+            }
+            
+            .logo {
+                max-width: 150px;
+                height: auto;
+            }
+            
+            .hero {
+                background-color: #131820;
+                padding: 40px 20px;
+                text-align: center;
+            }
+            
+            .hero-image {
+                width: 100%;
+                max-width: 500px;
+                height: auto;
+                margin-bottom: 20px;
+                border-radius: 8px;
+            }
+            
+            .hero-title, .greeting {
+                color: #0ef0a1;
+                font-size: 28px;
+                font-weight: 700;
+                margin-bottom: 15px;
+                background: linear-gradient(135deg, #0ef0a1 0%, #00f5c4 100%);
+                -webkit-background-clip: text;
+                background-clip: text;
+                -webkit-text-fill-color: transparent;
+            }
+            
+            .hero-subtitle {
+                color: #9ba6b7;
+                font-size: 16px;
+                margin-bottom: 30px;
+            }
+            
+            .content-section {
+                padding: 30px 20px;
+                background-color: #1a1f26;
+            }
+            
+            .feature-card {
+                background-color: #131820;
+                border: 1px solid #0ef0a1;
+                border-radius: 12px;
+                padding: 20px;
+                margin-bottom: 20px;
+            }
+            
+            .cta-button {
+                display: inline-block;
+                background: #05a67b;
+                color: white;
+                text-decoration: none;
+                padding: 14px 30px;
+                border-radius: 50px;
+                font-weight: 600;
+                font-size: 15px;
+            }
+            
+            .stats-section {
+                display: flex;
+                justify-content: center;
+                gap: 30px;
+                padding: 40px 20px;
+                flex-wrap: wrap;
+                margin-top: 30px;
+            }
+            
+            .stat-circle {
+                width: 120px;
+                height: 120px;
+                border-radius: 50%;
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                justify-content: center;
+                padding: 15px;
+                transition: all 0.3s ease;
+            }
+            
+            .stat-circle:hover {
+                transform: scale(1.05);
+                box-shadow: 0 0 20px rgba(14, 240, 161, 0.2);
+            }
+            
+            .stat-number {
+                color: #0ef0a1;
+                font-size: 24px;
+                font-weight: 700;
+                margin-bottom: 5px;
+                background: linear-gradient(135deg, #0ef0a1 0%, #00f5c4 100%);
+                -webkit-background-clip: text;
+                background-clip: text;
+                -webkit-text-fill-color: transparent;
+            }
+            
+            .stat-label {
+                color: #9ba6b7;
+                font-size: 12px;
+                text-align: center;
+                line-height: 1.2;
+            }
+            
+            .eco-badge {
+                background-color: #1a1f26;
+                border: 1px solid #05a67b;
+                border-radius: 12px;
+                padding: 20px;
+                margin: 20px;
+                text-align: center;
+            }
+            
+            .signature {
+                padding: 20px;
+                border-top: 1px solid #1a1f26;
+                color: #9ba6b7;
+            }
+            
+            .footer {
+                background-color: #0c1117;
+                color: #9ba6b7;
+                padding: 30px 20px;
+                text-align: center;
+            }
+            
+            @media screen and (max-width: 480px) {
+                .stats-section {
+                    flex-direction: row;
+                    justify-content: space-around;
+                }
+                
+                .stat-item {
+                    flex: 0 0 33.33%;
+                    padding: 10px 5px;
+                }
+                
+                .stat-number {
+                    font-size: 24px;
+                }
+                
+                .stat-label {
+                    font-size: 12px;
+                }
+            }
+            
+            .greeting {
+                font-size: 20px;
+                margin: 20px 0;
+                padding: 10px 0;
+            }
+            
+            .content-text {
+                color: #e9eef4;
+                font-size: 16px;
+                line-height: 1.8;
+                margin-bottom: 15px;
+            }
+            
+            .highlight-text {
+                color: #0ef0a1;
+                font-weight: 500;
+            }
+            
+            .address-footer {
+                background-color: #131820;
+                padding: 20px;
+                margin-top: 20px;
+                border-top: 1px solid rgba(255,255,255,0.05);
+                text-align: center;
+            }
+            
+            .contact-info {
+                margin-bottom: 15px;
+            }
+            
+            .contact-info a:hover {
+                color: #0ef0a1 !important;
+                transition: color 0.3s ease;
+            }
+            
+            .address {
+                font-size: 14px;
+                line-height: 1.6;
+            }
+            
+            .feature-list {
+                background-color: #131820;
+                border: 1px solid #0ef0a1;
+                border-radius: 12px;
+                padding: 20px;
+                margin: 20px 0;
+            }
+            
+            .feature-item {
+                color: #e9eef4;
+                margin: 10px 0;
+                padding: 8px 0;
+                font-size: 15px;
+                line-height: 1.6;
+            }
+            
+            .cta-section {
+                background-color: #131820;
+                border: 1px solid #0ef0a1;
+                border-radius: 12px;
+                padding: 20px;
+                margin: 20px 0;
+            }
+            
+            .contact-link {
+                display: block;
+                color: #0ef0a1;
+                text-decoration: none;
+                margin: 10px 0;
+                padding: 8px 0;
+            }
+            
+            .contact-link:hover {
+                color: #05a67b;
+            }
+            
+            .emoji {
+                font-size: 18px;
+                margin-right: 8px;
+            }
+            
+            .cta-buttons {
+                display: flex;
+                justify-content: center;
+                gap: 20px;
+                flex-wrap: wrap;
+                margin: 30px 0;
+            }
+            
+            .cta-button {
+                display: flex;
+                flex-direction: column;
+                align-items: center;
+                text-decoration: none;
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+                padding: 20px;
+                width: 160px;
+                transition: all 0.3s ease;
+            }
+            
+            .cta-button:hover {
+                transform: translateY(-5px);
+                box-shadow: 0 5px 15px rgba(14, 240, 161, 0.2);
+                background: linear-gradient(135deg, #1a1f26 0%, #131820 100%);
+            }
+            
+            .cta-icon {
+                font-size: 32px;
+                margin-bottom: 10px;
+            }
+            
+            .cta-label {
+                color: #e9eef4;
+                font-size: 14px;
+                text-align: center;
+                line-height: 1.4;
+            }
+            
+            .divider {
+                width: 40px;
+                height: 2px;
+                background: #0ef0a1;
+                margin: 8px auto;
+            }
+            
+            .website-link-container {
+                text-align: center;
+                margin: 30px 0;
+                padding: 20px;
+            }
+            
+            .website-link {
+                display: inline-block;
+                padding: 10px 20px;
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 12px;
+                transition: all 0.3s ease;
+            }
+            
+            .website-link:hover {
+                transform: translateY(-5px);
+                box-shadow: 0 5px 15px rgba(14, 240, 161, 0.2);
+                background: linear-gradient(135deg, #1a1f26 0%, #131820 100%);
+            }
+            
+            .website-logo {
+                max-width: 150px;
+                height: auto;
+            }
+            
+            .visit-text {
+                color: #9ba6b7;
+                font-size: 14px;
+                margin-bottom: 15px;
+            }
+            
+            .product-showcase {
+                text-align: center;
+                margin: 40px 0;
+                padding: 30px;
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+            }
+            
+            .product-image {
+                max-width: 300px;
+                height: auto;
+                margin: 20px auto;
+                filter: drop-shadow(0 0 20px rgba(14, 240, 161, 0.3));
+                transition: transform 0.3s ease;
+            }
+            
+            .product-image:hover {
+                transform: scale(1.05);
+            }
+            
+            .product-title {
+                color: #0ef0a1;
+                font-size: 24px;
+                margin: 20px 0 10px 0;
+            }
+            
+            .product-description {
+                color: #9ba6b7;
+                font-size: 16px;
+                margin: 10px 0;
+            }
+            
+            .feature-box {
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+                padding: 25px;
+                margin: 30px 0;
+            }
+            
+            .feature-box h3 {
+                color: #0ef0a1;
+                margin-top: 0;
+                margin-bottom: 20px;
+                font-size: 24px;
+                text-align: center;
+            }
+            
+            .feature-item {
+                color: #e9eef4;
+                margin: 15px 0;
+                padding: 15px;
+                border-left: 3px solid #0ef0a1;
+                background: rgba(14, 240, 161, 0.05);
+                border-radius: 0 10px 10px 0;
+            }
+            
+            .cta-container {
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+                padding: 25px;
+                margin: 30px 0;
+            }
+            
+            .cta-title {
+                color: #0ef0a1;
+                text-align: center;
+                margin-bottom: 20px;
+                font-size: 20px;
+            }
+            
+            .cta-buttons {
+                display: flex;
+                flex-direction: column;
+                gap: 15px;
+            }
+            
+            .cta-link {
+                display: flex;
+                align-items: center;
+                padding: 15px 25px;
+                background: rgba(14, 240, 161, 0.05);
+                border: 1px solid #0ef0a1;
+                border-radius: 10px;
+                color: #e9eef4;
+                text-decoration: none;
+                transition: all 0.3s ease;
+            }
+            
+            .cta-link:hover {
+                transform: translateX(10px);
+                background: rgba(14, 240, 161, 0.1);
+                box-shadow: 0 0 20px rgba(14, 240, 161, 0.2);
+            }
+            
+            .cta-emoji {
+                font-size: 24px;
+                margin-right: 15px;
+                min-width: 30px;
+                text-align: center;
+            }
+            
+            .info-box {
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+                padding: 25px;
+                margin: 30px 0;
+            }
+            
+            .info-box-title {
+                color: #0ef0a1;
+                font-size: 20px;
+                margin-bottom: 20px;
+                text-align: center;
+            }
+            
+            .info-box-content {
+                color: #e9eef4;
+                line-height: 1.6;
+            }
+            
+            .contact-info {
+                background: rgba(14, 240, 161, 0.05);
+                border-left: 3px solid #0ef0a1;
+                padding: 15px;
+                margin: 20px 0;
+                border-radius: 0 10px 10px 0;
+            }
+            
+            .signature-box {
+                border-top: 2px solid #0ef0a1;
+                margin-top: 30px;
+                padding-top: 20px;
+                color: #9ba6b7;
+            }
+            
+            .website-box {
+                text-align: center;
+                margin: 30px 0;
+                padding: 20px;
+                background: linear-gradient(135deg, #131820 0%, #1a1f26 100%);
+                border: 2px solid #0ef0a1;
+                border-radius: 15px;
+            }
+            
+            .website-text {
+                color: #9ba6b7;
+                margin-bottom: 15px;
+                font-size: 16px;
+            }
+            
+            .logo-link {
+                display: inline-block;
+                padding: 15px 30px;
+                transition: all 0.3s ease;
+            }
+            
+            .logo-link:hover {
+                transform: translateY(-5px);
+            }
+            
+            .website-logo {
+                max-width: 120px;  /* Reduced size */
+                height: auto;
+                filter: drop-shadow(0 0 10px rgba(14, 240, 161, 0.3));
+            }
+        </style>
+    </head>
+    <body>
+        <div class="container">
+            <div class="header">
+                <img src="cid:logo" alt="SensIQ" class="logo">
+            </div>
+            
+            <div class="hero">
+                <img src="cid:cover" alt="Smart Waste Management" class="hero-image">
+                <h1 class="hero-title">Smart Waste Management Solutions</h1>
+                <p class="hero-subtitle">Transform your operations with IoT-powered efficiency</p>
+            </div>
+            
+            <div class="content-section">
+    """
+
+_PRODUCT_SHOWCASE = """
+            <div class="product-showcase">
+                <img src="cid:product" alt="SN10 Smart Sensor" class="product-image">
+                <h2 style="color: #0ef0a1; margin: 20px 0 10px 0;">SN10 Smart Waste Sensor</h2>
+                <p style="color: #9ba6b7; margin: 10px 0;">Advanced IoT-powered waste management solution</p>
+            </div>
+            """
+
+_WHY_SENSIQ_OPEN = """
+            <div class="info-box">
+                <div class="info-box-title">Why SensIQ?</div>
+                <div class="info-box-content">
+            """
+
+_GET_STARTED = """
+            <div class="info-box">
+                <div class="info-box-title">Get Started with a Free Demo or Trial!</div>
+                <div class="info-box-content">
+                    <p>We make it easy for you to explore how our solution fits your needs:</p>
+                    <div class="cta-buttons">
+                        <a href="https://calendly.com/rebecca-sensiq/30min" class="cta-link" target="_blank">
+                            <span class="cta-emoji">📅</span>
+                            <span>Schedule a Meeting/Demo</span>
+                        </a>
+                        <a href="https://wa.me/971528004558" class="cta-link" target="_blank">
+                            <span class="cta-emoji">📱</span>
+                            <span>WhatsApp or Call Us</span>
+                        </a>
+                        <a href="https://www.sensiq.ae/trial" class="cta-link" target="_blank">
+                            <span class="cta-emoji">🎟</span>
+                            <span>Request a Free Trial</span>
+                        </a>
+                </div>
+                </div>
+                </div>
+            """
+
+_SIGNATURE_OPEN = """
+            <div class="signature-box">
+                <div class="contact-info">
+            """
+
+_WEBSITE_BOX = """
+            <div class="website-box">
+                <div class="website-text">You can also visit our website for more details:</div>
+                <a href="https://www.sensiq.ae" class="logo-link" target="_blank">
+                    <img src="cid:logo" alt="SensIQ Website" class="website-logo">
+                </a>
+            </div>
+            """
+
+_CLOSE_BOX = "</div></div>"
+
+# Paragraphs starting with these icons are dropped; the Get Started block has the links
+_CTA_ICONS = ("📅", "📱", "🎟")
+
+def _build_layout(image_mode):
+    def prepare(text):
+        return use_remote_images(text) if image_mode == IMAGE_MODE_REMOTE else text
+    return {
+        'head': prepare(_HEAD),
+        'showcase': prepare(_PRODUCT_SHOWCASE),
+        'why_open': prepare(_WHY_SENSIQ_OPEN),
+        'get_started': prepare(_GET_STARTED),
+        'signature_open': prepare(_SIGNATURE_OPEN),
+        'website': prepare(_WEBSITE_BOX)
+    }
+
+
+_LAYOUTS = {mode: _build_layout(mode) for mode in IMAGE_MODES}
+
+
+# Paragraph kinds
+_GREETING, _WHY_SENSIQ, _FEATURE, _GET_STARTED_KIND, _SIGNATURE, _WEBSITE, _CTA_LINE, _TEXT = range(8)
+
+
+def _classify(p):
+    """Kind of a paragraph; the checks run in order since a paragraph can match several"""
+    if "Hi " in p:
+        return _GREETING
+    if "Why SensIQ?" in p:
+        return _WHY_SENSIQ
+    if p.startswith("✅"):
+        return _FEATURE
+    if "We make it easy" in p:
+        return _GET_STARTED_KIND
+    if "Looking forward" in p:
+        return _SIGNATURE
+    if "visit our website" in p.lower():
+        return _WEBSITE
+    if p.startswith(_CTA_ICONS):
+        return _CTA_LINE
+    return _TEXT
+
+
+def create_html_email(body_text, image_mode=IMAGE_MODE_INLINE):
+    """Create HTML email with modern design and emoji support"""
+    layout = _LAYOUTS.get(image_mode) or _LAYOUTS[IMAGE_MODE_INLINE]
+    remote = image_mode == IMAGE_MODE_REMOTE
+
+    parts = []
+    append = parts.append
+    # Whether an info box has been opened, so "We make it easy" closes it first
+    info_box_open = False
+    for p in body_text.split('\n'):
+        p = p.strip()
+        if not p:
+            continue
+        kind = _classify(p)
+
+        if kind == _WHY_SENSIQ:
+            append(layout['why_open'])
+            info_box_open = True
+            continue
+        if kind == _GET_STARTED_KIND:
+            if info_box_open:
+                append(_CLOSE_BOX)  # Close info box
+            append(layout['get_started'])
+            info_box_open = True
+            continue
+        if kind == _WEBSITE:
+            append(layout['website'])
+            continue
+        if kind == _CTA_LINE:
+            continue
+
+        # The remaining kinds emit the paragraph text itself
+        if not info_box_open and 'info-box' in p:
+            info_box_open = True
+        if remote and 'cid:' in p:
+            p = use_remote_images(p)
+
+        if kind == _GREETING:
+            append(f'<div class="content-text">{p}</div>')
+            # Add product showcase after greeting
+            append(layout['showcase'])
+        elif kind == _FEATURE:
+            append(f'<div class="feature-item">{p}</div>')
+        elif kind == _SIGNATURE:
+            append(layout['signature_open'])
+            append(f'<div class="content-text">{p}</div>')
+            append(_CLOSE_BOX)
+        else:
+            append(f'<div class="content-text">{p}</div>')
+
+    return layout['head'] + "\n".join(parts)
@@ -0,0 +1,172 @@
+"""
+Process-wide cache of template and asset files.
+
+Files are read once and served from memory. A cached file is re-stat'ed at
+most every FILE_CACHE_CHECK_INTERVAL seconds and re-read when its mtime or
+size changed, so template edits are picked up without a restart. Reloads
+swap in a complete new entry, so readers never see a half-updated file.
+
+When the optional inotify_simple package is installed, directories holding
+cached files are watched and a change marks the entry stale immediately,
+instead of waiting for the next interval.
+
+Values derived from a file (for example a compiled template) can be cached
+alongside it with `load`; they are rebuilt whenever the file is reloaded.
+"""
+import hashlib
+import os
+import threading
+import time
+
+try:
+    import inotify_simple
+except ImportError:
+    inotify_simple = None
+
+# Seconds between re-stats of a cached file
+FILE_CACHE_CHECK_INTERVAL = float(os.getenv('FILE_CACHE_CHECK_INTERVAL', '2'))
+
+
+class _Entry:
+    """One snapshot of a file's contents"""
+
+    __slots__ = ('data', 'mtime_ns', 'size', 'version', 'checked_at', 'derived')
+
+    def __init__(self, data, mtime_ns, size, version):
+        self.data = data
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.derived = {}
+
+
+class FileCache:
+    """
+    Cache of file contents keyed by absolute path.
+
+    Args:
+        check_interval (float): Seconds between re-stats of a cached file
+        watch (bool): Use inotify for immediate invalidation when available
+    """
+
+    def __init__(self, check_interval=FILE_CACHE_CHECK_INTERVAL, watch=True):
+        self.check_interval = check_interval
+        self._entries = {}
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._watched = {}   # watch descriptor -> directory
+        if watch and inotify_simple is not None:
+            try:
+                self._watcher = inotify_simple.INotify()
+                threading.Thread(target=self._watch_loop, daemon=True).start()
+            except OSError as e:
+                print(f"Warning: inotify unavailable, falling back to polling: {e}")
+                self._watcher = None
+        self.stats = {'hits': 0, 'loads': 0, 'reloads': 0, 'restats': 0}
+
+    def _read(self, path, previous):
+        st = os.stat(path)
+        with self._lock:
+            self.stats['restats'] += 1
+        if previous and previous.mtime_ns == st.st_mtime_ns and previous.size == st.st_size:
+            previous.checked_at = time.monotonic()
+            return previous
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        version = previous.version + 1 if previous else 1
+        entry = _Entry(data, st.st_mtime_ns, st.st_size, version)
+        with self._lock:
+            self._entries[path] = entry
+            self.stats['reloads' if previous else 'loads'] += 1
+        if previous:
+            print(f"DEBUG: Reloaded changed file {path} (version {version})")
+        else:
+            self._watch_directory(os.path.dirname(path))
+        return entry
+
+    def _entry(self, path):
+        path = os.path.abspath(path)
+        with self._lock:
+            entry = self._entries.get(path)
+        if entry is None or time.monotonic() - entry.checked_at >= self.check_interval:
+            return self._read(path, entry)
+        with self._lock:
+            self.stats['hits'] += 1
+        return entry
+
+    def read_bytes(self, path):
+        """Contents of a file as bytes"""
+        return self._entry(path).data
+
+    def read_text(self, path, encoding='utf-8'):
+        """Contents of a file decoded as text"""
+        return self.load(path, lambda data: data.decode(encoding), key=('text', encoding))
+
+    def version(self, path):
+        """Counter that increases every time the file is reloaded with new content"""
+        return self._entry(path).version
+
+    def digest(self, path):
+        """SHA-256 of a file's contents, computed once per version"""
+        return self.load(path, lambda data: hashlib.sha256(data).hexdigest(), key='sha256')
+
+    def load(self, path, build, key=None):
+        """
+        Get a value derived from a file's contents, rebuilt only when the file changes.
+
+        Args:
+            path (str): File to read
+            build (callable): Called with the file's bytes to produce the value
+            key: Identifies the derived value; defaults to `build` itself
+        """
+        entry = self._entry(path)
+        key = key if key is not None else build
+        try:
+            return entry.derived[key]
+        except KeyError:
+            pass
+        value = build(entry.data)
+        # Stored on the snapshot, so a concurrent reload never mixes old and new values
+        entry.derived.setdefault(key, value)
+        return entry.derived[key]
+
+    def invalidate(self, path=None):
+        """Force the next read of a file (or of every file) to re-stat it"""
+        with self._lock:
+            entries = [self._entries.get(os.path.abspath(path))] if path else list(self._entries.values())
+        for entry in entries:
+            if entry is not None:
+                entry.checked_at = float('-inf')
+
+    def _watch_directory(self, directory):
+        if self._watcher is None:
+            return
+        with self._lock:
+            if directory in self._watched.values():
+                return
+            try:
+                flags = inotify_simple.flags
+                wd = self._watcher.add_watch(
+                    directory, flags.MODIFY | flags.CLOSE_WRITE | flags.MOVED_TO | flags.CREATE | flags.DELETE)
+            except OSError as e:
+                print(f"Warning: Could not watch {directory}: {e}")
+                return
+            self._watched[wd] = directory
+
+    def _watch_loop(self):
+        while True:
+            try:
+                events = self._watcher.read()
+            except Exception as e:
+                print(f"Warning: inotify watcher stopped, falling back to polling: {e}")
+                return
+            for event in events:
+                directory = self._watched.get(event.wd)
+                if directory and event.name:
+                    self.invalidate(os.path.join(directory, event.name))
+
+
+# Process-wide cache shared by the template and asset loaders
+file_cache = FileCache()
@@ -0,0 +1,176 @@
+"""
+Compressed JSON responses with ETag revalidation.
+
+Preview payloads for the same segment are identical from one request to
+the next, so each response is tagged with a hash of its body, or of the
+inputs it is rendered from when the caller knows them (content_etag). A
+client that sends the tag back in If-None-Match gets an empty 304; with an
+input tag that answer is given before anything is rendered. Otherwise the
+body is compressed with brotli (if the optional brotli package is
+installed) or gzip, whichever the client accepts, and the compressed bytes
+are kept in an LRU bounded by total size so repeated previews are not
+recompressed. Bodies that will not be requested again (LLM output) or are
+too large to be worth pinning are compressed and sent without caching.
+"""
+import gzip
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from flask import Response, current_app
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Total compressed bytes kept for repeated responses
+COMPRESSED_RESPONSE_CACHE_BYTES = int(os.getenv('COMPRESSED_RESPONSE_CACHE_BYTES', str(32 * 1024 * 1024)))
+
+# Compressed bodies larger than this are never cached (inline previews carry MBs of data URLs)
+MAX_CACHED_RESPONSE_BYTES = int(os.getenv('MAX_CACHED_RESPONSE_BYTES', str(1024 * 1024)))
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+
+def _accepted_encodings(header):
+    """Content codings the client accepts (q > 0) from an Accept-Encoding header"""
+    accepted = set()
+    for item in (header or '').split(','):
+        name, _, params = item.strip().partition(';')
+        quality = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name and quality > 0:
+            accepted.add(name.strip().lower())
+    return accepted
+
+
+def choose_encoding(accept_encoding):
+    """Best content coding for a client: br, then gzip, else None"""
+    accepted = _accepted_encodings(accept_encoding)
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+class CompressedBodyCache:
+    """
+    LRU of compressed response bodies keyed by (etag, encoding).
+
+    Args:
+        max_bytes (int): Total compressed size kept before the oldest entries are evicted
+        max_entry_bytes (int): Compressed bodies larger than this are not kept
+    """
+
+    def __init__(self, max_bytes=COMPRESSED_RESPONSE_CACHE_BYTES, max_entry_bytes=MAX_CACHED_RESPONSE_BYTES):
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = min(max_entry_bytes, max_bytes)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'not_modified': 0, 'uncached': 0}
+
+    @staticmethod
+    def compress(encoding, body):
+        if encoding == 'br':
+            return brotli.compress(body, quality=5)
+        return gzip.compress(body, compresslevel=6)
+
+    def get(self, etag, encoding, body, cache=True):
+        """
+        Compressed `body`, reused from an earlier response with the same ETag when possible.
+
+        Args:
+            cache (bool): Keep the result for later requests; pass False for one-off bodies
+        """
+        key = (etag, encoding)
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return data
+
+        data = self.compress(encoding, body)
+        with self._lock:
+            if not cache or len(data) > self.max_entry_bytes:
+                self.stats['uncached'] += 1
+                return data
+            self.stats['misses'] += 1
+            if key not in self._entries:
+                self._entries[key] = data
+                self._size += len(data)
+            while self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+        return data
+
+    def record_not_modified(self):
+        with self._lock:
+            self.stats['not_modified'] += 1
+
+    def footprint(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': self._size,
+                'max_bytes': self.max_bytes,
+                **self.stats
+            }
+
+
+compressed_bodies = CompressedBodyCache()
+
+
+def content_etag(*inputs):
+    """ETag for a response fully determined by `inputs` (strings, numbers and tuples of them)"""
+    return hashlib.sha256(repr(inputs).encode('utf-8')).hexdigest()[:32]
+
+
+def not_modified_response(tag):
+    """Empty 304 for a client that already has the response tagged `tag`"""
+    compressed_bodies.record_not_modified()
+    response = Response(status=304)
+    response.set_etag(tag)
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_json_response(payload, request, cache_body=True, etag=None, compress=True):
+    """
+    Build a JSON response with an ETag, answering 304 when the client already has it.
+
+    Args:
+        payload (dict): Response data, serialized like jsonify
+        request: The current Flask request
+        cache_body (bool): Keep the compressed body for repeat requests; False for one-off payloads
+        etag (str): Tag from content_etag; the body is hashed when omitted
+        compress (bool): False for payloads that barely compress, such as embedded data URLs
+    """
+    if etag is not None and request.if_none_match.contains(etag):
+        return not_modified_response(etag)
+
+    body = current_app.json.dumps(payload).encode('utf-8')
+    tag = etag or hashlib.sha256(body).hexdigest()[:32]
+
+    if request.if_none_match.contains(tag):
+        return not_modified_response(tag)
+
+    encoding = choose_encoding(request.headers.get('Accept-Encoding')) if compress else None
+    if encoding and len(body) >= MIN_COMPRESS_BYTES:
+        response = Response(compressed_bodies.get(tag, encoding, body, cache=cache_body), mimetype='application/json')
+        response.headers['Content-Encoding'] = encoding
+    else:
+        response = Response(body, mimetype='application/json')
+    response.set_etag(tag)
+    response.vary.add('Accept-Encoding')
+    return response
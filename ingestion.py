@@ -0,0 +1,228 @@
+"""
+Embedding and upserting text chunks into the vector index.
+
+Chunks are encoded with batched SentenceTransformer.encode calls and
+written with bulk upserts, instead of one forward pass and one network
+call per chunk. The local index is written in a single upsert, since
+every upsert rewrites its file.
+
+Reindexing is incremental: each chunk's id is derived from a hash of its
+text, and a manifest (VECTOR_MANIFEST_PATH) records the ids and content
+hashes already in each index. sync_chunks embeds only chunks that are not in the index yet
+and deletes ids whose text is gone, so running it again on unchanged
+input does nothing.
+"""
+import hashlib
+import json
+import os
+import time
+
+from vector_index import LocalVectorIndex
+
+# Chunks per transformer forward pass
+EMBED_BATCH_SIZE = int(os.getenv('EMBED_BATCH_SIZE', '64'))
+
+# Vectors per upsert request (Pinecone accepts up to 1000; 100 keeps requests well under 2 MB)
+UPSERT_BATCH_SIZE = int(os.getenv('UPSERT_BATCH_SIZE', '100'))
+
+# Ids per delete request
+DELETE_BATCH_SIZE = 1000
+
+VECTOR_MANIFEST_PATH = os.getenv(
+    'VECTOR_MANIFEST_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vector_manifest.json')
+)
+
+
+def chunk_text(content):
+    """Split text into chunks at blank lines, keeping each section's lines together"""
+    chunks = []
+    current_chunk = []
+    for line in content.split('\n'):
+        if line.strip():
+            current_chunk.append(line)
+        elif current_chunk:
+            chunks.append('\n'.join(current_chunk))
+            current_chunk = []
+    if current_chunk:
+        chunks.append('\n'.join(current_chunk))
+    return [chunk.strip() for chunk in chunks if chunk.strip()]
+
+
+def content_hash(chunk):
+    return hashlib.sha256(chunk.encode('utf-8')).hexdigest()
+
+
+def chunk_id(chunk, prefix='chunk_'):
+    """Vector id for a chunk, derived from its text"""
+    return prefix + content_hash(chunk)[:24]
+
+
+def _read_manifest(path):
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+    except (OSError, ValueError) as e:
+        print(f"Warning: Ignoring unreadable vector manifest {path}: {e}")
+        return {}
+
+
+def _write_manifest(path, manifest):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def reset_manifest(index_key, path=VECTOR_MANIFEST_PATH):
+    """Forget what an index holds; call after clearing or recreating it"""
+    manifest = _read_manifest(path)
+    if manifest.pop(index_key, None) is not None:
+        _write_manifest(path, manifest)
+
+
+def _listed_ids(index, prefix):
+    """Ids in the index starting with `prefix`, or None if the index cannot list them"""
+    try:
+        return {vector_id for page in index.list(prefix=prefix) for vector_id in page}
+    except Exception as e:
+        print(f"Warning: Could not list ids in the index, stale chunks may remain: {e}")
+        return None
+
+
+def _indexed_count(index):
+    """Total vectors in the index, or None if it cannot report it"""
+    try:
+        stats = index.describe_index_stats()
+        count = stats.get('total_vector_count') if isinstance(stats, dict) else stats.total_vector_count
+        return int(count)
+    except Exception as e:
+        print(f"Warning: Could not read index stats: {e}")
+        return None
+
+
+def _manifest_matches_index(index, known, listed):
+    """
+    Whether a manifest entry still describes the index.
+
+    The index can lose vectors behind the manifest's back (a deleted
+    index file, an index recreated from the console), so listed ids are
+    compared when available, and the total vector count otherwise.
+    """
+    if isinstance(index, LocalVectorIndex) and not index.exists():
+        return not known
+    if listed is not None:
+        return listed == set(known)
+    count = _indexed_count(index)
+    return count is None or count >= len(known)
+
+
+def ingest_chunks(index, model, chunks, ids, metadata=None, batch_size=EMBED_BATCH_SIZE,
+                  upsert_batch_size=UPSERT_BATCH_SIZE):
+    """
+    Embed chunks and upsert them into an index.
+
+    Args:
+        index: LocalVectorIndex or Pinecone Index
+        model: SentenceTransformer used for the embeddings
+        chunks (list): Texts to embed
+        ids (list): Vector id for each chunk
+        metadata (list): Metadata for each chunk; defaults to {'text': chunk}
+        batch_size (int): Chunks per forward pass
+        upsert_batch_size (int): Vectors per upsert request
+
+    Returns:
+        dict: chunks, encode_seconds, upsert_seconds, chunks_per_second
+    """
+    if len(ids) != len(chunks):
+        raise ValueError(f"Got {len(ids)} ids for {len(chunks)} chunks")
+    if metadata is None:
+        metadata = [{'text': chunk} for chunk in chunks]
+
+    started = time.perf_counter()
+    embeddings = model.encode(list(chunks), batch_size=batch_size, convert_to_numpy=True) if chunks else []
+    encoded = time.perf_counter()
+
+    vectors = [
+        {'id': vector_id, 'values': embedding.tolist(), 'metadata': meta}
+        for vector_id, embedding, meta in zip(ids, embeddings, metadata)
+    ]
+    if isinstance(index, LocalVectorIndex):
+        upsert_batch_size = max(1, len(vectors))
+    for start in range(0, len(vectors), upsert_batch_size):
+        index.upsert(vectors=vectors[start:start + upsert_batch_size])
+    finished = time.perf_counter()
+
+    elapsed = finished - started
+    stats = {
+        'chunks': len(chunks),
+        'encode_seconds': round(encoded - started, 3),
+        'upsert_seconds': round(finished - encoded, 3),
+        'chunks_per_second': round(len(chunks) / elapsed, 1) if elapsed > 0 else None
+    }
+    print(f"DEBUG: Ingested {stats['chunks']} chunks in {elapsed:.2f}s "
+          f"({stats['chunks_per_second']} chunks/sec; encode {stats['encode_seconds']}s, "
+          f"upsert {stats['upsert_seconds']}s)")
+    return stats
+
+
+def sync_chunks(index, model, chunks, index_key, prefix='chunk_', manifest_path=VECTOR_MANIFEST_PATH,
+                batch_size=EMBED_BATCH_SIZE, upsert_batch_size=UPSERT_BATCH_SIZE):
+    """
+    Make the chunks under `prefix` in an index match `chunks`.
+
+    Only chunks whose text is not indexed yet are embedded and upserted;
+    ids under the prefix whose text is gone are deleted. Without a
+    manifest entry for the index (first run, or after reset_manifest) the
+    index is listed instead, which also removes ids left by older chunkers.
+    A manifest entry that no longer matches the index is dropped the same
+    way, so a lost index file is rebuilt rather than trusted.
+
+    Args:
+        index: LocalVectorIndex or Pinecone Index
+        model: SentenceTransformer used for the embeddings
+        chunks (list): Texts that should be in the index
+        index_key (str): Identifies the index in the manifest
+        prefix (str): Id prefix of the vectors this source owns
+
+    Returns:
+        dict: added, deleted, unchanged and whether anything changed
+    """
+    manifest = _read_manifest(manifest_path)
+    known = manifest.get(index_key)
+    listed = _listed_ids(index, prefix)
+    if known is not None and not _manifest_matches_index(index, known, listed):
+        print(f"Warning: Vector manifest for {index_key} does not match the index, reindexing")
+        manifest.pop(index_key)
+        known = None
+    if known is None:
+        known = dict.fromkeys(listed or ())
+
+    wanted = {}
+    for chunk in chunks:
+        wanted.setdefault(chunk_id(chunk, prefix), chunk)
+
+    added = [vector_id for vector_id in wanted if vector_id not in known]
+    deleted = [vector_id for vector_id in known if vector_id not in wanted]
+
+    if added:
+        ingest_chunks(index, model, [wanted[vector_id] for vector_id in added], added,
+                      batch_size=batch_size, upsert_batch_size=upsert_batch_size)
+    for start in range(0, len(deleted), DELETE_BATCH_SIZE):
+        index.delete(ids=deleted[start:start + DELETE_BATCH_SIZE])
+
+    if added or deleted or manifest.get(index_key) is None:
+        manifest[index_key] = {vector_id: content_hash(chunk) for vector_id, chunk in wanted.items()}
+        _write_manifest(manifest_path, manifest)
+
+    stats = {
+        'added': len(added),
+        'deleted': len(deleted),
+        'unchanged': len(wanted) - len(added),
+        'changed': bool(added or deleted)
+    }
+    print(f"DEBUG: Synced {len(wanted)} chunks: {stats['added']} added, "
+          f"{stats['deleted']} deleted, {stats['unchanged']} unchanged")
+    return stats
@@ -0,0 +1,344 @@
+"""
+Rate-limit-aware scheduling of Groq completions.
+
+Completions run concurrently on a bounded set of workers, highest priority
+first. Before each call a worker reserves room in the account's
+requests-per-day and tokens-per-minute budgets, which are kept current
+from the x-ratelimit-* headers Groq returns on every response. A 429 puts
+every worker on hold for its retry-after and the request is queued again.
+
+For bulk jobs that need a fresh generation per recipient, GenerationPipeline
+generates ahead of the sending stage through a bounded window, so LLM and
+SMTP work overlap and a job runs at the pace of the slower of the two.
+"""
+import itertools
+import os
+import queue
+import re
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# Lower runs first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+PRIORITY_BACKGROUND = 20
+
+GROQ_MAX_CONCURRENCY = int(os.getenv('GROQ_MAX_CONCURRENCY', '4'))
+
+# Attempts per request when Groq answers 429
+MAX_RATE_LIMITED_ATTEMPTS = 5
+
+_DURATION_PART = re.compile(r'(\d+(?:\.\d+)?)(ms|h|m|s)')
+_DURATION_UNITS = {'ms': 0.001, 's': 1, 'm': 60, 'h': 3600}
+
+
+def parse_duration(value):
+    """Seconds in a Groq reset header such as '7.66s', '2m59.56s' or '120ms'"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _int_header(headers, name):
+    try:
+        return int(float(headers.get(name)))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateBudget:
+    """
+    Remaining request and token budget for one API key.
+
+    Until the first response arrives the budget is unknown and calls are
+    not held back; after that each call reserves one request and its
+    estimated tokens, and waits for the reset when either runs out.
+
+    Groq's request limit is per day and its token limit per minute. The
+    token window refills to the limit when it resets; the daily request
+    count becomes unknown again until the next response reports it, since
+    it does not return to the full limit after reset-requests.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self.remaining_requests = None
+        self.remaining_tokens = None
+        self.limit_requests = None
+        self.limit_tokens = None
+        self.requests_reset_at = 0.0
+        self.tokens_reset_at = 0.0
+        self.blocked_until = 0.0
+        self.stats = {'waits': 0, 'wait_seconds': 0.0, 'rate_limited': 0}
+
+    def _restore(self, now):
+        if self.remaining_requests is not None and now >= self.requests_reset_at:
+            self.remaining_requests = None
+        if self.remaining_tokens is not None and now >= self.tokens_reset_at:
+            self.remaining_tokens = self.limit_tokens
+
+    def _wait_time(self, tokens, now):
+        waits = []
+        if self.blocked_until > now:
+            waits.append(self.blocked_until - now)
+        if self.remaining_requests is not None and self.remaining_requests < 1:
+            waits.append(self.requests_reset_at - now)
+        if self.remaining_tokens is not None and self.remaining_tokens < tokens:
+            waits.append(self.tokens_reset_at - now)
+        return max(waits) if waits else 0
+
+    def acquire(self, tokens):
+        """
+        Block until one request and `tokens` tokens fit in the budget, then reserve them.
+
+        A reservation larger than the whole per-minute limit is capped at
+        the limit, since the window would never hold it.
+        """
+        started = time.time()
+        waited = False
+        with self._cond:
+            while True:
+                now = time.time()
+                self._restore(now)
+                if self.limit_tokens:
+                    tokens = min(tokens, self.limit_tokens)
+                delay = self._wait_time(tokens, now)
+                if delay <= 0:
+                    break
+                waited = True
+                self._cond.wait(timeout=min(delay, 5))
+            if self.remaining_requests is not None:
+                self.remaining_requests -= 1
+            if self.remaining_tokens is not None:
+                self.remaining_tokens -= tokens
+            if waited:
+                self.stats['waits'] += 1
+                self.stats['wait_seconds'] += time.time() - started
+
+    def update(self, headers):
+        """Refresh the budget from a response's x-ratelimit-* headers"""
+        now = time.time()
+        with self._cond:
+            limit_requests = _int_header(headers, 'x-ratelimit-limit-requests')
+            limit_tokens = _int_header(headers, 'x-ratelimit-limit-tokens')
+            remaining_requests = _int_header(headers, 'x-ratelimit-remaining-requests')
+            remaining_tokens = _int_header(headers, 'x-ratelimit-remaining-tokens')
+            reset_requests = parse_duration(headers.get('x-ratelimit-reset-requests'))
+            reset_tokens = parse_duration(headers.get('x-ratelimit-reset-tokens'))
+            if limit_requests is not None:
+                self.limit_requests = limit_requests
+            if limit_tokens is not None:
+                self.limit_tokens = limit_tokens
+            if remaining_requests is not None:
+                self.remaining_requests = remaining_requests
+            if remaining_tokens is not None:
+                self.remaining_tokens = remaining_tokens
+            if reset_requests is not None:
+                self.requests_reset_at = now + reset_requests
+            if reset_tokens is not None:
+                self.tokens_reset_at = now + reset_tokens
+            self._cond.notify_all()
+
+    def on_rate_limited(self, retry_after):
+        """Hold every call for `retry_after` seconds after a 429"""
+        with self._cond:
+            self.stats['rate_limited'] += 1
+            self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+
+    def status(self):
+        with self._cond:
+            return {
+                'remaining_requests': self.remaining_requests,
+                'remaining_tokens': self.remaining_tokens,
+                'limit_requests': self.limit_requests,
+                'limit_tokens': self.limit_tokens,
+                'blocked_for': max(0, round(self.blocked_until - time.time(), 2)),
+                **self.stats
+            }
+
+
+class GenerationScheduler:
+    """
+    Priority queue of chat completion requests served by a bounded worker pool.
+
+    Args:
+        client: groq.Groq client
+        max_workers (int): Completions in flight at once
+        budget (RateBudget): Shared rate budget (a new one if omitted)
+    """
+
+    def __init__(self, client, max_workers=GROQ_MAX_CONCURRENCY, budget=None):
+        self.client = client
+        self.max_workers = max(1, max_workers)
+        self.budget = budget or RateBudget()
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()
+        self._workers = []
+        self._lock = threading.Lock()
+        self.stats = {'completed': 0, 'failed': 0, 'requeued': 0, 'tokens': 0}
+
+    def _start_workers(self):
+        with self._lock:
+            self._workers = [worker for worker in self._workers if worker.is_alive()]
+            for _ in range(self.max_workers - len(self._workers)):
+                worker = threading.Thread(target=self._work, daemon=True, name='groq-worker')
+                worker.start()
+                self._workers.append(worker)
+
+    def submit(self, priority=PRIORITY_BULK, **request):
+        """
+        Queue a chat completion.
+
+        Args:
+            priority (int): PRIORITY_INTERACTIVE, PRIORITY_BULK or PRIORITY_BACKGROUND
+            **request: Arguments for client.chat.completions.create
+
+        Returns:
+            Future: Resolves to the parsed completion
+        """
+        future = Future()
+        self._start_workers()
+        self._queue.put((priority, next(self._sequence), request, future, 1))
+        return future
+
+    def complete(self, priority=PRIORITY_INTERACTIVE, **request):
+        """Queue a chat completion and wait for it"""
+        return self.submit(priority=priority, **request).result()
+
+    def open_stream(self, priority=PRIORITY_INTERACTIVE, **request):
+        """
+        Start a streamed chat completion and return its chunk iterator.
+
+        The request is queued and budgeted like any other; the worker is
+        freed once the response has started and the caller reads the chunks.
+        """
+        return self.submit(priority=priority, stream=True, **request).result()
+
+    @staticmethod
+    def _estimate_tokens(request):
+        prompt = sum(len(str(message.get('content', ''))) for message in request.get('messages', []))
+        return prompt // 4 + int(request.get('max_tokens') or 1024)
+
+    def _work(self):
+        while True:
+            priority, sequence, request, future, attempt = self._queue.get()
+            if not future.set_running_or_notify_cancel():
+                continue
+            self.budget.acquire(self._estimate_tokens(request))
+            try:
+                raw = self.client.chat.completions.with_raw_response.create(**request)
+                self.budget.update(raw.headers)
+                completion = raw.parse()
+            except Exception as e:
+                if getattr(e, 'status_code', None) == 429 and attempt < MAX_RATE_LIMITED_ATTEMPTS:
+                    headers = getattr(getattr(e, 'response', None), 'headers', {}) or {}
+                    self.budget.update(headers)
+                    retry_after = parse_duration(headers.get('retry-after')) or 2 ** attempt
+                    print(f"WARNING: Groq rate limit hit, holding requests for {retry_after:.1f}s")
+                    self.budget.on_rate_limited(retry_after)
+                    # A running future cannot go back to pending, so requeue the work under a fresh one
+                    retry = Future()
+                    retry.add_done_callback(lambda done, future=future: _copy_result(done, future))
+                    with self._lock:
+                        self.stats['requeued'] += 1
+                    self._queue.put((priority, sequence, request, retry, attempt + 1))
+                    continue
+                with self._lock:
+                    self.stats['failed'] += 1
+                future.set_exception(e)
+                continue
+
+            usage = getattr(completion, 'usage', None)
+            with self._lock:
+                self.stats['completed'] += 1
+                self.stats['tokens'] += getattr(usage, 'total_tokens', 0) or 0
+            future.set_result(completion)
+
+    def status(self):
+        with self._lock:
+            stats = dict(self.stats)
+        return {
+            'workers': self.max_workers,
+            'queued': self._queue.qsize(),
+            'budget': self.budget.status(),
+            **stats
+        }
+
+
+def _copy_result(source, target):
+    if source.exception() is not None:
+        target.set_exception(source.exception())
+    else:
+        target.set_result(source.result())
+
+
+class GenerationPipeline:
+    """
+    Generate per-recipient content ahead of the sending stage.
+
+    A feeder thread starts generations in recipient order, keeping at most
+    `depth` finished or in-flight results that the sender has not picked up
+    yet. `result(recipient)` hands a recipient's content to the sender and
+    frees a slot. Recipients asked for again (SMTP retries) are regenerated.
+
+    Args:
+        recipients (list): Recipient records with an 'email' key
+        generate (callable): Blocking function taking a recipient record
+        depth (int): Maximum results generated ahead of the sender
+    """
+
+    def __init__(self, recipients, generate, depth):
+        self.generate = generate
+        self.depth = max(1, depth)
+        self._slots = threading.Semaphore(self.depth)
+        self._cond = threading.Condition()
+        self._ready = {}
+        self._expected = Counter(recipient['email'] for recipient in recipients)
+        self._taken = Counter()
+        self._closed = False
+        self._executor = ThreadPoolExecutor(max_workers=self.depth, thread_name_prefix='generation')
+        self._feeder = threading.Thread(target=self._feed, args=(list(recipients),), daemon=True)
+        self._feeder.start()
+
+    def _feed(self, recipients):
+        for recipient in recipients:
+            self._slots.acquire()
+            with self._cond:
+                if self._closed:
+                    return
+                future = self._executor.submit(self.generate, recipient)
+                self._ready.setdefault(recipient['email'], deque()).append(future)
+                self._cond.notify_all()
+
+    def result(self, recipient):
+        """Content generated for a recipient, waiting for it if necessary"""
+        email = recipient['email']
+        with self._cond:
+            if self._taken[email] >= self._expected[email]:
+                future = None
+            else:
+                while not self._ready.get(email) and not self._closed:
+                    self._cond.wait()
+                future = self._ready[email].popleft() if self._ready.get(email) else None
+                self._taken[email] += 1
+        if future is None:
+            return self.generate(recipient)
+        self._slots.release()
+        return future.result()
+
+    def close(self):
+        """Stop generating ahead and release waiting senders"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._slots.release()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -1,22 +1,43 @@
 import os
 from dotenv import load_dotenv
-import pinecone
-from pinecone import Pinecone, ServerlessSpec
 from sentence_transformers import SentenceTransformer
 import time
+from vector_index import LocalVectorIndex
+from retrieval_cache import retrieval_cache
+from ingestion import ingest_chunks, reset_manifest
+try:
+    import pinecone
+    from pinecone import Pinecone, ServerlessSpec
+except ImportError:
+    pinecone = None
 
 # Load environment variables
 load_dotenv()
 
-# Pinecone Configuration
-PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+# Same vector store settings as Cold_email_v2
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "local").lower()
+LOCAL_VECTOR_INDEX_PATH = os.getenv(
+    "LOCAL_VECTOR_INDEX_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'vector_index.npz')
+)
+index_name = "components-db"
 
-if not PINECONE_API_KEY:
-    raise ValueError("Pinecone API key not set")
+if VECTOR_BACKEND == 'pinecone':
+    # Pinecone Configuration
+    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
-# Initialize Pinecone
-pc = Pinecone(api_key=PINECONE_API_KEY)
-index_name = "components-db"
+    if pinecone is None:
+        raise ValueError("VECTOR_BACKEND=pinecone requires the pinecone-client package")
+    if not PINECONE_API_KEY:
+        raise ValueError("Pinecone API key not set")
+
+    # Initialize Pinecone
+    pc = Pinecone(api_key=PINECONE_API_KEY)
+else:
+    pc = None
+
+# Same manifest key as Cold_email_v2.VECTOR_INDEX_KEY
+VECTOR_INDEX_KEY = f"pinecone:{index_name}" if pc is not None else f"local:{LOCAL_VECTOR_INDEX_PATH}"
 
 # SN10 product details chunk
 sn10_chunk = """11. SensIQ Product Details
@@ -53,47 +74,52 @@ sn10_chunk = """11. SensIQ Product Details
 
 def manual_index():
     try:
-        # Delete existing index if it exists
-        if index_name in pc.list_indexes().names():
-            pc.delete_index(index_name)
-            print("Deleted existing index")
-            time.sleep(2)
-        
-        # Create new index
-        pc.create_index(
-            name=index_name,
-            dimension=384,
-            metric="cosine",
-            spec=ServerlessSpec(
-                cloud='aws',
-                region='us-east-1'
+        if pc is None:
+            index = LocalVectorIndex(LOCAL_VECTOR_INDEX_PATH)
+            index.delete(delete_all=True)
+            print("Cleared local index")
+        else:
+            # Delete existing index if it exists
+            if index_name in pc.list_indexes().names():
+                pc.delete_index(index_name)
+                print("Deleted existing index")
+                time.sleep(2)
+            
+            # Create new index
+            pc.create_index(
+                name=index_name,
+                dimension=384,
+                metric="cosine",
+                spec=ServerlessSpec(
+                    cloud='aws',
+                    region='us-east-1'
+                )
             )
-        )
-        print("Created new index")
-        time.sleep(2)
+            print("Created new index")
+            time.sleep(2)
+            
+            # Initialize the index
+            index = pc.Index(index_name)
         
-        # Initialize the index
-        index = pc.Index(index_name)
+        # The index no longer holds the components.txt chunks
+        reset_manifest(VECTOR_INDEX_KEY)
         
         # Initialize sentence transformer model
         print("Loading model...")
         model = SentenceTransformer('all-MiniLM-L6-v2')
         
-        # Generate embedding for SN10 chunk
-        print("\nGenerating embedding for SN10 chunk...")
+        # Embed and index the SN10 chunk
+        print("\nIndexing SN10 chunk...")
+        ingest_chunks(
+            index,
+            model,
+            [sn10_chunk],
+            ['sn10_details'],
+            metadata=[{'text': sn10_chunk, 'type': 'product_info'}]
+        )
+        # Fresh embedding of the chunk, which should find the stored vector
         embedding = model.encode(sn10_chunk)
         
-        # Index the chunk
-        print("Indexing SN10 chunk...")
-        index.upsert(vectors=[{
-            'id': 'sn10_details',
-            'values': embedding.tolist(),
-            'metadata': {
-                'text': sn10_chunk,
-                'type': 'product_info'
-            }
-        }])
-        
         # Verify the chunk was indexed
         print("\nVerifying indexed content...")
         verify_results = index.query(
@@ -138,6 +164,9 @@ def manual_index():
     except Exception as e:
         print(f"Error: {e}")
         return False
+    finally:
+        # Cached search results in the app refer to the previous contents
+        retrieval_cache.bump_version()
 
 if __name__ == "__main__":
     print("Starting manual indexing of SN10 product details...")
@@ -0,0 +1,134 @@
+"""
+Pre-serialized MIME skeletons for bulk sends.
+
+Within a job every message has the same multipart/alternative ->
+multipart/related structure and the same inline images; only the
+From/To/Subject headers and the HTML part change. The skeleton is
+serialized to wire bytes once per image set, and each recipient's message
+is produced by splicing their headers and encoded HTML part into it. The
+result goes straight to `sendmail`, so the email package never rebuilds
+or re-serializes the image parts.
+"""
+import os
+import threading
+from email import policy
+from email.generator import BytesGenerator
+from email.message import Message
+from email.mime.multipart import MIMEMultipart
+from io import BytesIO
+
+from mime_cache import inline_image_cache
+from mime_encoding import encode_html
+
+_SLOT = b'X-COMPILED-HTML-PART-SLOT'
+_WIRE_POLICY = policy.compat32.clone(linesep='\r\n')
+_HEADER_POLICY = policy.SMTP
+
+
+def encode_html_part(html, allow_8bit=False):
+    """
+    Serialize an HTML body as a complete MIME part (headers + encoded body).
+
+    The transfer encoding is the smallest safe one for the body (see
+    mime_encoding.py); 8bit is only used when `allow_8bit` is set.
+
+    Returns:
+        tuple: (part_bytes, cte, encoded_body_length)
+    """
+    cte, encoded = encode_html(html, allow_8bit)
+    body = encoded.replace(b'\n', b'\r\n').rstrip(b'\r\n')
+    part = (
+        b'Content-Type: text/html; charset="utf-8"\r\n'
+        b'MIME-Version: 1.0\r\n'
+        b'Content-Transfer-Encoding: ' + cte.encode('ascii') + b'\r\n'
+        b'\r\n' + body
+    )
+    return part, cte, len(encoded)
+
+
+def encode_headers(from_addr, to_addr, subject):
+    """Fold and RFC 2047-encode the per-recipient headers"""
+    return ''.join(
+        _HEADER_POLICY.header_factory(name, value).fold(policy=_HEADER_POLICY)
+        for name, value in (('From', from_addr), ('To', to_addr), ('Subject', subject))
+    ).encode('ascii')
+
+
+class CompiledMessage:
+    """Serialized multipart skeleton with slots for headers and the HTML part"""
+
+    def __init__(self, images):
+        message = MIMEMultipart('alternative')
+        related = MIMEMultipart('related')
+
+        # A headerless part serializes as CRLF + payload, which makes it easy to find and cut out
+        slot = Message()
+        slot.set_payload(_SLOT.decode('ascii'))
+        related.attach(slot)
+        for cid, path in images.items():
+            if os.path.exists(path):
+                related.attach(inline_image_cache.get_part(cid, path))
+            else:
+                print(f"WARNING: Image path does not exist: {path}")
+        message.attach(related)
+
+        buffer = BytesIO()
+        BytesGenerator(buffer, mangle_from_=False, policy=_WIRE_POLICY).flatten(message)
+        data = buffer.getvalue()
+
+        head, _, body = data.partition(b'\r\n\r\n')
+        before, found, after = body.partition(b'\r\n' + _SLOT)
+        if not found:
+            raise ValueError("Could not locate the HTML slot in the compiled skeleton")
+        self._head = head + b'\r\n'
+        self._before = b'\r\n' + before
+        self._after = after
+        self.skeleton_bytes = len(data)
+
+    def render(self, from_addr, to_addr, subject, html, allow_8bit=False):
+        """Wire bytes of the full message for one recipient"""
+        return self.render_with_encoding(from_addr, to_addr, subject, html, allow_8bit)[0]
+
+    def render_with_encoding(self, from_addr, to_addr, subject, html, allow_8bit=False):
+        """
+        Render a message and report how its HTML part was encoded.
+
+        Returns:
+            tuple: (wire_bytes, cte, encoded_html_length)
+        """
+        html_part, cte, html_length = encode_html_part(html, allow_8bit)
+        message = b''.join((
+            self._head,
+            encode_headers(from_addr, to_addr, subject),
+            self._before,
+            html_part,
+            self._after
+        ))
+        return message, cte, html_length
+
+
+_compiled = {}
+_compiled_lock = threading.Lock()
+
+
+def compile_message(images):
+    """
+    Get the compiled skeleton for an image set.
+
+    Skeletons are cached by (cid, content hash) so they are rebuilt when an
+    image file changes.
+    """
+    key = tuple(sorted(
+        (cid, inline_image_cache.digest(path) if os.path.exists(path) else None)
+        for cid, path in images.items()
+    ))
+    with _compiled_lock:
+        compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = CompiledMessage(images)
+        with _compiled_lock:
+            # Only the latest version of each image set is kept
+            for stale in [k for k in _compiled if tuple(cid for cid, _ in k) == tuple(cid for cid, _ in key)]:
+                del _compiled[stale]
+            _compiled[key] = compiled
+    return compiled
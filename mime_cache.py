@@ -0,0 +1,99 @@
+"""
+Content-addressed cache of inline image MIME parts.
+
+Every message embeds the same logo, cover and product images. Reading
+them from disk and base64-encoding them for each recipient is wasted
+work, so the encoded parts are built once per file content (SHA-256) and
+shared by every message. Files are re-stat'ed on each lookup and re-hashed
+only when their size or mtime changes, so editing an asset takes effect
+on the next message.
+"""
+import copy
+import hashlib
+import os
+import threading
+from email.mime.image import MIMEImage
+
+
+class InlineImageCache:
+    """Cache of ready-to-attach MIMEImage parts keyed by file content hash"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._files = {}   # path -> (mtime_ns, size, digest)
+        self._parts = {}   # (digest, cid, filename) -> MIMEImage
+        self.stats = {'hits': 0, 'misses': 0, 'invalidations': 0}
+
+    def _digest(self, path):
+        """Content hash of a file, recomputed only when its size or mtime changes"""
+        st = os.stat(path)
+        with self._lock:
+            cached = self._files.get(path)
+        if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+            return cached[2], None
+
+        with open(path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            if cached and cached[2] != digest:
+                self.stats['invalidations'] += 1
+            self._files[path] = (st.st_mtime_ns, st.st_size, digest)
+            self._evict_unreferenced()
+        return digest, data
+
+    def _evict_unreferenced(self):
+        live = {entry[2] for entry in self._files.values()}
+        for key in [key for key in self._parts if key[0] not in live]:
+            del self._parts[key]
+
+    def digest(self, path):
+        """Content hash of the file currently at `path`"""
+        return self._digest(path)[0]
+
+    def get_part(self, cid, path):
+        """
+        Get an inline image part for `path` with Content-ID <cid>.
+
+        The returned part is a shallow copy of the cached one: it shares the
+        already-encoded payload but can be attached to its own message.
+        """
+        filename = os.path.basename(path)
+        digest, data = self._digest(path)
+        key = (digest, cid, filename)
+        with self._lock:
+            part = self._parts.get(key)
+            if part is not None:
+                self.stats['hits'] += 1
+                return copy.copy(part)
+
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        part = MIMEImage(data)
+        part.add_header('Content-ID', f'<{cid}>')
+        part.add_header('Content-Disposition', 'inline', filename=filename)
+        with self._lock:
+            self._parts[key] = part
+            self.stats['misses'] += 1
+        return copy.copy(part)
+
+    def footprint(self):
+        """Number of cached parts and the bytes held by their encoded payloads"""
+        with self._lock:
+            encoded = sum(len(part.get_payload()) for part in self._parts.values())
+            return {
+                'files': len(self._files),
+                'parts': len(self._parts),
+                'encoded_bytes': encoded,
+                **self.stats
+            }
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self._parts.clear()
+
+
+# Process-wide cache shared by every send and preview path
+inline_image_cache = InlineImageCache()
@@ -0,0 +1,106 @@
+"""
+Content-Transfer-Encoding selection for HTML parts.
+
+MIMEText falls back to base64 for any non-ASCII text (emojis, ±, μ, °),
+which inflates the HTML part by a third. This picks the smallest encoding
+that is safe for the body and the relay:
+
+    7bit              pure ASCII, no line longer than 998 octets
+    8bit              UTF-8 with short lines, only if the relay advertises 8BITMIME
+    quoted-printable  otherwise, unless base64 would actually be smaller
+    base64            fallback for bodies that are mostly non-ASCII
+"""
+import base64
+import quopri
+import threading
+from email.mime.nonmultipart import MIMENonMultipart
+
+# RFC 5322 limit on line length, excluding CRLF
+MAX_LINE_LENGTH = 998
+
+
+def _lines_fit(data):
+    return all(len(line) <= MAX_LINE_LENGTH for line in data.split(b'\n'))
+
+
+def choose_transfer_encoding(data, allow_8bit=False):
+    """
+    Pick the Content-Transfer-Encoding for a body and return it with the encoded body.
+
+    Args:
+        data (bytes): Body with LF line endings
+        allow_8bit (bool): Whether the relay accepts 8BITMIME
+
+    Returns:
+        tuple: (cte, encoded_bytes) with LF line endings
+    """
+    safe_lines = b'\r' not in data and b'\0' not in data and _lines_fit(data)
+    if safe_lines and data.isascii():
+        return '7bit', data
+    if safe_lines and allow_8bit:
+        return '8bit', data
+
+    qp = quopri.encodestring(data)
+    b64_length = (len(data) + 2) // 3 * 4
+    b64_length += b64_length // 76
+    if len(qp) <= b64_length:
+        return 'quoted-printable', qp
+    return 'base64', base64.encodebytes(data)
+
+
+def encode_html(html, allow_8bit=False):
+    """UTF-8 encode an HTML body, normalize line endings and choose its encoding"""
+    data = html.replace('\r\n', '\n').encode('utf-8')
+    return choose_transfer_encoding(data, allow_8bit)
+
+
+def build_html_part(html, allow_8bit=False):
+    """
+    Build a text/html MIME part using the smallest safe transfer encoding.
+
+    Returns:
+        tuple: (part, cte, encoded_length)
+    """
+    cte, encoded = encode_html(html, allow_8bit)
+    part = MIMENonMultipart('text', 'html', charset='utf-8')
+    part['Content-Transfer-Encoding'] = cte
+    # 8bit bodies are carried as surrogate-escaped text so the generator writes the raw bytes
+    part.set_payload(encoded.decode('ascii', 'surrogateescape'))
+    return part, cte, len(encoded)
+
+
+class SendMetrics:
+    """Thread-safe counters of chosen encodings and message sizes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.encodings = {}
+        self.messages = 0
+        self.html_bytes = 0
+        self.base64_bytes = 0
+        self.message_bytes = 0
+
+    def record(self, cte, html_bytes, raw_html_length, message_bytes=0):
+        """Record one message's HTML encoding; raw_html_length is the unencoded UTF-8 size"""
+        base64_equivalent = (raw_html_length + 2) // 3 * 4
+        base64_equivalent += base64_equivalent // 76
+        with self._lock:
+            self.encodings[cte] = self.encodings.get(cte, 0) + 1
+            self.messages += 1
+            self.html_bytes += html_bytes
+            self.base64_bytes += base64_equivalent
+            self.message_bytes += message_bytes
+
+    def as_dict(self):
+        with self._lock:
+            return {
+                'messages': self.messages,
+                'encodings': dict(self.encodings),
+                'html_bytes': self.html_bytes,
+                'html_bytes_saved_vs_base64': self.base64_bytes - self.html_bytes,
+                'avg_message_bytes': int(self.message_bytes / self.messages) if self.messages else 0
+            }
+
+
+# Process-wide totals across every send path
+send_metrics = SendMetrics()
@@ -0,0 +1,116 @@
+"""
+Embeddings for retrieval queries.
+
+Regular emails draw their retrieval queries from a small fixed set, so
+their embeddings are computed once (in a single batch), persisted next to
+the app and served from a table; the transformer only runs for queries
+outside that set, whose embeddings are kept in a bounded LRU.
+
+The persisted table records the model it was built with and is ignored
+when the model changes.
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# Embeddings of ad-hoc queries kept in memory
+QUERY_EMBEDDING_CACHE_SIZE = int(os.getenv('QUERY_EMBEDDING_CACHE_SIZE', '256'))
+
+
+class QueryEmbeddings:
+    """
+    Table of precomputed query embeddings with an LRU for other queries.
+
+    Args:
+        encode (callable): Embeds a string or a list of strings, like SentenceTransformer.encode
+        model_name (str): Identifies the model in the persisted table
+        known_queries (list): Queries to precompute
+        path (str): .npz file the table is persisted in
+        maxsize (int): Ad-hoc embeddings kept in the LRU
+    """
+
+    def __init__(self, encode, model_name, known_queries, path, maxsize=QUERY_EMBEDDING_CACHE_SIZE):
+        self.encode = encode
+        self.model_name = model_name
+        self.known_queries = list(dict.fromkeys(known_queries))
+        self.path = path
+        self.maxsize = maxsize
+        self._table = {}
+        self._recent = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'table_hits': 0, 'lru_hits': 0, 'encoded': 0}
+
+    def _load(self):
+        """Embeddings persisted for this model, or an empty dict"""
+        try:
+            with np.load(self.path, allow_pickle=False) as stored:
+                if str(stored['model']) != self.model_name:
+                    return {}
+                return dict(zip((str(query) for query in stored['queries']), stored['vectors']))
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            print(f"Warning: Ignoring unreadable query embedding table {self.path}: {e}")
+            return {}
+
+    def _save(self, table):
+        queries = list(table)
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            model=np.array(self.model_name),
+            queries=np.array(queries, dtype=str),
+            vectors=np.stack([table[query] for query in queries]).astype(np.float32)
+        )
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self.path)
+
+    def precompute(self):
+        """Load the persisted table and encode (in one batch) any known query missing from it"""
+        table = self._load()
+        missing = [query for query in self.known_queries if query not in table]
+        if missing:
+            vectors = np.asarray(self.encode(missing), dtype=np.float32)
+            table.update(zip(missing, vectors))
+            try:
+                self._save(table)
+            except OSError as e:
+                print(f"Warning: Could not save query embedding table: {e}")
+            print(f"DEBUG: Encoded {len(missing)} retrieval queries")
+        with self._lock:
+            self._table = {query: np.asarray(vector, dtype=np.float32) for query, vector in table.items()}
+
+    def get(self, query):
+        """Embedding of a query as a float32 array"""
+        with self._lock:
+            vector = self._table.get(query)
+            if vector is not None:
+                self.stats['table_hits'] += 1
+                return vector
+            vector = self._recent.get(query)
+            if vector is not None:
+                self._recent.move_to_end(query)
+                self.stats['lru_hits'] += 1
+                return vector
+
+        vector = np.asarray(self.encode(query), dtype=np.float32)
+        with self._lock:
+            self.stats['encoded'] += 1
+            self._recent[query] = vector
+            while len(self._recent) > self.maxsize:
+                self._recent.popitem(last=False)
+        return vector
+
+    def status(self):
+        with self._lock:
+            return {
+                'precomputed': len(self._table),
+                'cached': len(self._recent),
+                'max_cached': self.maxsize,
+                **self.stats
+            }
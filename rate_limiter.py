@@ -0,0 +1,169 @@
+"""
+Adaptive send-rate limiting.
+
+A token bucket per sender account controls how fast messages are handed
+to the relay. The bucket's refill rate follows AIMD: it is cut
+multiplicatively when the relay answers with a throttling reply
+(421/450/451/452) and grows additively while sends succeed. Limiters are
+kept in a process-wide registry, so every job running in a worker shares
+the same budget for a given account.
+"""
+import json
+import os
+import threading
+import time
+
+# 4xx replies that mean "slow down" rather than "this recipient is bad"
+THROTTLE_CODES = {421, 450, 451, 452}
+
+# Defaults for accounts without an explicit entry in SMTP_RATE_LIMITS
+DEFAULT_RATE = float(os.getenv("SMTP_RATE", "1.0"))        # messages per second
+DEFAULT_BURST = float(os.getenv("SMTP_BURST", "5"))        # bucket capacity
+DEFAULT_MAX_RATE = float(os.getenv("SMTP_MAX_RATE", "10"))  # AIMD ceiling
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate (float): Tokens added per second
+        burst (float): Maximum number of tokens the bucket can hold
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        if elapsed > 0:
+            self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+            self._updated = now
+
+    def try_acquire(self, tokens=1):
+        """Take tokens if available; return the seconds to wait otherwise (0 means acquired)"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens=1, timeout=None):
+        """Block until tokens are available. Returns False if the timeout expires first."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait == 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def set_rate(self, rate):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket whose rate adapts to relay feedback (AIMD).
+
+    Args:
+        rate (float): Starting rate in messages per second
+        burst (float): Bucket capacity
+        min_rate (float): Floor the rate is never cut below
+        max_rate (float): Ceiling the rate never grows above
+        increase (float): Messages/second added per `increase_every` consecutive successes
+        increase_every (int): Successes needed before each additive increase
+        decrease_factor (float): Multiplier applied to the rate on a throttling reply
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=0.05,
+                 max_rate=DEFAULT_MAX_RATE, increase=0.1, increase_every=10,
+                 decrease_factor=0.5):
+        self.min_rate = min_rate
+        self.max_rate = max(max_rate, rate)
+        self.increase = increase
+        self.increase_every = increase_every
+        self.decrease_factor = decrease_factor
+        self.bucket = TokenBucket(rate, burst)
+        self._successes = 0
+        self._lock = threading.Lock()
+        self.stats = {'throttled': 0, 'succeeded': 0}
+
+    @property
+    def rate(self):
+        return self.bucket.rate
+
+    def acquire(self, timeout=None):
+        """Wait for permission to send one message"""
+        return self.bucket.acquire(1, timeout=timeout)
+
+    def on_success(self):
+        """Additive increase after a run of successful sends"""
+        with self._lock:
+            self.stats['succeeded'] += 1
+            self._successes += 1
+            if self._successes >= self.increase_every:
+                self._successes = 0
+                self.bucket.set_rate(min(self.max_rate, self.bucket.rate + self.increase))
+
+    def on_throttle(self, code=None):
+        """Multiplicative decrease when the relay pushes back"""
+        with self._lock:
+            self.stats['throttled'] += 1
+            self._successes = 0
+            new_rate = max(self.min_rate, self.bucket.rate * self.decrease_factor)
+            self.bucket.set_rate(new_rate)
+        print(f"WARNING: Relay throttled (code {code}), send rate lowered to {new_rate:.2f}/s")
+
+    def on_reply(self, code):
+        """Feed an SMTP reply code back into the limiter"""
+        if code in THROTTLE_CODES:
+            self.on_throttle(code)
+        elif code is not None and code < 400:
+            self.on_success()
+
+
+def _load_account_limits():
+    """Per-account limits, e.g. SMTP_RATE_LIMITS='{"rebecca@sensiq.ae": {"rate": 2, "burst": 10}}'"""
+    raw = os.getenv("SMTP_RATE_LIMITS")
+    if not raw:
+        return {}
+    try:
+        return json.loads(raw)
+    except ValueError as e:
+        print(f"Warning: Could not parse SMTP_RATE_LIMITS: {e}")
+        return {}
+
+
+_account_limits = _load_account_limits()
+_limiters = {}
+_registry_lock = threading.Lock()
+
+
+def configure_rate_limit(account, **settings):
+    """Set the limits for an account; replaces any limiter already created for it"""
+    with _registry_lock:
+        _account_limits[account] = settings
+        _limiters.pop(account, None)
+
+
+def get_rate_limiter(account):
+    """Get the shared limiter for a sender account, creating it on first use"""
+    with _registry_lock:
+        limiter = _limiters.get(account)
+        if limiter is None:
+            limiter = AdaptiveRateLimiter(**_account_limits.get(account, {}))
+            _limiters[account] = limiter
+        return limiter
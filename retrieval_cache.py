@@ -0,0 +1,161 @@
+"""
+Cache of vector search results shared by all worker processes.
+
+Retrieval queries come from a small fixed set and the index only changes
+when it is rebuilt, so query_vector_database results are stored in a
+small SQLite database keyed by (query, top_k, index version). Every
+gunicorn worker reads the same file, so a result computed by one worker
+serves all of them.
+
+The index version is a counter in the same database. Every function that
+rewrites the index bumps it, which makes all earlier results unreachable
+and deletes them.
+"""
+import json
+import os
+import sqlite3
+import threading
+
+RETRIEVAL_CACHE_PATH = os.getenv(
+    'RETRIEVAL_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'retrieval_cache.sqlite3')
+)
+
+# Rows kept before the oldest results are pruned
+RETRIEVAL_CACHE_MAX_ROWS = int(os.getenv('RETRIEVAL_CACHE_MAX_ROWS', '10000'))
+
+# Writes between checks of the row limit
+_PRUNE_EVERY = 100
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS index_version (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO index_version (id, version) VALUES (0, 1);
+CREATE TABLE IF NOT EXISTS results (
+    query TEXT NOT NULL,
+    top_k INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    texts TEXT NOT NULL,
+    PRIMARY KEY (query, top_k, version)
+);
+"""
+
+
+class RetrievalCache:
+    """
+    SQLite-backed cache of query results.
+
+    Args:
+        path (str): Database file, created on first use
+        max_rows (int): Results kept before the oldest are pruned
+    """
+
+    def __init__(self, path=RETRIEVAL_CACHE_PATH, max_rows=RETRIEVAL_CACHE_MAX_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._writes = 0
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0, 'invalidations': 0}
+
+    def _connection(self):
+        """This thread's connection, opening it (and the schema) on first use"""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.executescript(_SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def lookup(self, query, top_k):
+        """
+        Look up a cached result.
+
+        Returns:
+            tuple: (version, texts); texts is None on a miss, and version is
+            what to pass to store() for the freshly computed result
+        """
+        try:
+            connection = self._connection()
+            version = connection.execute('SELECT version FROM index_version WHERE id = 0').fetchone()[0]
+            row = connection.execute(
+                'SELECT texts FROM results WHERE query = ? AND top_k = ? AND version = ?',
+                (query, top_k, version)
+            ).fetchone()
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Warning: Retrieval cache unavailable: {e}")
+            return None, None
+        if row is None:
+            self._count('misses')
+            return version, None
+        self._count('hits')
+        return version, json.loads(row[0])
+
+    def store(self, query, top_k, version, texts):
+        """Cache a result computed against the given index version"""
+        if version is None:
+            return
+        try:
+            connection = self._connection()
+            connection.execute(
+                'INSERT OR REPLACE INTO results (query, top_k, version, texts) VALUES (?, ?, ?, ?)',
+                (query, top_k, version, json.dumps(texts))
+            )
+            with self._lock:
+                self._writes += 1
+                prune = self._writes % _PRUNE_EVERY == 0
+            if prune:
+                connection.execute(
+                    'DELETE FROM results WHERE rowid NOT IN '
+                    '(SELECT rowid FROM results ORDER BY rowid DESC LIMIT ?)',
+                    (self.max_rows,)
+                )
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"Warning: Could not cache retrieval result: {e}")
+
+    def version(self):
+        return self._connection().execute('SELECT version FROM index_version WHERE id = 0').fetchone()[0]
+
+    def bump_version(self):
+        """Invalidate every cached result; call after the index is rewritten"""
+        try:
+            connection = self._connection()
+            connection.execute('BEGIN IMMEDIATE')
+            try:
+                connection.execute('UPDATE index_version SET version = version + 1 WHERE id = 0')
+                connection.execute(
+                    'DELETE FROM results WHERE version < (SELECT version FROM index_version WHERE id = 0)')
+                connection.execute('COMMIT')
+            except Exception:
+                connection.execute('ROLLBACK')
+                raise
+        except sqlite3.Error as e:
+            self._count('errors')
+            print(f"ERROR: Could not invalidate retrieval cache: {e}")
+            return False
+        self._count('invalidations')
+        return True
+
+    def status(self):
+        try:
+            connection = self._connection()
+            version = connection.execute('SELECT version FROM index_version WHERE id = 0').fetchone()[0]
+            rows = connection.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+        except sqlite3.Error:
+            version, rows = None, None
+        with self._lock:
+            return {'index_version': version, 'results': rows, **self.stats}
+
+
+# Process-wide handle; the data itself is shared through the database file
+retrieval_cache = RetrievalCache()
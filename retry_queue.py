@@ -0,0 +1,105 @@
+"""
+SMTP failure classification and delayed retries.
+
+Replies in the 4xx range (greylisting, temporary throttling, mailbox busy)
+and dropped connections are transient: the message is put back on a
+delayed retry queue with exponential backoff and jitter. Replies in the
+5xx range are permanent and are recorded with their code instead of being
+retried. Retries wait on the event loop, so the main send loop keeps
+going while they are pending.
+"""
+import asyncio
+import random
+import smtplib
+
+TRANSIENT = 'transient'
+PERMANENT = 'permanent'
+
+
+def classify_smtp_error(error):
+    """
+    Classify an exception raised while sending.
+
+    Returns:
+        tuple: (category, reply_code) where category is TRANSIENT or PERMANENT
+            and reply_code is the SMTP reply code, or None if there was no reply
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in error.recipients.values()]
+        code = min(codes) if codes else None
+        return (TRANSIENT if code and 400 <= code < 500 else PERMANENT), code
+    if isinstance(error, smtplib.SMTPResponseException):
+        code = error.smtp_code
+        return (TRANSIENT if 400 <= code < 500 else PERMANENT), code
+    if isinstance(error, (smtplib.SMTPServerDisconnected, ConnectionError, TimeoutError)):
+        return TRANSIENT, None
+    if isinstance(error, smtplib.SMTPException):
+        return PERMANENT, None
+    if isinstance(error, OSError):
+        return TRANSIENT, None
+    return PERMANENT, None
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with jitter.
+
+    Args:
+        max_attempts (int): Total attempts per message, including the first
+        base_delay (float): Delay in seconds before the first retry
+        max_delay (float): Upper bound on any single delay
+        jitter (float): Fraction of the delay that is randomized (0 disables jitter)
+    """
+
+    def __init__(self, max_attempts=4, base_delay=30, max_delay=900, jitter=0.5):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.jitter = jitter
+
+    def should_retry(self, category, attempts):
+        return category == TRANSIENT and attempts < self.max_attempts
+
+    def delay(self, attempts):
+        """Seconds to wait before the next attempt, given how many attempts have been made"""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempts - 1)))
+        spread = delay * self.jitter
+        return delay - spread + random.uniform(0, spread)
+
+
+class RetryQueue:
+    """
+    Delayed retry queue on an asyncio event loop.
+
+    Each scheduled retry sleeps on the loop without holding a send slot,
+    then runs the handler. `join()` waits until every pending retry has run.
+    """
+
+    def __init__(self):
+        self._pending = set()
+        self.stats = {'scheduled': 0, 'completed': 0}
+
+    def __len__(self):
+        return len(self._pending)
+
+    def schedule(self, delay, handler, *args):
+        """Run `await handler(*args)` after `delay` seconds"""
+        async def run_later():
+            await asyncio.sleep(delay)
+            await handler(*args)
+
+        task = asyncio.get_running_loop().create_task(run_later())
+        self._pending.add(task)
+        self.stats['scheduled'] += 1
+
+        def finished(t):
+            self._pending.discard(t)
+            self.stats['completed'] += 1
+
+        task.add_done_callback(finished)
+        return task
+
+    async def join(self):
+        """Wait for all pending retries, including ones scheduled while waiting"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
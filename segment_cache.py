@@ -0,0 +1,138 @@
+"""
+Rendered email bodies per campaign segment.
+
+Product and follow-up bodies depend only on the segment (email type,
+country, recipient type, follow-up stage, image mode) and the recipient's
+name. Each segment is rendered once with a marker in the name slot and
+split around it, so a recipient's body is a single join of the cached
+pieces with their name. Regular emails are cached the same way with a
+marker where the generated introduction goes.
+
+Entries are keyed with the versions of the template and content files
+they were built from, so editing either produces a fresh render on the
+next lookup; stale entries age out of the LRU.
+"""
+import hashlib
+import importlib
+import os
+import threading
+from collections import OrderedDict
+
+from file_cache import file_cache
+
+# Stand-in for the recipient name while a segment is rendered
+NAME_SLOT = '\x00recipient_name\x00'
+
+# Stand-in for the generated introduction of a regular email
+INTRO_SLOT = '\x00intro\x00'
+
+SEGMENT_CACHE_SIZE = int(os.getenv('SEGMENT_CACHE_SIZE', '256'))
+
+_CONTENT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'followup_content.py')
+
+
+class SegmentBody:
+    """A rendered subject and body with the per-message text (by default the recipient name) cut out"""
+
+    __slots__ = ('subject', '_pieces', '_digest')
+
+    def __init__(self, subject, html, slot=NAME_SLOT):
+        self.subject = subject
+        self._pieces = html.split(slot)
+        self._digest = None
+
+    @property
+    def digest(self):
+        """Hash of the subject and body, the same in every process that rendered the same content"""
+        if self._digest is None:
+            self._digest = hashlib.sha256(repr((self.subject, self._pieces)).encode('utf-8')).hexdigest()
+        return self._digest
+
+    def render(self, text):
+        """Body with the slot filled, e.g. with one recipient's name"""
+        return text.join(self._pieces)
+
+    def __len__(self):
+        return sum(len(piece) for piece in self._pieces)
+
+
+class SegmentCache:
+    """
+    LRU cache of SegmentBody objects.
+
+    Args:
+        maxsize (int): Maximum number of segments kept
+    """
+
+    def __init__(self, maxsize=SEGMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+
+    def get(self, key, version, build, slot=NAME_SLOT):
+        """
+        Get the segment for `key` built from the given file versions.
+
+        Args:
+            key (tuple): Segment identity
+            version (tuple): Versions of the files the segment is rendered from
+            build (callable): Returns (subject, html) with `slot` in the name position
+            slot (str): Marker the body is split around
+        """
+        full_key = (key, version)
+        with self._lock:
+            segment = self._entries.get(full_key)
+            if segment is not None:
+                self._entries.move_to_end(full_key)
+                self.stats['hits'] += 1
+                return segment
+
+        subject, html = build()
+        segment = SegmentBody(subject, html, slot)
+        with self._lock:
+            self.stats['misses'] += 1
+            self._entries[full_key] = segment
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+        return segment
+
+    def footprint(self):
+        with self._lock:
+            return {
+                'segments': len(self._entries),
+                'max_segments': self.maxsize,
+                'characters': sum(len(segment) for segment in self._entries.values()),
+                **self.stats
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_content_lock = threading.Lock()
+_content_loaded_version = None
+
+
+def followup_content_version():
+    """
+    Version of templates/followup_content.py, reloading the module when the file changed.
+    """
+    global _content_loaded_version
+    version = file_cache.version(_CONTENT_PATH)
+    if version != _content_loaded_version:
+        with _content_lock:
+            if version != _content_loaded_version:
+                import templates.followup_content as followup_content
+                if _content_loaded_version is not None:
+                    importlib.reload(followup_content)
+                    print(f"DEBUG: Reloaded follow-up content (version {version})")
+                _content_loaded_version = version
+    return version
+
+
+# Process-wide cache shared by the send and preview paths
+segment_cache = SegmentCache()
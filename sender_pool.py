@@ -0,0 +1,261 @@
+"""
+Multiple sender accounts and relays for bulk jobs.
+
+Each account has its own credentials, relay, SMTP session pool and rate
+limiter. The pool spreads messages across accounts with smooth weighted
+round-robin, tracks per-account health, and takes an account out of
+rotation when it keeps failing or its daily quota is used up.
+
+Accounts are configured with SENDER_POOL_CONFIG, either inline JSON or a
+path to a JSON file:
+
+    [
+        {"email": "rebecca@sensiq.ae", "password_env": "EMAIL_PASSWORD",
+         "smtp_server": "smtp.hostinger.com", "port": 587,
+         "weight": 2, "rate": 1.0, "burst": 5, "daily_quota": 3000},
+        {"email": "sales@sensiq.ae", "password_env": "SALES_EMAIL_PASSWORD",
+         "weight": 1, "daily_quota": 1000}
+    ]
+
+Without it, the pool holds only the default account from Cold_email_v2.
+"""
+import json
+import os
+import threading
+import time
+from datetime import date
+
+from smtp_pool import SMTPConnectionPool
+from rate_limiter import configure_rate_limit, get_rate_limiter
+
+# Reply text that means the account itself is out of quota, not the recipient
+QUOTA_MARKERS = ('quota', 'limit exceeded', 'too many messages', 'sending limit')
+
+
+class NoSenderAvailable(Exception):
+    """Raised when every sender account is drained or cooling down"""
+
+
+class SenderAccount:
+    """
+    One mailbox on one relay.
+
+    Args:
+        email (str): Mailbox address, used for login and as the From header
+        password (str): Mailbox password
+        smtp_server (str): Relay hostname
+        port (int): Relay port
+        weight (int): Share of traffic relative to other accounts
+        daily_quota (int): Messages per day before the account is drained (None for unlimited)
+        rate (float): Starting send rate in messages per second
+        burst (float): Token bucket capacity
+        pool_size (int): Maximum concurrent SMTP sessions
+        max_failures (int): Consecutive failures before the account is cooled down
+        cooldown (float): Seconds an unhealthy account is kept out of rotation
+    """
+
+    def __init__(self, email, password, smtp_server, port, weight=1, daily_quota=None,
+                 rate=None, burst=None, pool_size=4, max_messages_per_session=100,
+                 max_failures=5, cooldown=300, debug=False):
+        self.email = email
+        self.smtp_server = smtp_server
+        self.port = port
+        self.weight = max(1, int(weight))
+        self.daily_quota = daily_quota
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+
+        limits = {key: value for key, value in (('rate', rate), ('burst', burst)) if value is not None}
+        if limits:
+            configure_rate_limit(email, **limits)
+        self.limiter = get_rate_limiter(email)
+        self.pool = self._build_pool(password, pool_size, max_messages_per_session, debug)
+
+        self._lock = threading.Lock()
+        self._quota_day = date.today()
+        self.sent_today = 0
+        self.consecutive_failures = 0
+        self.disabled_until = 0
+        self.drained_on = None
+        self.stats = {'sent': 0, 'failed': 0}
+
+    def _build_pool(self, password, pool_size, max_messages_per_session, debug):
+        return SMTPConnectionPool(
+            self.smtp_server,
+            self.port,
+            self.email,
+            password,
+            max_size=pool_size,
+            max_messages_per_session=max_messages_per_session,
+            debug=debug,
+            reply_listener=self.limiter.on_reply
+        )
+
+    def reconfigure(self, smtp_server=None, port=None, pool_size=None, rate=None, burst=None):
+        """
+        Apply relay and rate settings to an existing account.
+
+        Used for the default sender when SENDER_POOL_CONFIG has an entry
+        for it. The session pool is rebuilt only if the relay or its size
+        changes.
+        """
+        limits = {key: value for key, value in (('rate', rate), ('burst', burst)) if value is not None}
+        if limits:
+            configure_rate_limit(self.email, **limits)
+            self.limiter = get_rate_limiter(self.email)
+
+        pool = self.pool
+        smtp_server = smtp_server or self.smtp_server
+        port = int(port or self.port)
+        pool_size = int(pool_size or pool.max_size)
+        if (smtp_server, port, pool_size) != (self.smtp_server, self.port, pool.max_size):
+            self.smtp_server = smtp_server
+            self.port = port
+            pool.close_all()
+            self.pool = self._build_pool(pool.password, pool_size, pool.max_messages_per_session, pool.debug)
+        else:
+            pool.reply_listener = self.limiter.on_reply
+
+    def _roll_day(self):
+        today = date.today()
+        if today != self._quota_day:
+            self._quota_day = today
+            self.sent_today = 0
+            self.drained_on = None
+
+    def is_available(self):
+        with self._lock:
+            self._roll_day()
+            if self.drained_on is not None:
+                return False
+            if self.daily_quota is not None and self.sent_today >= self.daily_quota:
+                return False
+            return time.time() >= self.disabled_until
+
+    def record_success(self):
+        with self._lock:
+            self._roll_day()
+            self.sent_today += 1
+            self.stats['sent'] += 1
+            self.consecutive_failures = 0
+
+    def record_failure(self, error):
+        """Update health after a failed send"""
+        text = str(error).lower()
+        with self._lock:
+            self.stats['failed'] += 1
+            if any(marker in text for marker in QUOTA_MARKERS):
+                self.drained_on = self._quota_day
+                print(f"WARNING: Sender {self.email} reports quota exhausted, draining until tomorrow")
+                return
+            # Recipient-level rejections say nothing about the account's health
+            code = getattr(error, 'smtp_code', None)
+            if code is not None and code >= 500:
+                return
+            self.consecutive_failures += 1
+            if self.consecutive_failures >= self.max_failures:
+                self.disabled_until = time.time() + self.cooldown
+                self.consecutive_failures = 0
+                print(f"WARNING: Sender {self.email} unhealthy, paused for {self.cooldown}s")
+
+    def status(self):
+        with self._lock:
+            self._roll_day()
+            return {
+                'email': self.email,
+                'smtp_server': self.smtp_server,
+                'weight': self.weight,
+                'rate': round(self.limiter.rate, 3),
+                'sent_today': self.sent_today,
+                'daily_quota': self.daily_quota,
+                'drained': self.drained_on is not None or (
+                    self.daily_quota is not None and self.sent_today >= self.daily_quota),
+                'paused_for': max(0, round(self.disabled_until - time.time())),
+                'sent': self.stats['sent'],
+                'failed': self.stats['failed']
+            }
+
+
+class SenderPool:
+    """Weighted rotation over healthy sender accounts"""
+
+    def __init__(self, accounts):
+        if not accounts:
+            raise ValueError("SenderPool needs at least one account")
+        self.accounts = list(accounts)
+        self._current = {id(account): 0 for account in self.accounts}
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """Pick the next account by smooth weighted round-robin, skipping unavailable ones"""
+        available = [account for account in self.accounts if account.is_available()]
+        if not available:
+            raise NoSenderAvailable("All sender accounts are drained or paused")
+        with self._lock:
+            total = sum(account.weight for account in available)
+            best = None
+            for account in available:
+                self._current[id(account)] += account.weight
+                if best is None or self._current[id(account)] > self._current[id(best)]:
+                    best = account
+            self._current[id(best)] -= total
+        return best
+
+    def status(self):
+        return [account.status() for account in self.accounts]
+
+    def close_all(self):
+        for account in self.accounts:
+            account.pool.close_all()
+
+
+def _read_config():
+    raw = os.getenv("SENDER_POOL_CONFIG")
+    if not raw:
+        return None
+    if os.path.exists(raw):
+        with open(raw, 'r', encoding='utf-8') as f:
+            raw = f.read()
+    return json.loads(raw)
+
+
+def load_sender_pool(default_account):
+    """Build the sender pool from SENDER_POOL_CONFIG, or just the default account if unset"""
+    try:
+        config = _read_config()
+    except Exception as e:
+        print(f"Warning: Could not read SENDER_POOL_CONFIG, using default sender only: {e}")
+        config = None
+    if not config:
+        return SenderPool([default_account])
+
+    accounts = []
+    for entry in config:
+        if entry['email'] == default_account.email:
+            default_account.weight = max(1, int(entry.get('weight', default_account.weight)))
+            default_account.daily_quota = entry.get('daily_quota', default_account.daily_quota)
+            default_account.reconfigure(
+                smtp_server=entry.get('smtp_server'),
+                port=entry.get('port'),
+                pool_size=entry.get('pool_size'),
+                rate=entry.get('rate'),
+                burst=entry.get('burst')
+            )
+            accounts.append(default_account)
+            continue
+        password = entry.get('password') or os.getenv(entry.get('password_env', ''), '')
+        if not password:
+            print(f"Warning: No password configured for sender {entry['email']}, skipping")
+            continue
+        accounts.append(SenderAccount(
+            entry['email'],
+            password,
+            entry.get('smtp_server', default_account.smtp_server),
+            int(entry.get('port', default_account.port)),
+            weight=entry.get('weight', 1),
+            daily_quota=entry.get('daily_quota'),
+            rate=entry.get('rate'),
+            burst=entry.get('burst'),
+            pool_size=int(entry.get('pool_size', default_account.pool.max_size))
+        ))
+    return SenderPool(accounts or [default_account])
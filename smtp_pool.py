@@ -0,0 +1,239 @@
+"""
+Pooled, authenticated SMTP sessions.
+
+Opening a new connection per message costs a TCP connect, a STARTTLS
+handshake and an AUTH round trip. The pool keeps logged-in sessions open
+and hands them out to senders, resetting them between messages and
+replacing them when the relay drops the connection.
+"""
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+
+# Reply codes after which the session must not be reused
+RECONNECT_CODES = {421}
+
+
+class PooledSession:
+    """An authenticated SMTP connection plus the bookkeeping the pool needs"""
+
+    def __init__(self, smtp):
+        self.smtp = smtp
+        self.messages_sent = 0
+        self.created_at = time.time()
+        self.last_used = self.created_at
+
+    def close(self):
+        try:
+            self.smtp.quit()
+        except Exception:
+            try:
+                self.smtp.close()
+            except Exception:
+                pass
+
+
+class SMTPConnectionPool:
+    """
+    Thread-safe pool of logged-in SMTP sessions for a single account.
+
+    Args:
+        host (str): SMTP relay hostname
+        port (int): SMTP relay port (STARTTLS is used)
+        username (str): Login user, also the default envelope sender
+        password (str): Login password
+        max_size (int): Maximum number of sessions open at once
+        max_messages_per_session (int): Recycle a session after this many messages
+        idle_check_after (float): Seconds of idleness after which a NOOP probe is sent before reuse
+        max_idle (float): Seconds of idleness after which a session is closed instead of reused
+        timeout (float): Socket timeout for each connection
+        debug (bool): Enable smtplib protocol debug output
+        reply_listener (callable): Called with the reply code of every SMTP error response
+    """
+
+    def __init__(self, host, port, username, password, max_size=4,
+                 max_messages_per_session=100, idle_check_after=10,
+                 max_idle=120, timeout=30, debug=False,
+                 reply_listener=None):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.max_size = max_size
+        self.max_messages_per_session = max_messages_per_session
+        self.idle_check_after = idle_check_after
+        self.max_idle = max_idle
+        self.timeout = timeout
+        self.debug = debug
+        self.reply_listener = reply_listener
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._extensions = None
+        self._slots = threading.BoundedSemaphore(max_size)
+        self.stats = {
+            'connections_opened': 0,
+            'connections_reused': 0,
+            'reconnects': 0,
+            'messages_sent': 0
+        }
+
+    def _connect(self):
+        """Open, secure and authenticate a new SMTP session"""
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.debug:
+                smtp.set_debuglevel(1)
+            smtp.ehlo()
+            if smtp.has_extn('starttls'):
+                smtp.starttls()
+                smtp.ehlo()
+            if self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.stats['connections_opened'] += 1
+            # EHLO keywords the relay advertised after STARTTLS, cached for message builders
+            self._extensions = frozenset(smtp.esmtp_features)
+        if self.debug:
+            print(f"DEBUG: Opened SMTP session to {self.host}:{self.port} as {self.username}")
+        return PooledSession(smtp)
+
+    def _is_usable(self, session):
+        """Check an idle session before handing it out again"""
+        idle_for = time.time() - session.last_used
+        if idle_for > self.max_idle:
+            return False
+        if idle_for > self.idle_check_after:
+            try:
+                code = session.smtp.noop()[0]
+            except Exception:
+                return False
+            return code == 250
+        return True
+
+    def acquire(self):
+        """Get a ready-to-use session, opening a new one if none is idle"""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    session = self._idle.pop() if self._idle else None
+                if session is None:
+                    return self._connect()
+                if self._is_usable(session):
+                    with self._lock:
+                        self.stats['connections_reused'] += 1
+                    return session
+                session.close()
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, session, discard=False):
+        """Return a session to the pool, or close it if it is spent or broken"""
+        try:
+            if not discard and session.messages_sent >= self.max_messages_per_session:
+                discard = True
+            if not discard:
+                try:
+                    # Clear any envelope state left behind by the last transaction
+                    code = session.smtp.rset()[0]
+                    discard = code != 250
+                except Exception:
+                    discard = True
+            if discard:
+                session.close()
+            else:
+                session.last_used = time.time()
+                with self._lock:
+                    self._idle.append(session)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def session(self):
+        """Context manager yielding a pooled session; broken sessions are discarded"""
+        session = self.acquire()
+        try:
+            yield session
+        except Exception as e:
+            self.release(session, discard=self._must_reconnect(e))
+            raise
+        else:
+            self.release(session)
+
+    @staticmethod
+    def _must_reconnect(error):
+        # SMTPException derives from OSError, so check the SMTP-specific cases first
+        if isinstance(error, smtplib.SMTPResponseException):
+            return error.smtp_code in RECONNECT_CODES
+        if isinstance(error, smtplib.SMTPServerDisconnected):
+            return True
+        if isinstance(error, smtplib.SMTPException):
+            return False
+        return isinstance(error, OSError)
+
+    def _send(self, send_func):
+        """Run a send on a pooled session, retrying once on a fresh connection if it was dropped"""
+        for attempt in range(2):
+            try:
+                with self.session() as session:
+                    result = send_func(session.smtp)
+                    if self.reply_listener and result:
+                        # Recipients refused while others were accepted
+                        for code, _ in result.values():
+                            self.reply_listener(code)
+                    session.messages_sent += 1
+                    with self._lock:
+                        self.stats['messages_sent'] += 1
+                    return result
+            except Exception as e:
+                if self.reply_listener:
+                    if isinstance(e, smtplib.SMTPResponseException):
+                        self.reply_listener(e.smtp_code)
+                    elif isinstance(e, smtplib.SMTPRecipientsRefused):
+                        # RCPT-time greylisting and throttling (450/451/452) arrive here
+                        for code, _ in e.recipients.values():
+                            self.reply_listener(code)
+                if attempt == 0 and self._must_reconnect(e):
+                    print(f"WARNING: SMTP session dropped ({e}), reconnecting")
+                    with self._lock:
+                        self.stats['reconnects'] += 1
+                    continue
+                raise
+
+    def has_extn(self, name):
+        """
+        Whether the relay advertises an ESMTP extension.
+
+        The answer comes from the EHLO of the most recent session, so it is
+        known without a round trip; the first call opens a session if none
+        has been opened yet.
+        """
+        if self._extensions is None:
+            try:
+                self.release(self.acquire())
+            except Exception as e:
+                print(f"WARNING: Could not probe {self.host} for ESMTP extensions: {e}")
+                return False
+        return name.lower() in (self._extensions or ())
+
+    def send_message(self, message, from_addr=None, to_addrs=None, mail_options=()):
+        """Send an email.message.Message over a pooled session"""
+        return self._send(lambda smtp: smtp.send_message(
+            message, from_addr=from_addr, to_addrs=to_addrs, mail_options=mail_options))
+
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=()):
+        """Send an already-serialized message over a pooled session"""
+        return self._send(lambda smtp: smtp.sendmail(from_addr, to_addrs, msg, mail_options=mail_options))
+
+    def close_all(self):
+        """Close every idle session"""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for session in idle:
+            session.close()
@@ -0,0 +1,139 @@
+"""
+Compiled HTML templates.
+
+Each template file is parsed once into alternating literal and slot
+segments. Rendering fills the slots and joins everything in one pass,
+instead of a chain of str.replace calls that each copy the whole
+document. A render with a missing or unknown placeholder raises
+TemplateError rather than sending an email with a raw {{placeholder}} in it.
+"""
+import os
+import re
+
+from file_cache import file_cache
+
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+
+PRODUCT_TEMPLATE = 'product_template.html'
+FOLLOWUP_TEMPLATE = 'followup_template.html'
+
+_PLACEHOLDER = re.compile(r'\{\{\s*([A-Za-z_][A-Za-z0-9_]*)\s*\}\}')
+
+
+class TemplateError(ValueError):
+    """Raised when a template is rendered with missing or unknown placeholders"""
+
+
+class CompiledTemplate:
+    """
+    A template split into literal text and named slots.
+
+    Args:
+        source (str): Template text with {{name}} placeholders
+        name (str): Name used in error messages
+    """
+
+    def __init__(self, source, name='<string>'):
+        self.name = name
+        self._literals = []
+        self._slots = []
+        position = 0
+        for match in _PLACEHOLDER.finditer(source):
+            self._literals.append(source[position:match.start()])
+            self._slots.append(match.group(1))
+            position = match.end()
+        self._literals.append(source[position:])
+        self.placeholders = frozenset(self._slots)
+
+    def render(self, values):
+        """
+        Fill every slot and return the rendered text.
+
+        Args:
+            values (dict): Placeholder name -> replacement string
+
+        Raises:
+            TemplateError: If a placeholder has no value or a value has no placeholder
+        """
+        missing = self.placeholders - values.keys()
+        if missing:
+            raise TemplateError(f"Template {self.name} is missing values for: {', '.join(sorted(missing))}")
+        unknown = values.keys() - self.placeholders
+        if unknown:
+            raise TemplateError(f"Template {self.name} has no placeholders for: {', '.join(sorted(unknown))}")
+
+        literals = self._literals
+        parts = [literals[0]]
+        for index, slot in enumerate(self._slots, 1):
+            parts.append(values[slot])
+            parts.append(literals[index])
+        return ''.join(parts)
+
+
+def load_template(filename):
+    """
+    Get the compiled template for a file in the templates directory.
+
+    The file is read through the shared file cache, so it is compiled once
+    and recompiled only after it changes on disk.
+    """
+    return file_cache.load(
+        os.path.join(TEMPLATES_DIR, filename),
+        lambda data: CompiledTemplate(data.decode('utf-8'), filename),
+        key='compiled_template'
+    )
+
+
+def template_version(filename):
+    """Reload counter of a template file, for caches of rendered output"""
+    return file_cache.version(os.path.join(TEMPLATES_DIR, filename))
+
+
+def format_product_specs(product_info):
+    """Format product technical specifications into HTML."""
+    parts = []
+    for category, details in product_info['technical_specs'].items():
+        parts.append(f'<div class="content-text"><h3 style="color: #0ef0a1;">{category.title()}</h3><ul style="list-style: none; padding-left: 0;">')
+        for key, value in details.items():
+            parts.append(f'<li style="margin-bottom: 8px;"><strong style="color: #9ba6b7;">{key.replace("_", " ").title()}:</strong> {value}</li>')
+        parts.append('</ul></div>')
+    return ''.join(parts)
+
+
+def format_product_features(product_info):
+    """Format product features into HTML."""
+    items = ''.join(
+        f'<li style="margin-bottom: 8px; color: #9ba6b7;">• {feature}</li>'
+        for feature in product_info['key_features']
+    )
+    return f'<ul style="list-style: none; padding-left: 0;">{items}</ul>'
+
+
+def render_product_template(product_info, product_image='cid:product'):
+    """Render product_template.html for a product info dict"""
+    return load_template(PRODUCT_TEMPLATE).render({
+        'product_name': product_info['name'],
+        'product_subtitle': product_info['subtitle'],
+        'product_image': product_image,
+        'technical_specs': format_product_specs(product_info),
+        'key_features': format_product_features(product_info)
+    })
+
+
+def render_followup_template(recipient_name, subject, content):
+    """
+    Render followup_template.html.
+
+    Args:
+        recipient_name (str): Name used in the greeting
+        subject (str): Email subject, shown in the document title
+        content (dict): Components from templates.followup_content.get_followup_content
+    """
+    return load_template(FOLLOWUP_TEMPLATE).render({
+        'recipient_name': recipient_name,
+        'subject': subject,
+        'followup_intro': content['followup_intro'],
+        'country_specific_content': content['country_specific_content'],
+        'main_content': content['main_content'],
+        'cta_message': content['cta_message']
+    })
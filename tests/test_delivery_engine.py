@@ -0,0 +1,79 @@
+import smtplib
+
+from delivery_engine import DeliveryEngine
+from retry_queue import RetryPolicy
+
+NO_WAIT = RetryPolicy(max_attempts=3, base_delay=0, max_delay=0, jitter=0)
+
+
+def recipients(*emails):
+    return [{'email': email} for email in emails]
+
+
+def test_counts_successes_and_failures():
+    job = {}
+    DeliveryEngine(concurrency=2).run(
+        recipients('ok@example.com', 'bad@example.com', 'ok2@example.com'),
+        lambda recipient: recipient['email'].startswith('ok'),
+        job
+    )
+    assert (job['total'], job['sent'], job['failed'], job['progress']) == (3, 2, 1, 100)
+    assert job['concurrency'] == 2
+    assert job['failures'] == []
+
+
+def test_empty_job_is_complete():
+    job = DeliveryEngine().run([], lambda recipient: True, {})
+    assert (job['total'], job['sent'], job['failed']) == (0, 0, 0)
+
+
+def test_transient_failures_are_retried_until_they_succeed():
+    attempts = {}
+
+    def send_one(recipient):
+        attempts[recipient['email']] = attempts.get(recipient['email'], 0) + 1
+        if attempts[recipient['email']] < 3:
+            raise smtplib.SMTPResponseException(451, b'Greylisted')
+        return True
+
+    job = DeliveryEngine(retry_policy=NO_WAIT).run(recipients('a@example.com'), send_one, {})
+    assert attempts == {'a@example.com': 3}
+    assert (job['sent'], job['failed'], job['retried'], job['retry_pending']) == (1, 0, 2, 0)
+
+
+def test_retries_stop_at_max_attempts():
+    def send_one(recipient):
+        raise smtplib.SMTPResponseException(421, b'Try later')
+
+    job = DeliveryEngine(retry_policy=NO_WAIT).run(recipients('a@example.com'), send_one, {})
+    assert (job['sent'], job['failed'], job['retried']) == (0, 1, 2)
+    assert job['failures'][0]['attempts'] == 3
+    assert job['failures'][0]['code'] == 421
+
+
+def test_permanent_failures_are_recorded_without_retry():
+    def send_one(recipient):
+        raise smtplib.SMTPDataError(550, b'No such user')
+
+    job = DeliveryEngine(retry_policy=NO_WAIT).run(recipients('a@example.com'), send_one, {})
+    assert job['retried'] == 0
+    assert job['failures'] == [{
+        'email': 'a@example.com',
+        'category': 'permanent',
+        'code': 550,
+        'attempts': 1,
+        'error': str(smtplib.SMTPDataError(550, b'No such user'))
+    }]
+
+
+def test_without_policy_transient_failures_are_not_retried():
+    def send_one(recipient):
+        raise smtplib.SMTPServerDisconnected('gone')
+
+    job = DeliveryEngine().run(recipients('a@example.com'), send_one, {})
+    assert (job['failed'], job['retried']) == (1, 0)
+    assert job['failures'][0]['category'] == 'transient'
+
+
+def test_concurrency_is_at_least_one():
+    assert DeliveryEngine(concurrency=0).concurrency == 1
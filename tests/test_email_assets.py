@@ -0,0 +1,41 @@
+import base64
+import os
+
+import pytest
+
+import email_assets
+from file_cache import file_cache
+
+
+@pytest.fixture
+def assets(tmp_path, monkeypatch):
+    monkeypatch.setattr(email_assets, 'ASSETS_DIR', str(tmp_path))
+    monkeypatch.setattr(email_assets, '_data_urls', {})
+    monkeypatch.setattr(file_cache, 'check_interval', 0)
+    (tmp_path / 'logo.png').write_bytes(b'first image')
+    return tmp_path
+
+
+def test_data_url_embeds_the_file(assets):
+    url = email_assets.data_url('logo.png')
+    assert url == 'data:image/png;base64,' + base64.b64encode(b'first image').decode('ascii')
+
+
+def test_data_url_is_reused_while_the_content_is_unchanged(assets):
+    url = email_assets.data_url('logo.png')
+    (assets / 'logo.png').write_bytes(b'first image')
+    os.utime(assets / 'logo.png', ns=(0, 0))
+    assert email_assets.data_url('logo.png') is url
+
+
+def test_data_url_follows_content_changes(assets):
+    first = email_assets.data_url('logo.png')
+    (assets / 'logo.png').write_bytes(b'second image')
+    os.utime(assets / 'logo.png', ns=(0, 0))
+    assert email_assets.data_url('logo.png') != first
+    assert email_assets.data_url('logo.png').endswith(base64.b64encode(b'second image').decode('ascii'))
+
+
+def test_use_data_urls_rewrites_cid_references(assets):
+    html = email_assets.use_data_urls('<img src="cid:logo">')
+    assert html == f'<img src="{email_assets.data_url("logo.png")}">'
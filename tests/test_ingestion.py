@@ -0,0 +1,106 @@
+import hashlib
+import os
+
+import numpy as np
+import pytest
+
+from ingestion import chunk_id, chunk_text, reset_manifest, sync_chunks
+from vector_index import LocalVectorIndex
+
+
+class HashEncoder:
+    """Deterministic embeddings in place of a SentenceTransformer, recording what it encodes"""
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, chunks, batch_size=None, convert_to_numpy=True):
+        self.encoded.extend(chunks)
+        return np.array([
+            np.frombuffer(hashlib.sha256(chunk.encode('utf-8')).digest()[:8], dtype=np.uint8).astype(np.float32)
+            for chunk in chunks
+        ])
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalVectorIndex(str(tmp_path / 'index.npz'), dimension=8)
+
+
+@pytest.fixture
+def manifest_path(tmp_path):
+    return str(tmp_path / 'manifest.json')
+
+
+def sync(index, model, chunks, manifest_path):
+    return sync_chunks(index, model, chunks, 'local:test', manifest_path=manifest_path)
+
+
+def test_chunk_text_splits_on_blank_lines():
+    content = "Section A\nline two\n\n\n  \nSection B\n\nSection C  \n"
+    assert chunk_text(content) == ["Section A\nline two", "Section B", "Section C"]
+    assert chunk_text("\n\n") == []
+
+
+def test_chunk_id_depends_only_on_text():
+    assert chunk_id('abc') == chunk_id('abc')
+    assert chunk_id('abc') != chunk_id('abd')
+    assert chunk_id('abc', prefix='sn10_').startswith('sn10_')
+
+
+def test_first_sync_indexes_every_chunk(index, manifest_path):
+    model = HashEncoder()
+    stats = sync(index, model, ['a', 'b', 'a'], manifest_path)
+    assert stats == {'added': 2, 'deleted': 0, 'unchanged': 0, 'changed': True}
+    assert sorted(next(index.list())) == sorted([chunk_id('a'), chunk_id('b')])
+    assert sorted(model.encoded) == ['a', 'b']
+
+
+def test_resync_embeds_only_changed_chunks(index, manifest_path):
+    sync(index, HashEncoder(), ['a', 'b'], manifest_path)
+
+    model = HashEncoder()
+    assert sync(index, model, ['a', 'b'], manifest_path)['changed'] is False
+    assert model.encoded == []
+
+    stats = sync(index, model, ['a', 'c'], manifest_path)
+    assert stats == {'added': 1, 'deleted': 1, 'unchanged': 1, 'changed': True}
+    assert model.encoded == ['c']
+    assert sorted(next(index.list())) == sorted([chunk_id('a'), chunk_id('c')])
+
+
+def test_sync_leaves_other_prefixes_alone(index, manifest_path):
+    index.upsert([{'id': 'sn10_manual', 'values': [1] * 8, 'metadata': {}}])
+    sync(index, HashEncoder(), ['a'], manifest_path)
+    sync(index, HashEncoder(), [], manifest_path)
+    assert next(index.list()) == ['sn10_manual']
+
+
+def test_missing_index_is_rebuilt_despite_manifest(index, manifest_path):
+    sync(index, HashEncoder(), ['a', 'b'], manifest_path)
+    os.remove(index.path)
+
+    model = HashEncoder()
+    stats = sync(index, model, ['a', 'b'], manifest_path)
+    assert stats['added'] == 2
+    assert stats['changed'] is True
+    assert index.exists()
+    assert sorted(model.encoded) == ['a', 'b']
+
+
+def test_vectors_removed_behind_the_manifest_are_restored(index, manifest_path):
+    sync(index, HashEncoder(), ['a', 'b'], manifest_path)
+    index.delete(ids=[chunk_id('b')])
+
+    model = HashEncoder()
+    assert sync(index, model, ['a', 'b'], manifest_path)['added'] == 1
+    assert model.encoded == ['b']
+
+
+def test_reset_manifest_falls_back_to_listing(index, manifest_path):
+    sync(index, HashEncoder(), ['a'], manifest_path)
+    reset_manifest('local:test', path=manifest_path)
+
+    model = HashEncoder()
+    assert sync(index, model, ['a'], manifest_path)['changed'] is False
+    assert model.encoded == []
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+
+from llm_scheduler import RateBudget, parse_duration
+
+
+def headers(**values):
+    return {f"x-ratelimit-{name.replace('_', '-')}": str(value) for name, value in values.items()}
+
+
+@pytest.mark.parametrize('value, seconds', [
+    ('7.66s', 7.66), ('2m59.56s', 179.56), ('120ms', 0.12), ('1h2m', 3720), ('3', 3.0),
+    (None, None), ('soon', None),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == (pytest.approx(seconds) if seconds is not None else None)
+
+
+def test_unknown_budget_does_not_block():
+    budget = RateBudget()
+    started = time.time()
+    budget.acquire(10 ** 6)
+    assert time.time() - started < 0.1
+
+
+def test_update_reads_the_headers():
+    budget = RateBudget()
+    budget.update(headers(limit_requests=1000, remaining_requests=999, limit_tokens=6000,
+                          remaining_tokens=5000, reset_requests='1m26s', reset_tokens='1s'))
+    status = budget.status()
+    assert (status['limit_requests'], status['remaining_requests']) == (1000, 999)
+    assert (status['limit_tokens'], status['remaining_tokens']) == (6000, 5000)
+
+
+def test_reservations_wait_for_the_token_window():
+    budget = RateBudget()
+    budget.update(headers(limit_tokens=100, remaining_tokens=50, reset_tokens='0.2s'))
+    started = time.time()
+    budget.acquire(80)
+    assert 0.15 < time.time() - started < 1
+    assert budget.status()['remaining_tokens'] == 20
+    assert budget.status()['waits'] == 1
+
+
+def test_reservation_larger_than_the_limit_is_capped():
+    budget = RateBudget()
+    budget.update(headers(limit_tokens=100, remaining_tokens=100, reset_tokens='0.2s'))
+    done = threading.Event()
+    threading.Thread(target=lambda: (budget.acquire(500), done.set()), daemon=True).start()
+    assert done.wait(2)
+    assert budget.status()['remaining_tokens'] == 0
+
+
+def test_exhausted_daily_requests_wait_for_reset_and_are_not_refilled_to_the_limit():
+    budget = RateBudget()
+    budget.update(headers(limit_requests=1000, remaining_requests=0, reset_requests='0.2s'))
+    started = time.time()
+    budget.acquire(1)
+    assert 0.15 < time.time() - started < 1
+    # Unknown until the next response reports the daily count, not a fresh 1000
+    assert budget.status()['remaining_requests'] is None
+
+
+def test_rate_limited_holds_every_call():
+    budget = RateBudget()
+    budget.on_rate_limited(0.2)
+    started = time.time()
+    budget.acquire(1)
+    assert 0.15 < time.time() - started < 1
+    assert budget.status()['rate_limited'] == 1
@@ -0,0 +1,67 @@
+import email
+import os
+from email import policy
+
+import pytest
+
+from message_compiler import compile_message
+
+PNG = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 4
+
+
+@pytest.fixture
+def images(tmp_path):
+    logo = tmp_path / 'logo.png'
+    logo.write_bytes(PNG)
+    return {'logo': str(logo)}
+
+
+def parse(wire_bytes):
+    return email.message_from_bytes(wire_bytes, policy=policy.default)
+
+
+def test_render_round_trips_through_the_email_parser(images):
+    html = '<p>Hello Ana, temperature ±2 °C</p>\n' + '<p>' + 'x' * 2000 + '</p>'
+    wire = compile_message(images).render('Sender <a@example.com>', 'ana@example.com', 'Smart bins – demo', html)
+    message = parse(wire)
+
+    assert message['From'] == 'Sender <a@example.com>'
+    assert message['To'] == 'ana@example.com'
+    assert message['Subject'] == 'Smart bins – demo'
+    assert message.get_content_type() == 'multipart/alternative'
+
+    related, = message.iter_parts()
+    assert related.get_content_type() == 'multipart/related'
+    html_part, image_part = related.iter_parts()
+    assert html_part.get_content_type() == 'text/html'
+    # Line breaks come back as the CRLFs they were sent with
+    assert html_part.get_content().replace('\r\n', '\n') == html
+    assert image_part['Content-ID'] == '<logo>'
+    assert image_part.get_content() == PNG
+
+
+def test_every_recipient_gets_their_own_headers_and_body(images):
+    compiled = compile_message(images)
+    first = parse(compiled.render('a@example.com', 'one@example.com', 'Hi one', '<p>one</p>'))
+    second = parse(compiled.render('a@example.com', 'two@example.com', 'Hi two', '<p>two</p>'))
+    assert (first['To'], second['To']) == ('one@example.com', 'two@example.com')
+    assert first.get_body(('html',)).get_content() == '<p>one</p>'
+    assert second.get_body(('html',)).get_content() == '<p>two</p>'
+
+
+def test_8bit_body_is_spliced_unencoded(images):
+    wire, cte, _ = compile_message(images).render_with_encoding(
+        'a@example.com', 'b@example.com', 'Subject', '<p>µ</p>', allow_8bit=True)
+    assert cte == '8bit'
+    assert '<p>µ</p>'.encode('utf-8') in wire
+    assert parse(wire).get_body(('html',)).get_content() == '<p>µ</p>'
+
+
+def test_skeleton_is_reused_until_an_image_changes(images):
+    compiled = compile_message(images)
+    assert compile_message(images) is compiled
+
+    with open(images['logo'], 'ab') as f:
+        f.write(b'changed')
+    os.utime(images['logo'], ns=(0, 0))
+    assert compile_message(images) is not compiled
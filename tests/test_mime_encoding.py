@@ -0,0 +1,42 @@
+import base64
+import quopri
+
+from mime_encoding import MAX_LINE_LENGTH, build_html_part, choose_transfer_encoding, encode_html
+
+
+def test_ascii_body_is_sent_as_7bit():
+    assert choose_transfer_encoding(b'<p>Hello</p>\n') == ('7bit', b'<p>Hello</p>\n')
+
+
+def test_utf8_body_uses_8bit_only_when_relay_allows_it():
+    data = '<p>Temperature ±2 °C</p>\n'.encode('utf-8')
+    assert choose_transfer_encoding(data, allow_8bit=True) == ('8bit', data)
+    cte, encoded = choose_transfer_encoding(data)
+    assert cte == 'quoted-printable'
+    assert quopri.decodestring(encoded) == data
+
+
+def test_long_lines_are_not_sent_unencoded():
+    data = b'a' * (MAX_LINE_LENGTH + 1)
+    cte, encoded = choose_transfer_encoding(data, allow_8bit=True)
+    assert cte == 'quoted-printable'
+    assert all(len(line) <= 76 for line in encoded.split(b'\n'))
+
+
+def test_mostly_non_ascii_body_falls_back_to_base64():
+    data = ('日本語のテキスト' * 50).encode('utf-8')
+    cte, encoded = choose_transfer_encoding(data)
+    assert cte == 'base64'
+    assert base64.b64decode(encoded) == data
+
+
+def test_encode_html_normalizes_line_endings():
+    assert encode_html('<p>a</p>\r\n<p>b</p>') == ('7bit', b'<p>a</p>\n<p>b</p>')
+
+
+def test_build_html_part_sets_charset_and_encoding():
+    part, cte, length = build_html_part('<p>µ</p>', allow_8bit=True)
+    assert cte == '8bit'
+    assert length == len('<p>µ</p>'.encode('utf-8'))
+    assert part['Content-Transfer-Encoding'] == '8bit'
+    assert part.get_content_charset() == 'utf-8'
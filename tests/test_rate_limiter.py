@@ -0,0 +1,100 @@
+import smtplib
+
+import pytest
+
+from rate_limiter import AdaptiveRateLimiter
+from smtp_pool import PooledSession, SMTPConnectionPool
+
+
+def limiter(**settings):
+    return AdaptiveRateLimiter(**{'rate': 2.0, 'burst': 5, 'min_rate': 0.5, 'max_rate': 2.5,
+                                  'increase': 0.1, 'increase_every': 3, **settings})
+
+
+@pytest.mark.parametrize('code', [421, 450, 451, 452])
+def test_throttling_reply_halves_the_rate(code):
+    rate_limiter = limiter()
+    rate_limiter.on_reply(code)
+    assert rate_limiter.rate == 1.0
+    assert rate_limiter.stats['throttled'] == 1
+
+
+def test_rate_never_drops_below_min_rate():
+    rate_limiter = limiter()
+    for _ in range(5):
+        rate_limiter.on_reply(421)
+    assert rate_limiter.rate == 0.5
+
+
+def test_rate_grows_additively_after_a_run_of_successes():
+    rate_limiter = limiter()
+    rate_limiter.on_reply(421)
+    for _ in range(2):
+        rate_limiter.on_reply(250)
+    assert rate_limiter.rate == 1.0
+    rate_limiter.on_reply(250)
+    assert rate_limiter.rate == pytest.approx(1.1)
+
+
+def test_rate_never_grows_above_max_rate():
+    rate_limiter = limiter()
+    for _ in range(30):
+        rate_limiter.on_reply(250)
+    assert rate_limiter.rate == pytest.approx(2.5)
+
+
+def test_throttle_restarts_the_success_run():
+    rate_limiter = limiter()
+    rate_limiter.on_reply(250)
+    rate_limiter.on_reply(250)
+    rate_limiter.on_reply(451)
+    rate_limiter.on_reply(250)
+    assert rate_limiter.rate == 1.0
+
+
+@pytest.mark.parametrize('code', [550, 554, 503, None])
+def test_other_replies_leave_the_rate_alone(code):
+    rate_limiter = limiter(increase_every=1)
+    rate_limiter.on_reply(code)
+    assert rate_limiter.rate == 2.0
+    assert rate_limiter.stats == {'throttled': 0, 'succeeded': 0}
+
+
+class FakeSMTP:
+    """Relay that refuses recipients with the given (code, message) replies"""
+
+    def __init__(self, refused):
+        self.refused = refused
+
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=()):
+        refused = {address: self.refused[address] for address in to_addrs if address in self.refused}
+        if len(refused) == len(to_addrs):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        return refused
+
+    def rset(self):
+        return 250, b'OK'
+
+    def quit(self):
+        pass
+
+
+def pool_with_relay(monkeypatch, refused):
+    codes = []
+    pool = SMTPConnectionPool('smtp.example.com', 587, 'a@example.com', 'secret', reply_listener=codes.append)
+    monkeypatch.setattr(pool, '_connect', lambda: PooledSession(FakeSMTP(refused)))
+    return pool, codes
+
+
+def test_pool_reports_rcpt_time_refusals(monkeypatch):
+    pool, codes = pool_with_relay(monkeypatch, {'b@example.com': (450, b'Greylisted')})
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        pool.sendmail('a@example.com', ['b@example.com'], 'Subject: x\n\nbody')
+    assert codes == [450]
+
+
+def test_pool_reports_partial_refusals(monkeypatch):
+    pool, codes = pool_with_relay(monkeypatch, {'b@example.com': (452, b'Too many recipients')})
+    refused = pool.sendmail('a@example.com', ['b@example.com', 'c@example.com'], 'Subject: x\n\nbody')
+    assert refused == {'b@example.com': (452, b'Too many recipients')}
+    assert codes == [452]
@@ -0,0 +1,52 @@
+import pytest
+
+from retrieval_cache import RetrievalCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RetrievalCache(str(tmp_path / 'retrieval.sqlite3'))
+
+
+def test_miss_then_hit_under_the_same_version(cache):
+    version, texts = cache.lookup('waste', 2)
+    assert texts is None
+    cache.store('waste', 2, version, ['a', 'b'])
+    assert cache.lookup('waste', 2) == (version, ['a', 'b'])
+    assert cache.lookup('waste', 3)[1] is None
+    assert cache.stats['hits'] == 1
+
+
+def test_bump_version_invalidates_and_deletes_old_results(cache):
+    version, _ = cache.lookup('waste', 2)
+    cache.store('waste', 2, version, ['old'])
+
+    assert cache.bump_version()
+    new_version, texts = cache.lookup('waste', 2)
+    assert new_version == version + 1
+    assert texts is None
+    assert cache.status()['results'] == 0
+    assert cache.stats['invalidations'] == 1
+
+
+def test_result_computed_before_a_bump_stays_unreachable(cache):
+    version, _ = cache.lookup('waste', 2)
+    cache.bump_version()
+    # A slow query that started before the reindex stores under its old version
+    cache.store('waste', 2, version, ['stale'])
+    assert cache.lookup('waste', 2)[1] is None
+
+
+def test_versions_are_shared_between_processes(cache):
+    other = RetrievalCache(cache.path)
+    version, _ = cache.lookup('waste', 1)
+    cache.store('waste', 1, version, ['a'])
+    assert other.lookup('waste', 1) == (version, ['a'])
+
+    other.bump_version()
+    assert cache.lookup('waste', 1) == (version + 1, None)
+
+
+def test_store_without_a_version_is_ignored(cache):
+    cache.store('waste', 1, None, ['a'])
+    assert cache.status()['results'] == 0
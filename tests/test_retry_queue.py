@@ -0,0 +1,49 @@
+import smtplib
+
+import pytest
+
+from retry_queue import PERMANENT, TRANSIENT, RetryPolicy, classify_smtp_error
+
+
+@pytest.mark.parametrize('error, expected', [
+    (smtplib.SMTPResponseException(451, b'Try again later'), (TRANSIENT, 451)),
+    (smtplib.SMTPDataError(550, b'Rejected'), (PERMANENT, 550)),
+    (smtplib.SMTPSenderRefused(421, b'Busy', 'a@example.com'), (TRANSIENT, 421)),
+    (smtplib.SMTPServerDisconnected('gone'), (TRANSIENT, None)),
+    (ConnectionResetError(), (TRANSIENT, None)),
+    (TimeoutError(), (TRANSIENT, None)),
+    (smtplib.SMTPNotSupportedError(), (PERMANENT, None)),
+    (ValueError('bad address'), (PERMANENT, None)),
+])
+def test_classify_smtp_error(error, expected):
+    assert classify_smtp_error(error) == expected
+
+
+def test_classify_recipients_refused_uses_lowest_code():
+    greylisted = smtplib.SMTPRecipientsRefused({
+        'a@example.com': (550, b'No such user'),
+        'b@example.com': (450, b'Greylisted'),
+    })
+    assert classify_smtp_error(greylisted) == (TRANSIENT, 450)
+
+    rejected = smtplib.SMTPRecipientsRefused({'a@example.com': (550, b'No such user')})
+    assert classify_smtp_error(rejected) == (PERMANENT, 550)
+
+
+def test_retry_policy_retries_transient_failures_up_to_max_attempts():
+    policy = RetryPolicy(max_attempts=3)
+    assert policy.should_retry(TRANSIENT, 1)
+    assert policy.should_retry(TRANSIENT, 2)
+    assert not policy.should_retry(TRANSIENT, 3)
+    assert not policy.should_retry(PERMANENT, 1)
+
+
+def test_retry_policy_delay_backs_off_exponentially_up_to_max_delay():
+    policy = RetryPolicy(base_delay=10, max_delay=60, jitter=0)
+    assert [policy.delay(attempts) for attempts in range(1, 6)] == [10, 20, 40, 60, 60]
+
+
+def test_retry_policy_jitter_stays_within_spread():
+    policy = RetryPolicy(base_delay=10, max_delay=60, jitter=0.5)
+    for _ in range(100):
+        assert 5 <= policy.delay(1) <= 10
@@ -0,0 +1,77 @@
+import os
+
+from file_cache import FileCache
+from segment_cache import INTRO_SLOT, NAME_SLOT, SegmentBody, SegmentCache
+
+
+class Builder:
+    """Counts renders of a segment"""
+
+    def __init__(self, html, subject='Subject'):
+        self.html = html
+        self.subject = subject
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.subject, self.html
+
+
+def test_name_slot_is_filled_everywhere():
+    body = SegmentBody('Hi', f'<p>Dear {NAME_SLOT},</p><p>Thanks {NAME_SLOT}</p>')
+    assert body.render('Ana') == '<p>Dear Ana,</p><p>Thanks Ana</p>'
+    assert body.render('Bo') == '<p>Dear Bo,</p><p>Thanks Bo</p>'
+
+
+def test_intro_slot_leaves_name_placeholder_alone():
+    body = SegmentBody('Hi', f'<p>Dear [recipient_name],</p><p>{INTRO_SLOT}</p>', slot=INTRO_SLOT)
+    assert body.render('An introduction') == '<p>Dear [recipient_name],</p><p>An introduction</p>'
+
+
+def test_segment_is_built_once_per_key_and_version():
+    cache = SegmentCache()
+    build = Builder(f'<p>{NAME_SLOT}</p>')
+    first = cache.get(('followup', 'UAE'), (1,), build)
+    assert cache.get(('followup', 'UAE'), (1,), build) is first
+    assert build.calls == 1
+    assert cache.footprint()['hits'] == 1
+
+
+def test_new_file_version_rebuilds_the_segment():
+    cache = SegmentCache()
+    cache.get(('product',), (1,), Builder('<p>old</p>'))
+    rebuilt = cache.get(('product',), (2,), Builder('<p>new</p>'))
+    assert rebuilt.render('') == '<p>new</p>'
+
+
+def test_least_recently_used_segment_is_evicted():
+    cache = SegmentCache(maxsize=2)
+    build = Builder('body')
+    cache.get('a', (), build)
+    cache.get('b', (), build)
+    cache.get('a', (), build)
+    cache.get('c', (), build)
+    cache.get('a', (), build)
+    assert build.calls == 3
+    cache.get('b', (), build)
+    assert build.calls == 4
+    assert cache.footprint()['evictions'] == 2
+
+
+def test_file_versions_change_when_a_template_is_edited(tmp_path):
+    files = FileCache(check_interval=0, watch=False)
+    template = tmp_path / 'template.html'
+    template.write_text('<p>one</p>')
+    version = files.version(str(template))
+    assert files.version(str(template)) == version
+
+    template.write_text('<p>two, longer</p>')
+    os.utime(template, ns=(0, 0))
+    assert files.version(str(template)) != version
+
+
+def test_digest_identifies_the_rendered_content():
+    body = f'<p>Dear {NAME_SLOT}</p>'
+    assert SegmentBody('Hi', body).digest == SegmentBody('Hi', body).digest
+    assert SegmentBody('Hi', body).digest != SegmentBody('Hello', body).digest
+    assert SegmentBody('Hi', body).digest != SegmentBody('Hi', '<p>Dear</p>').digest
@@ -0,0 +1,102 @@
+import itertools
+import json
+import smtplib
+from collections import Counter
+
+import pytest
+
+from rate_limiter import get_rate_limiter
+from sender_pool import NoSenderAvailable, SenderAccount, SenderPool, load_sender_pool
+
+_addresses = itertools.count()
+
+
+def account(**settings):
+    # Rate limiters are shared per address, so each test account gets its own
+    return SenderAccount(f"sender{next(_addresses)}@example.com", 'secret', 'smtp.example.com', 587, **settings)
+
+
+def test_weighted_round_robin_is_smooth():
+    heavy, light = account(weight=2), account(weight=1)
+    pool = SenderPool([heavy, light])
+    picks = [pool.choose() for _ in range(6)]
+    assert Counter(picks) == {heavy: 4, light: 2}
+    # Smooth: the light account is not starved until the end of the cycle
+    assert light in picks[:3]
+
+
+def test_daily_quota_drains_account():
+    limited, other = account(daily_quota=1), account()
+    pool = SenderPool([limited, other])
+    limited.record_success()
+    assert not limited.is_available()
+    assert {pool.choose() for _ in range(3)} == {other}
+
+
+def test_quota_reply_drains_account():
+    sender = account()
+    sender.record_failure(smtplib.SMTPDataError(554, b'Daily sending limit exceeded'))
+    assert not sender.is_available()
+
+
+def test_repeated_transient_failures_pause_account():
+    sender = account(max_failures=2, cooldown=60)
+    sender.record_failure(smtplib.SMTPServerDisconnected('gone'))
+    assert sender.is_available()
+    sender.record_failure(smtplib.SMTPServerDisconnected('gone'))
+    assert not sender.is_available()
+    assert sender.status()['paused_for'] > 0
+
+
+def test_recipient_rejections_do_not_count_against_account():
+    sender = account(max_failures=1)
+    sender.record_failure(smtplib.SMTPDataError(550, b'No such user'))
+    assert sender.is_available()
+
+
+def test_success_resets_failure_count():
+    sender = account(max_failures=2)
+    sender.record_failure(smtplib.SMTPServerDisconnected('gone'))
+    sender.record_success()
+    sender.record_failure(smtplib.SMTPServerDisconnected('gone'))
+    assert sender.is_available()
+
+
+def test_no_available_account_raises():
+    sender = account(daily_quota=1)
+    sender.record_success()
+    with pytest.raises(NoSenderAvailable):
+        SenderPool([sender]).choose()
+
+
+def test_pool_needs_an_account():
+    with pytest.raises(ValueError):
+        SenderPool([])
+
+
+def test_config_entry_for_default_account_applies_all_settings(monkeypatch):
+    default = account(pool_size=4)
+    monkeypatch.setenv('SENDER_POOL_CONFIG', json.dumps([{
+        'email': default.email, 'smtp_server': 'relay.example.com', 'port': 2525,
+        'pool_size': 2, 'weight': 3, 'daily_quota': 100, 'rate': 0.5, 'burst': 2
+    }]))
+    pool = load_sender_pool(default)
+
+    assert pool.accounts == [default]
+    assert (default.weight, default.daily_quota) == (3, 100)
+    assert (default.smtp_server, default.port) == ('relay.example.com', 2525)
+    assert (default.pool.host, default.pool.port, default.pool.max_size) == ('relay.example.com', 2525, 2)
+    assert default.limiter is get_rate_limiter(default.email)
+    assert (default.limiter.rate, default.limiter.bucket.burst) == (0.5, 2)
+    assert default.pool.reply_listener == default.limiter.on_reply
+
+
+def test_config_entry_for_default_account_keeps_unchanged_pool(monkeypatch):
+    default = account()
+    session_pool = default.pool
+    monkeypatch.setenv('SENDER_POOL_CONFIG', json.dumps([{'email': default.email, 'rate': 0.25}]))
+    load_sender_pool(default)
+
+    assert default.pool is session_pool
+    assert default.limiter.rate == 0.25
+    assert session_pool.reply_listener == default.limiter.on_reply
@@ -0,0 +1,30 @@
+import pytest
+
+from template_engine import CompiledTemplate, TemplateError
+
+
+def test_render_fills_every_slot():
+    template = CompiledTemplate('<p>Hi {{ name }}, see {{link}}. Bye {{name}}</p>')
+    assert template.placeholders == {'name', 'link'}
+    assert template.render({'name': 'Ana', 'link': 'x'}) == '<p>Hi Ana, see x. Bye Ana</p>'
+
+
+def test_render_does_not_expand_placeholders_in_values():
+    template = CompiledTemplate('{{a}}-{{b}}')
+    assert template.render({'a': '{{b}}', 'b': '1'}) == '{{b}}-1'
+
+
+def test_template_without_placeholders_renders_unchanged():
+    assert CompiledTemplate('plain text').render({}) == 'plain text'
+
+
+def test_missing_value_raises():
+    template = CompiledTemplate('{{a}} {{b}}', name='t.html')
+    with pytest.raises(TemplateError, match='t.html is missing values for: b'):
+        template.render({'a': '1'})
+
+
+def test_unknown_value_raises():
+    template = CompiledTemplate('{{a}}')
+    with pytest.raises(TemplateError, match='no placeholders for: extra'):
+        template.render({'a': '1', 'extra': '2'})
@@ -0,0 +1,114 @@
+import threading
+import time
+
+import pytest
+
+from variant_pool import ROTATE_AT, VariantPool
+
+KEY = ('municipality', 'UAE', 'English')
+
+
+class Generator:
+    """Numbered variants, optionally held until `release` is set"""
+
+    def __init__(self, hold=False):
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+        self._lock = threading.Lock()
+
+    def __call__(self, key):
+        with self._lock:
+            self.calls += 1
+            number = self.calls
+        self.started.set()
+        self.release.wait(5)
+        return f'Subject {number}', f'Body {number} for {key}'
+
+
+def wait_for_refills(pool):
+    deadline = time.time() + 5
+    while pool.status()['refilling'] and time.time() < deadline:
+        time.sleep(0.01)
+
+
+def test_cold_segment_is_generated_then_refilled_in_the_background():
+    generate = Generator()
+    pool = VariantPool(generate, size=3, low_watermark=2, ttl=60)
+    subject, body = pool.sample(KEY)
+    assert (subject, body) == ('Subject 1', f'Body 1 for {KEY}')
+
+    wait_for_refills(pool)
+    assert pool.status()['segments'] == {'municipality/UAE/English': 3}
+    assert generate.calls == 3
+    assert pool.sample(KEY) in {(f'Subject {n}', f'Body {n} for {KEY}') for n in (1, 2, 3)}
+    assert pool.status()['samples'] == 1
+
+
+def test_refill_tops_up_to_size():
+    generate = Generator()
+    pool = VariantPool(generate, size=4, ttl=60)
+    pool.refill(KEY)
+    assert generate.calls == 4
+    pool.refill(KEY)
+    assert generate.calls == 4
+
+
+def test_expired_variants_are_dropped():
+    generate = Generator()
+    pool = VariantPool(generate, size=2, ttl=60)
+    pool.refill(KEY)
+    for variant in pool._variants[KEY]:
+        variant.created_at -= 61
+    assert pool.status()['segments'] == {'municipality/UAE/English': 0}
+    assert pool.status()['expired'] == 2
+
+
+def test_variants_due_for_rotation_are_replaced():
+    generate = Generator()
+    pool = VariantPool(generate, size=2, ttl=60)
+    pool.refill(KEY)
+    pool._variants[KEY][0].created_at -= 60 * ROTATE_AT + 1
+    pool.refill(KEY)
+    assert generate.calls == 3
+    subjects = sorted(variant.subject for variant in pool._variants[KEY])
+    assert subjects == ['Subject 2', 'Subject 3']
+
+
+def test_aliases_share_one_pool():
+    generate = Generator()
+    pool = VariantPool(generate, size=1, ttl=60, normalize=lambda key: key.lower())
+    pool.refill('KSA')
+    assert pool.sample('ksa') == ('Subject 1', 'Body 1 for ksa')
+    assert generate.calls == 1
+
+
+def test_concurrent_callers_share_one_cold_generation():
+    generate = Generator(hold=True)
+    pool = VariantPool(generate, size=1, ttl=60)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(pool.sample(KEY))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    assert generate.started.wait(5)
+    time.sleep(0.1)
+    assert generate.calls == 1
+
+    generate.release.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == [('Subject 1', f'Body 1 for {KEY}')] * 5
+    assert pool.status()['cold_misses'] == 1
+    assert pool.status()['cold_waits'] == 4
+
+
+def test_cold_generation_error_reaches_every_waiter():
+    def generate(key):
+        raise RuntimeError('model unavailable')
+
+    pool = VariantPool(generate, size=1, ttl=60)
+    with pytest.raises(RuntimeError):
+        pool.sample(KEY)
+    assert pool._cold == {}
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+import pytest
+
+from vector_index import LocalVectorIndex
+
+
+@pytest.fixture
+def index(tmp_path):
+    return LocalVectorIndex(str(tmp_path / 'index.npz'), dimension=3)
+
+
+def vector(vector_id, values, **metadata):
+    return {'id': vector_id, 'values': values, 'metadata': metadata}
+
+
+def test_missing_index_is_empty(index):
+    assert not index.exists()
+    assert index.query([1, 0, 0], top_k=3) == {'matches': []}
+    assert index.describe_index_stats()['total_vector_count'] == 0
+
+
+def test_query_ranks_by_cosine_similarity(index):
+    index.upsert([
+        vector('x', [2, 0, 0], text='x'),
+        vector('y', [0, 3, 0], text='y'),
+        vector('xy', [1, 1, 0], text='xy'),
+    ])
+    assert index.exists()
+    matches = index.query([1, 0.1, 0], top_k=2, include_metadata=True)['matches']
+    assert [match['id'] for match in matches] == ['x', 'xy']
+    assert matches[0]['score'] == pytest.approx(1 / np.linalg.norm([1, 0.1]))
+    assert matches[0]['metadata'] == {'text': 'x'}
+    assert 'metadata' not in index.query([1, 0, 0], top_k=1)['matches'][0]
+
+
+def test_top_k_larger_than_index_returns_everything(index):
+    index.upsert([vector('a', [1, 0, 0]), vector('b', [0, 1, 0])])
+    assert [match['id'] for match in index.query([0, 1, 0], top_k=10)['matches']] == ['b', 'a']
+
+
+def test_upsert_replaces_existing_ids(index):
+    index.upsert([vector('a', [1, 0, 0], text='old')])
+    index.upsert([vector('a', [0, 0, 1], text='new'), vector('b', [0, 1, 0])])
+    assert index.describe_index_stats()['total_vector_count'] == 2
+    best = index.query([0, 0, 1], top_k=1, include_metadata=True)['matches'][0]
+    assert best['id'] == 'a'
+    assert best['metadata'] == {'text': 'new'}
+
+
+def test_delete(index):
+    index.upsert([vector('a', [1, 0, 0]), vector('b', [0, 1, 0]), vector('c', [0, 0, 1])])
+    index.delete(ids=['a', 'missing'])
+    assert [match['id'] for match in index.query([1, 0.5, 0], top_k=3)['matches']] == ['b', 'c']
+    index.delete(delete_all=True)
+    assert index.exists()
+    assert index.describe_index_stats()['total_vector_count'] == 0
+
+
+def test_index_is_shared_through_the_file(index):
+    index.upsert([vector('a', [1, 0, 0])])
+    other = LocalVectorIndex(index.path, dimension=3)
+    assert [match['id'] for match in other.query([1, 0, 0])['matches']] == ['a']
+
+
+def test_list_by_prefix(index):
+    assert list(index.list()) == [[]]
+    index.upsert([vector('chunk_1', [1, 0, 0]), vector('chunk_2', [0, 1, 0]), vector('sn10_1', [0, 0, 1])])
+    assert sorted(next(index.list(prefix='chunk_'))) == ['chunk_1', 'chunk_2']
+    index.delete(ids=['chunk_1'])
+    assert sorted(next(index.list())) == ['chunk_2', 'sn10_1']
+
+
+def test_refresh_picks_up_a_file_replaced_by_another_process(index, tmp_path):
+    index.upsert([vector('a', [1, 0, 0])])
+    assert [match['id'] for match in index.query([1, 0, 0])['matches']] == ['a']
+
+    # Another process's write: the file is swapped without touching this process's file_cache
+    writer = LocalVectorIndex(str(tmp_path / 'other.npz'), dimension=3)
+    writer.upsert([vector('b', [1, 0, 0])])
+    os.replace(writer.path, index.path)
+
+    index.refresh()
+    assert [match['id'] for match in index.query([1, 0, 0])['matches']] == ['b']
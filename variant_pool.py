@@ -0,0 +1,193 @@
+"""
+Pre-generated LLM email variants per segment.
+
+Generating a regular email takes one blocking Groq completion, which is
+by far the slowest step of a bulk job. The pool keeps up to `size`
+generated (subject, body) variants per (recipient_type, country,
+language). Bulk sends sample one at random, so recipients still get
+varied copy, while a background worker generates replacements:
+
+- when a segment drops below `low_watermark` fresh variants
+- when variants approach their `ttl`, so copy rotates over time without
+  the segment ever running dry
+
+Only a cold segment (no fresh variant at all) makes the caller wait for
+a generation, and only one caller generates it; concurrent callers for
+the same cold segment wait for that result. Keys are passed through
+`normalize` first, so aliases of a segment share one pool.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+VARIANT_POOL_SIZE = int(os.getenv('VARIANT_POOL_SIZE', '8'))
+VARIANT_POOL_LOW_WATERMARK = int(os.getenv('VARIANT_POOL_LOW_WATERMARK', '3'))
+VARIANT_POOL_TTL = float(os.getenv('VARIANT_POOL_TTL', '3600'))
+
+# Fraction of the TTL after which a variant is replaced in the background
+ROTATE_AT = 0.75
+
+
+class Variant:
+    """One generated subject and body"""
+
+    __slots__ = ('subject', 'body', 'created_at', 'uses')
+
+    def __init__(self, subject, body):
+        self.subject = subject
+        self.body = body
+        self.created_at = time.time()
+        self.uses = 0
+
+
+class VariantPool:
+    """
+    Pools of generated variants keyed by segment.
+
+    Args:
+        generate (callable): Called with a segment key, returns (subject, body); raises on failure
+        size (int): Variants kept per segment
+        low_watermark (int): Refill a segment when it has fewer fresh variants than this
+        ttl (float): Seconds before a variant is retired
+        normalize (callable): Maps a segment key to its canonical form (identity if omitted)
+    """
+
+    def __init__(self, generate, size=VARIANT_POOL_SIZE, low_watermark=VARIANT_POOL_LOW_WATERMARK,
+                 ttl=VARIANT_POOL_TTL, normalize=None):
+        self.generate = generate
+        self.size = max(1, size)
+        self.low_watermark = min(max(0, low_watermark), self.size)
+        self.ttl = ttl
+        self.normalize = normalize or (lambda key: key)
+        self._variants = {}
+        self._pending = set()
+        self._cold = {}   # key -> Future of the generation cold callers are waiting for
+        self._lock = threading.Lock()
+        self._refills = queue.Queue()
+        self._worker = None
+        self.stats = {'samples': 0, 'cold_misses': 0, 'cold_waits': 0, 'generated': 0, 'expired': 0, 'errors': 0}
+
+    def _fresh(self, key):
+        """Fresh variants for a segment, dropping expired ones (caller holds the lock)"""
+        variants = self._variants.get(key, [])
+        cutoff = time.time() - self.ttl
+        fresh = [variant for variant in variants if variant.created_at >= cutoff]
+        if len(fresh) != len(variants):
+            self.stats['expired'] += len(variants) - len(fresh)
+            self._variants[key] = fresh
+        return fresh
+
+    def _young(self, variants):
+        """Number of variants not yet due for rotation"""
+        cutoff = time.time() - self.ttl * ROTATE_AT
+        return sum(1 for variant in variants if variant.created_at >= cutoff)
+
+    def _add(self, key, subject, body):
+        with self._lock:
+            variants = self._fresh(key)
+            variants.append(Variant(subject, body))
+            # Keep the newest variants; this retires the ones due for rotation
+            del variants[:-self.size]
+            self._variants[key] = variants
+            self.stats['generated'] += 1
+
+    def sample(self, key):
+        """
+        Get a random variant for a segment as (subject, body).
+
+        Blocks on a generation only if the segment has no fresh variant.
+        """
+        key = self.normalize(key)
+        cold = owner = None
+        with self._lock:
+            fresh = self._fresh(key)
+            variant = random.choice(fresh) if fresh else None
+            if variant is not None:
+                variant.uses += 1
+                self.stats['samples'] += 1
+            else:
+                cold = self._cold.get(key)
+                owner = cold is None
+                if owner:
+                    cold = self._cold[key] = Future()
+                    self.stats['cold_misses'] += 1
+                else:
+                    self.stats['cold_waits'] += 1
+            needs_refill = variant is None or self._young(fresh) < self.low_watermark
+
+        if owner:
+            try:
+                subject, body = self.generate(key)
+                self._add(key, subject, body)
+                cold.set_result((subject, body))
+            except Exception as e:
+                cold.set_exception(e)
+                raise
+            finally:
+                with self._lock:
+                    self._cold.pop(key, None)
+        elif cold is not None:
+            # Another caller is generating this segment; share its result
+            subject, body = cold.result()
+            return subject, body
+        else:
+            subject, body = variant.subject, variant.body
+        if needs_refill:
+            self.request_refill(key)
+        return subject, body
+
+    def request_refill(self, key):
+        """Queue a segment to be topped up to `size` in the background"""
+        key = self.normalize(key)
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._refill_loop, daemon=True)
+                self._worker.start()
+        self._refills.put(key)
+
+    def _refill_loop(self):
+        while True:
+            key = self._refills.get()
+            try:
+                self.refill(key)
+            finally:
+                with self._lock:
+                    self._pending.discard(key)
+
+    def refill(self, key):
+        """Generate variants for a segment until it holds `size` that are not due for rotation"""
+        key = self.normalize(key)
+        while True:
+            with self._lock:
+                missing = self.size - self._young(self._fresh(key))
+            if missing <= 0:
+                return
+            try:
+                subject, body = self.generate(key)
+            except Exception as e:
+                with self._lock:
+                    self.stats['errors'] += 1
+                print(f"Warning: Could not generate variant for {key}: {e}")
+                return
+            self._add(key, subject, body)
+
+    def status(self):
+        with self._lock:
+            segments = {
+                '/'.join(str(part) for part in key): len(self._fresh(key))
+                for key in list(self._variants)
+            }
+            return {
+                'size': self.size,
+                'low_watermark': self.low_watermark,
+                'ttl': self.ttl,
+                'segments': segments,
+                'refilling': len(self._pending),
+                **self.stats
+            }
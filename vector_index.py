@@ -0,0 +1,179 @@
+"""
+In-process vector index for the component snippets.
+
+The corpus (components.txt plus a few manually indexed chunks) is small
+enough to keep every embedding in one contiguous float32 matrix. Vectors
+are L2-normalized when stored, so a top-k cosine query is a single
+matrix-vector product followed by a partial sort, with no network round
+trip.
+
+LocalVectorIndex mirrors the parts of the Pinecone Index API this app uses
+(upsert, query, delete, list, describe_index_stats), so it can stand in for
+pc.Index. The index is persisted as one .npz file, written atomically and
+read through file_cache, so every worker process picks up a reindex
+within FILE_CACHE_CHECK_INTERVAL seconds.
+"""
+import io
+import json
+import os
+import threading
+
+import numpy as np
+
+from file_cache import file_cache
+
+# all-MiniLM-L6-v2 embedding size
+DEFAULT_DIMENSION = 384
+
+
+class _Snapshot:
+    """Immutable contents of the index file"""
+
+    __slots__ = ('ids', 'vectors', 'metadata', 'positions')
+
+    def __init__(self, ids, vectors, metadata):
+        self.ids = ids
+        self.vectors = vectors
+        self.metadata = metadata
+        self.positions = {vector_id: i for i, vector_id in enumerate(ids)}
+
+
+def _normalize(vectors):
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1
+    return vectors / norms
+
+
+class LocalVectorIndex:
+    """
+    Cosine-similarity index backed by a NumPy matrix.
+
+    Args:
+        path (str): .npz file the index is stored in
+        dimension (int): Embedding size
+    """
+
+    def __init__(self, path, dimension=DEFAULT_DIMENSION):
+        self.path = os.path.abspath(path)
+        self.dimension = dimension
+        self._write_lock = threading.Lock()
+        self._empty = _Snapshot([], np.zeros((0, dimension), dtype=np.float32), [])
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def _parse(self, data):
+        with np.load(io.BytesIO(data), allow_pickle=False) as stored:
+            ids = [str(vector_id) for vector_id in stored['ids']]
+            vectors = np.ascontiguousarray(stored['vectors'], dtype=np.float32)
+            metadata = json.loads(str(stored['metadata']))
+        return _Snapshot(ids, vectors, metadata)
+
+    def _snapshot(self):
+        if not self.exists():
+            return self._empty
+        return file_cache.load(self.path, self._parse, key='vector_index')
+
+    def _write(self, ids, vectors, metadata):
+        """Replace the index file in one atomic rename"""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            ids=np.array(ids, dtype=str),
+            vectors=np.ascontiguousarray(vectors, dtype=np.float32).reshape(-1, self.dimension),
+            metadata=np.array(json.dumps(metadata))
+        )
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, self.path)
+        file_cache.invalidate(self.path)
+
+    def refresh(self):
+        """Re-stat the index file on the next read, e.g. after another process rewrote it"""
+        file_cache.invalidate(self.path)
+
+    def upsert(self, vectors):
+        """
+        Insert or replace vectors.
+
+        Args:
+            vectors (list): Dicts with 'id', 'values' and optional 'metadata', as for Pinecone
+        """
+        if not vectors:
+            return {'upserted_count': 0}
+        with self._write_lock:
+            snapshot = self._snapshot()
+            ids = list(snapshot.ids)
+            metadata = list(snapshot.metadata)
+            positions = dict(snapshot.positions)
+            new_values = _normalize([vector['values'] for vector in vectors])
+            rows = []
+            for vector in vectors:
+                position = positions.get(vector['id'])
+                if position is None:
+                    position = positions[vector['id']] = len(ids)
+                    ids.append(vector['id'])
+                    metadata.append(None)
+                metadata[position] = vector.get('metadata') or {}
+                rows.append(position)
+            matrix = np.zeros((len(ids), self.dimension), dtype=np.float32)
+            matrix[:len(snapshot.ids)] = snapshot.vectors
+            matrix[rows] = new_values
+            self._write(ids, matrix, metadata)
+        return {'upserted_count': len(vectors)}
+
+    def delete(self, ids=None, delete_all=False):
+        """Remove vectors by id, or every vector with delete_all=True"""
+        with self._write_lock:
+            if delete_all:
+                self._write([], np.zeros((0, self.dimension), dtype=np.float32), [])
+                return {}
+            snapshot = self._snapshot()
+            drop = set(ids or ())
+            keep = [i for i, vector_id in enumerate(snapshot.ids) if vector_id not in drop]
+            if len(keep) == len(snapshot.ids):
+                return {}
+            self._write(
+                [snapshot.ids[i] for i in keep],
+                snapshot.vectors[keep],
+                [snapshot.metadata[i] for i in keep]
+            )
+        return {}
+
+    def list(self, prefix=None):
+        """Ids in the index, optionally only those starting with `prefix`, as one page"""
+        yield [vector_id for vector_id in self._snapshot().ids if prefix is None or vector_id.startswith(prefix)]
+
+    def query(self, vector, top_k=3, include_metadata=False, **kwargs):
+        """
+        Find the stored vectors most similar to `vector`.
+
+        Returns:
+            dict: {'matches': [{'id', 'score', 'metadata'}]} ordered by descending score
+        """
+        snapshot = self._snapshot()
+        count = len(snapshot.ids)
+        if count == 0 or top_k <= 0:
+            return {'matches': []}
+        scores = snapshot.vectors @ _normalize(vector)
+        top_k = min(top_k, count)
+        if top_k < count:
+            best = np.argpartition(-scores, top_k - 1)[:top_k]
+            best = best[np.argsort(-scores[best])]
+        else:
+            best = np.argsort(-scores)
+        matches = []
+        for i in best:
+            match = {'id': snapshot.ids[i], 'score': float(scores[i])}
+            if include_metadata:
+                match['metadata'] = snapshot.metadata[i]
+            matches.append(match)
+        return {'matches': matches}
+
+    def describe_index_stats(self):
+        return {'dimension': self.dimension, 'total_vector_count': len(self._snapshot().ids)}